@@ -7,4 +7,5 @@ poetry install
 
 poetry run python manage.py collectstatic --no-input
 poetry run python manage.py makemigrations
-poetry run python manage.py migrate
\ No newline at end of file
+poetry run python manage.py migrate
+poetry run python manage.py createcachetable
\ No newline at end of file
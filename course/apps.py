@@ -4,3 +4,21 @@ from django.apps import AppConfig
 class CoursesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "course"
+
+    def ready(self):
+        from django.apps import apps
+        from course.search import track_search
+        from minerva.cache import track_model
+        from minerva.sharding import track_directory, track_shard_key
+
+        course = self.get_model("Course")
+        track_model(course, "course")
+        track_shard_key(course)
+        track_directory(course)
+        track_search(
+            course,
+            [
+                (apps.get_model("course_category", "CourseCategory"), "category"),
+                (apps.get_model("institution", "Institution"), "institution"),
+            ],
+        )
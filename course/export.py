@@ -0,0 +1,105 @@
+import heapq
+import json
+from operator import itemgetter
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from course.models import Course
+from course.serializers import CourseSerializer
+from minerva.sharding import shard_querysets
+from module.models import Module
+from module.serializers import ModuleSerializer
+
+EXPORT_CHUNK_SIZE = 500
+EXPORT_BUFFER_SIZE = 64 * 1024
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Newline delimited JSON: one object per line.
+    """
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        items = data if isinstance(data, list) else [data]
+        return "".join(_dumps(item) + "\n" for item in items).encode()
+
+
+def iter_catalog(chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield every course with its ordered modules nested under ``course_modules``.
+
+    Courses and modules are read with two ordered server-side iterators and
+    merged on the course id, so memory use does not depend on the size of
+    the catalog. With shards, each shard is read that way and the streams
+    are merged on the course id too.
+
+    Args:
+        chunk_size (int): Rows fetched from the database per round trip.
+    """
+    streams = [
+        _iter_courses(courses, chunk_size)
+        for courses in shard_querysets(Course.objects.order_by("id"))
+    ]
+    for _, data in heapq.merge(*streams, key=itemgetter(0)):
+        yield data
+
+
+def _iter_courses(courses, chunk_size):
+    """
+    Yield ``(id, data)`` for the ordered ``courses``, all from one database.
+    """
+    course_serializer = CourseSerializer()
+    module_serializer = ModuleSerializer()
+    modules = (
+        Module.objects.using(courses.db)
+        .order_by("id_course_id", "rank")
+        .iterator(chunk_size=chunk_size)
+    )
+
+    module = next(modules, None)
+    for course in courses.iterator(chunk_size=chunk_size):
+        data = course_serializer.to_representation(course)
+        nested = data["course_modules"] = []
+        while module is not None and module.id_course_id <= course.id:
+            if module.id_course_id == course.id:
+                module.order = len(nested) + 1
+                nested.append(module_serializer.to_representation(module))
+            module = next(modules, None)
+        yield course.id, data
+
+
+def stream_catalog(format="json", chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield the catalog as JSON array or NDJSON text, in buffered pieces.
+
+    Args:
+        format (str): ``json`` for a single array, ``ndjson`` for one course
+            per line.
+        chunk_size (int): Rows fetched from the database per round trip.
+    """
+    ndjson = format == NDJSONRenderer.format
+    buffer, size = [] if ndjson else ["["], 0
+    separator = ""
+    for item in iter_catalog(chunk_size):
+        text = _dumps(item) + "\n" if ndjson else separator + _dumps(item)
+        separator = ","
+        buffer.append(text)
+        size += len(text)
+        if size >= EXPORT_BUFFER_SIZE:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if not ndjson:
+        buffer.append("]\n")
+    if buffer:
+        yield "".join(buffer)
+
+
+def _dumps(data):
+    return json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(",", ":"))
@@ -0,0 +1,384 @@
+import csv
+import json
+
+from django.db import DatabaseError, router, transaction
+from django.db.models import Q
+
+from course.models import Course
+from course.models.course import MAX_MODULES
+from course.search import index_courses
+from course.serializers import CatalogCourseSerializer
+from course_category.models import CourseCategory
+from institution.models import Institution
+from minerva.cache import response_cache
+from minerva.ids import uuid7
+from minerva.sharding import (
+    claim_directory,
+    directory_entries,
+    is_sharded,
+    partition_by_shard,
+    per_course_models,
+)
+from module.models import Module
+from module.models.module import RANK_STEP
+
+CATALOG_BATCH_SIZE = 1000
+CATALOG_FORMATS = ("csv", "ndjson")
+# CSV columns of a module; the other columns are course fields.
+MODULE_COLUMNS = {
+    "module_name": "name",
+    "module_description": "description",
+    "module_instructional_items": "instructional_items",
+    "module_assessment_items": "assessment_items",
+}
+# Course fields overwritten when an imported course already exists.
+UPDATE_FIELDS = [
+    "name",
+    "description",
+    "active",
+    "category",
+    "institution",
+    "assessment_items",
+    "reviews",
+    "comments",
+    "rating",
+    "modules",
+    "last_update",
+    "updated_at",
+]
+MODULE_UPDATE_FIELDS = [
+    "name",
+    "description",
+    "instructional_items",
+    "assessment_items",
+    "updated_at",
+]
+
+
+def decode_lines(lines):
+    """
+    Decode uploaded lines (bytes, or text) as UTF-8, dropping a byte order mark.
+    """
+    first = True
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        if first:
+            line = line.removeprefix("\ufeff")
+            first = False
+        yield line
+
+
+def parse_catalog(lines, format="csv"):
+    """
+    Yield the courses of a catalog as ``(line, data, error)`` triples.
+
+    An NDJSON catalog has one JSON object per line, shaped like the lines of
+    the catalog export: course fields plus an optional ``course_modules``
+    list. A CSV catalog has a header row naming course fields and, for
+    modules, ``module_name``, ``module_description``,
+    ``module_instructional_items`` and ``module_assessment_items``;
+    consecutive rows with the same ``alias`` are one course, each adding a
+    module. Empty cells are left out.
+
+    A line that cannot be parsed yields its ``error`` (a string) instead of
+    ``data``, and the following lines are still read.
+
+    Args:
+        lines (Iterable[str]): Lines of the catalog.
+        format (str): ``"csv"`` or ``"ndjson"``.
+    """
+    if format == "ndjson":
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError as error:
+                yield number, None, f"Invalid JSON: {error}"
+                continue
+            if isinstance(data, dict):
+                yield number, data, None
+            else:
+                yield number, None, "Expected a JSON object."
+        return
+
+    reader = csv.reader(lines)
+    header = None
+    group = []
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            break
+        except csv.Error as error:
+            yield reader.line_num, None, f"Invalid CSV: {error}"
+            continue
+        if not any(cell.strip() for cell in row):
+            continue
+        if header is None:
+            header = [cell.strip() for cell in row]
+            continue
+        values = {
+            name: cell for name, cell in zip(header, row) if name and cell.strip()
+        }
+        if group and values.get("alias") != group[0][1].get("alias"):
+            yield _csv_course(group)
+            group = []
+        group.append((reader.line_num, values))
+    if group:
+        yield _csv_course(group)
+
+
+def _csv_course(rows):
+    number, first = rows[0]
+    data = {key: value for key, value in first.items() if key not in MODULE_COLUMNS}
+    modules = [
+        {
+            MODULE_COLUMNS[key]: value
+            for key, value in values.items()
+            if key in MODULE_COLUMNS
+        }
+        for _, values in rows
+    ]
+    modules = [module for module in modules if module]
+    if modules:
+        data["course_modules"] = modules
+    return number, data, None
+
+
+def import_catalog(items, batch_size=CATALOG_BATCH_SIZE):
+    """
+    Create or update the courses of a catalog, with their modules.
+
+    Courses are matched on ``alias``: a new alias creates a course, a known
+    one overwrites its fields. A course listing ``course_modules`` gets
+    exactly those modules, in that order; one that does not keeps its own.
+
+    Rows are processed in batches. Each row is validated on its own without
+    queries; then the batch is checked against the database with one query
+    per kind of check (existing aliases, names taken by other courses,
+    unknown categories and institutions), and the valid rows are written
+    with one upsert for the courses and one for their modules, in a
+    transaction (per shard). Invalid rows are reported and skipped; the rest
+    of the batch is imported. Should the write still fail (a course created
+    concurrently, say), it is retried one row at a time so that only the
+    failing rows are rejected.
+
+    Args:
+        items (Iterable): ``(line, data, error)`` triples, as yielded by
+            ``parse_catalog``.
+        batch_size (int): Courses checked and written per batch.
+
+    Returns:
+        dict: ``created`` and ``updated`` course counts, the number of
+        ``modules`` written, and ``errors``: one ``{"line", "alias",
+        "errors"}`` entry per rejected row.
+    """
+    summary = {"created": 0, "updated": 0, "modules": 0, "errors": []}
+    seen = {"alias": set(), "name": set()}
+    batch = []
+    for number, data, error in items:
+        if error is not None:
+            _reject(summary, number, data, {"non_field_errors": [error]})
+            continue
+        serializer = CatalogCourseSerializer(data=data)
+        if not serializer.is_valid():
+            _reject(summary, number, data, serializer.errors)
+            continue
+        row = serializer.validated_data
+        duplicate = [name for name in seen if row[name] in seen[name]]
+        if duplicate:
+            _reject(
+                summary,
+                number,
+                data,
+                {name: ["Listed more than once in the catalog."] for name in duplicate},
+            )
+            continue
+        for name in seen:
+            seen[name].add(row[name])
+        batch.append((number, row))
+        if len(batch) >= batch_size:
+            _import_batch(batch, summary)
+            batch = []
+    if batch:
+        _import_batch(batch, summary)
+    return summary
+
+
+def _reject(summary, number, data, errors):
+    alias = data.get("alias") if isinstance(data, dict) else None
+    summary["errors"].append({"line": number, "alias": alias, "errors": errors})
+
+
+def _import_batch(batch, summary):
+    aliases = [row["alias"] for _, row in batch]
+    names = [row["name"] for _, row in batch]
+    if is_sharded():
+        # The directory knows the shard of each alias and every name taken.
+        located = {}
+        for alias, shard in directory_entries("alias", "shard", alias__in=aliases):
+            located.setdefault(shard, []).append(alias)
+        matches = [
+            Course.objects.using(shard).filter(alias__in=known)
+            for shard, known in located.items()
+        ]
+        taken = dict(directory_entries("name", "alias", name__in=names))
+    else:
+        matches = [Course.objects.filter(alias__in=aliases)]
+        taken = dict(Course.objects.filter(name__in=names).values_list("name", "alias"))
+    existing = {}
+    for courses in matches:
+        for course in courses.only("pk", "alias", "modules", "institution"):
+            existing[course.alias] = course
+    known = {
+        "category": _existing_ids(CourseCategory, batch, "category"),
+        "institution": _existing_ids(Institution, batch, "institution"),
+    }
+
+    accepted = []
+    for number, row in batch:
+        errors = {}
+        if taken.get(row["name"], row["alias"]) != row["alias"]:
+            errors["name"] = ["A different course already has this name."]
+        for name, ids in known.items():
+            if row.get(name) is not None and row[name] not in ids:
+                errors[name] = [f"Unknown {name}."]
+        if errors:
+            _reject(summary, number, row, errors)
+        else:
+            accepted.append((number, row))
+    if not accepted:
+        return
+
+    courses, modules = [], {}
+    for _, row in accepted:
+        current = existing.get(row["alias"])
+        fields = {key: value for key, value in row.items() if key != "course_modules"}
+        course = Course(
+            pk=current.pk if current else uuid7(),
+            category_id=fields.pop("category", None),
+            institution_id=fields.pop("institution", None),
+            **fields,
+        )
+        if "course_modules" in row:
+            course.modules = len(row["course_modules"])
+            modules[course.pk] = [
+                Module(id_course_id=course.pk, rank=(index + 1) * RANK_STEP, **module)
+                for index, module in enumerate(row["course_modules"])
+            ]
+        else:
+            course.modules = current.modules if current else 0
+        courses.append(course)
+
+    if is_sharded():
+        groups = partition_by_shard(courses)
+    else:
+        groups = {router.db_for_write(Course): courses}
+    # Courses whose institution now belongs to another shard, by alias, with
+    # the shard they are leaving.
+    moved = {
+        course.alias: existing[course.alias]._state.db
+        for alias, group in groups.items()
+        for course in group
+        if course.alias in existing and existing[course.alias]._state.db != alias
+    }
+
+    lines = {row["alias"]: number for number, row in accepted}
+    for alias, group in groups.items():
+        try:
+            _write_group(alias, group, modules, moved)
+            saved = group
+        except DatabaseError:
+            # Find the offending rows: the others are still imported.
+            saved = []
+            for course in group:
+                try:
+                    _write_group(alias, [course], modules, moved)
+                except DatabaseError as error:
+                    _reject(
+                        summary,
+                        lines[course.alias],
+                        {"alias": course.alias},
+                        {"non_field_errors": [f"Not saved: {error}"]},
+                    )
+                else:
+                    saved.append(course)
+        for course in saved:
+            summary["updated" if course.alias in existing else "created"] += 1
+            summary["modules"] += len(modules.get(course.pk, ()))
+    # Bulk writes send no signals.
+    response_cache.bump("course")
+    response_cache.bump("module")
+
+
+def _existing_ids(model, batch, name):
+    ids = {row[name] for _, row in batch if row.get(name) is not None}
+    if not ids:
+        return set()
+    return set(model.objects.filter(pk__in=ids).values_list("pk", flat=True))
+
+
+def _write_group(alias, courses, modules, moved):
+    """
+    Write ``courses`` to the shard ``alias`` in one transaction, then remove
+    the ones that moved there from their old shard.
+
+    The directory entries are claimed around the write, so an alias or name
+    taken on another shard fails the group. The old copies are only deleted
+    once the new ones are committed: a failure in between leaves a course on
+    both shards rather than on none.
+    """
+    with claim_directory(courses, alias), transaction.atomic(using=alias):
+        _write(alias, courses, modules, moved)
+    for course in courses:
+        source = moved.get(course.alias)
+        if source is not None:
+            with transaction.atomic(using=source):
+                Course._base_manager.using(source).filter(pk=course.pk).delete()
+
+
+def _write(alias, courses, modules, moved):
+    """
+    Upsert ``courses`` and replace the modules of those listed in ``modules``.
+
+    Courses moving from another shard take their own rows along, except the
+    modules that the catalog replaces.
+    """
+    Course.objects.using(alias).bulk_create(
+        courses,
+        update_conflicts=True,
+        unique_fields=["alias"],
+        update_fields=UPDATE_FIELDS,
+    )
+    for course in courses:
+        source = moved.get(course.alias)
+        if source is None:
+            continue
+        for model, field in per_course_models():
+            if model is Module and course.pk in modules:
+                continue
+            rows = model._base_manager.using(source).filter(**{field: course.pk})
+            model._base_manager.using(alias).bulk_create(list(rows))
+    listed = [course.pk for course in courses if course.pk in modules]
+    if listed:
+        # The new modules take the ranks 1..n * RANK_STEP; anything else
+        # left in those courses is not part of the catalog any more.
+        by_count = {}
+        for pk in listed:
+            by_count.setdefault(len(modules[pk]), []).append(pk)
+        ranks = [RANK_STEP * index for index in range(1, MAX_MODULES + 1)]
+        stale = Q(id_course__in=listed) & ~Q(rank__in=ranks)
+        for count, pks in by_count.items():
+            stale |= Q(id_course__in=pks, rank__gt=count * RANK_STEP)
+        Module.objects.using(alias).filter(stale).delete()
+        Module.objects.using(alias).bulk_create(
+            [module for pk in listed for module in modules[pk]],
+            update_conflicts=True,
+            unique_fields=["id_course", "rank"],
+            update_fields=MODULE_UPDATE_FIELDS,
+        )
+    index_courses(
+        Course.objects.using(alias).filter(pk__in=[course.pk for course in courses])
+    )
@@ -0,0 +1,84 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from minerva.benchmark import APIBenchmark, compare
+
+
+class Command(BaseCommand):
+    help = (
+        "Time GET requests to every URL of the API and report p50/p95/p99 "
+        "latency, throughput and queries per request as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=100,
+            help="Measured requests per URL (default: 100).",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=5,
+            help="Unmeasured requests per URL before measuring (default: 5).",
+        )
+        parser.add_argument(
+            "--cold-cache",
+            action="store_true",
+            help="Clear the cache before every request.",
+        )
+        parser.add_argument(
+            "--url",
+            action="append",
+            dest="urls",
+            metavar="NAME",
+            help="Only benchmark this URL name (repeatable).",
+        )
+        parser.add_argument(
+            "--output",
+            "-o",
+            help="File to write the JSON report to (default: standard output).",
+        )
+        parser.add_argument(
+            "--baseline",
+            help="JSON report of an earlier run to compare p95 latencies with.",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Fail when a p95 latency grows by more than this fraction "
+            "over the baseline (default: 0.2).",
+        )
+
+    def handle(self, *args, **options):
+        if options["requests"] < 1:
+            raise CommandError("--requests must be at least 1.")
+        report = APIBenchmark(
+            requests=options["requests"],
+            warmup=options["warmup"],
+            cold_cache=options["cold_cache"],
+            only=options["urls"],
+        ).run()
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                file.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+        if options["baseline"]:
+            with open(options["baseline"], encoding="utf-8") as file:
+                baseline = json.load(file)
+            regressions = compare(report, baseline, options["threshold"])
+            if regressions:
+                raise CommandError(
+                    "p95 latency regressions: "
+                    + ", ".join(
+                        f"{name} {before:.1f} -> {after:.1f} ms"
+                        for name, (before, after) in regressions.items()
+                    )
+                )
@@ -0,0 +1,57 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from minerva.benchmark import InsertBenchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the insert throughput of random (UUIDv4) and time-ordered "
+        "(UUIDv7) primary keys on the module table, and report it as JSON. "
+        "Nothing is left in the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=100_000,
+            help="Modules inserted per run (default: 100000).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows per INSERT statement (default: 1000).",
+        )
+        parser.add_argument(
+            "--rounds",
+            type=int,
+            default=3,
+            help="Runs per key generator (default: 3).",
+        )
+        parser.add_argument(
+            "--output",
+            "-o",
+            help="File to write the JSON report to (default: standard output).",
+        )
+
+    def handle(self, *args, **options):
+        if min(options["rows"], options["batch_size"], options["rounds"]) < 1:
+            raise CommandError("--rows, --batch-size and --rounds must be at least 1.")
+        try:
+            report = InsertBenchmark(
+                rows=options["rows"],
+                batch_size=options["batch_size"],
+                rounds=options["rounds"],
+            ).run()
+        except LookupError as error:
+            raise CommandError(str(error))
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                file.write(output + "\n")
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from course.export import EXPORT_CHUNK_SIZE, stream_catalog
+
+
+class Command(BaseCommand):
+    help = "Export every course with its modules as JSON or NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format",
+            choices=["json", "ndjson"],
+            default="json",
+            help="Output format (default: json).",
+        )
+        parser.add_argument(
+            "--output",
+            "-o",
+            help="File to write to (default: standard output).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=EXPORT_CHUNK_SIZE,
+            help=f"Rows fetched per database round trip (default: {EXPORT_CHUNK_SIZE}).",
+        )
+
+    def handle(self, *args, **options):
+        chunks = stream_catalog(options["format"], options["chunk_size"])
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as output:
+                for chunk in chunks:
+                    output.write(chunk)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
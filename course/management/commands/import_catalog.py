@@ -0,0 +1,62 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from course.importer import (
+    CATALOG_BATCH_SIZE,
+    CATALOG_FORMATS,
+    import_catalog,
+    parse_catalog,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Create or update courses and their modules from a CSV or NDJSON "
+        "catalog, matched on alias."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "catalog",
+            help='Catalog file, or "-" for standard input.',
+        )
+        parser.add_argument(
+            "--format",
+            choices=CATALOG_FORMATS,
+            help="Catalog format (default: from the file extension, else csv).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=CATALOG_BATCH_SIZE,
+            help=f"Courses checked and written per batch (default: {CATALOG_BATCH_SIZE}).",
+        )
+
+    def handle(self, *args, **options):
+        path = options["catalog"]
+        format = options["format"] or ("ndjson" if path.endswith(".ndjson") else "csv")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        try:
+            if path == "-":
+                summary = self.import_lines(sys.stdin, format, options["batch_size"])
+            else:
+                with open(path, encoding="utf-8-sig", newline="") as lines:
+                    summary = self.import_lines(lines, format, options["batch_size"])
+        except (OSError, UnicodeDecodeError) as error:
+            raise CommandError(error)
+
+        self.stdout.write(
+            f"{summary['created']} created, {summary['updated']} updated, "
+            f"{summary['modules']} modules, {len(summary['errors'])} rejected"
+        )
+        for error in summary["errors"]:
+            self.stderr.write(
+                f"line {error['line']}: {error['alias'] or '?'}: "
+                f"{json.dumps(error['errors'])}"
+            )
+
+    def import_lines(self, lines, format, batch_size):
+        return import_catalog(parse_catalog(lines, format), batch_size)
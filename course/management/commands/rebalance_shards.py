@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+
+from course.models import Course, CourseDirectoryEntry
+from course_category.models import CourseCategory
+from institution.models import Institution
+from minerva.sharding import (
+    GLOBAL_DATABASE,
+    is_sharded,
+    mirror_global,
+    record_courses,
+    relocate_course,
+    shard_for_institution,
+    shards,
+)
+
+MIRROR_BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy institutions and categories to every shard and move each course, "
+        "with its modules, to the shard of its institution. Run it after "
+        "adding a shard, or to move an unsharded catalog onto the shards. "
+        "The course directory is then rebuilt from the shards."
+    )
+
+    def handle(self, *args, **options):
+        if not is_sharded():
+            raise CommandError("No shards are configured (SHARD_DATABASE_URLS).")
+
+        for model in (Institution, CourseCategory):
+            rows = model.objects.using(GLOBAL_DATABASE).order_by("pk")
+            for start in range(0, rows.count(), MIRROR_BATCH_SIZE):
+                mirror_global(model, rows[start : start + MIRROR_BATCH_SIZE])
+
+        moved = 0
+        for alias in [GLOBAL_DATABASE, *shards()]:
+            courses = Course.objects.using(alias)
+            # Listed up front: the courses are deleted from ``alias`` as they move.
+            for pk, institution in list(courses.values_list("pk", "institution")):
+                target = shard_for_institution(institution)
+                if target != alias:
+                    moved += relocate_course(courses.get(pk=pk), target)
+        self.stdout.write(f"Moved {moved} courses")
+
+        try:
+            with transaction.atomic(using=GLOBAL_DATABASE):
+                CourseDirectoryEntry.objects.using(GLOBAL_DATABASE).delete()
+                for alias in shards():
+                    courses = Course.objects.using(alias).order_by("pk")
+                    for start in range(0, courses.count(), MIRROR_BATCH_SIZE):
+                        batch = courses.only("pk", "alias", "name")[
+                            start : start + MIRROR_BATCH_SIZE
+                        ]
+                        record_courses(batch, alias)
+        except IntegrityError as error:
+            raise CommandError(
+                "Courses on different shards share an alias or a name; rename "
+                f"them and run again ({error})."
+            )
+        self.stdout.write("Rebuilt the course directory")
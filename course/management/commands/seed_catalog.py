@@ -0,0 +1,82 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from course.models import Course
+from course.seed import SEED_ALIAS_PREFIX, SEED_BATCH_SIZE, seed_catalog
+from minerva.sharding import shard_querysets
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with a large synthetic catalog of institutions, "
+        "categories, courses and modules for benchmarking."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--institutions",
+            type=int,
+            default=1000,
+            help="Institutions to create (default: 1000).",
+        )
+        parser.add_argument(
+            "--categories",
+            type=int,
+            default=100,
+            help="Course categories to create (default: 100).",
+        )
+        parser.add_argument(
+            "--courses",
+            type=int,
+            default=100_000,
+            help="Courses to create (default: 100000).",
+        )
+        parser.add_argument(
+            "--modules-per-course",
+            type=int,
+            default=16,
+            choices=range(0, 17),
+            metavar="{0..16}",
+            help="Modules of every course (default: 16).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=SEED_BATCH_SIZE,
+            help=f"Rows per INSERT statement (default: {SEED_BATCH_SIZE}).",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Random seed; the same seed yields the same rows (default: 0).",
+        )
+
+    def handle(self, *args, **options):
+        seeded = Course.objects.filter(alias__startswith=SEED_ALIAS_PREFIX)
+        if any(courses.exists() for courses in shard_querysets(seeded)):
+            raise CommandError(
+                "The database already holds a seeded catalog; "
+                "seed an empty database instead."
+            )
+
+        started = time.perf_counter()
+
+        def progress(model, inserted):
+            if options["verbosity"] > 1:
+                self.stdout.write(f"{model.__name__}: {inserted}")
+
+        counts = seed_catalog(
+            institutions=options["institutions"],
+            categories=options["categories"],
+            courses=options["courses"],
+            modules_per_course=options["modules_per_course"],
+            batch_size=options["batch_size"],
+            seed=options["seed"],
+            progress=progress,
+        )
+        summary = ", ".join(f"{count} {name}" for name, count in counts.items())
+        self.stdout.write(
+            f"Inserted {summary} in {time.perf_counter() - started:.1f} s"
+        )
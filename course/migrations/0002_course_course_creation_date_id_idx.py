@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0001_initial'),
+        ('course_category', '0001_initial'),
+        ('institution', '0002_institution_institution_name_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['creation_date', 'id'], name='course_creation_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,114 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:09
+
+from functools import reduce
+from operator import add
+
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.contrib.postgres.search import SearchVector
+from django.db import connections, migrations, models
+from django.db.models import OuterRef, Subquery
+
+# Frozen copies of the course.search helpers as of this migration, so that
+# later changes to that module do not change what this migration does.
+SEARCH_CONFIG = "simple"
+SEARCH_FIELDS = {
+    "name": "A",
+    "alias": "A",
+    "category__name": "B",
+    "institution__name": "B",
+    "description": "C",
+}
+FTS_TABLE = "course_search"
+FTS_COLUMNS = ["name", "alias", "category", "institution", "description"]
+FTS_WEIGHTS = [0, 10, 10, 4, 4, 1]
+
+
+def index_courses(queryset):
+    connection = connections[queryset.db]
+    if connection.vendor == "postgresql":
+        vector = reduce(
+            add,
+            (
+                SearchVector(field, weight=weight, config=SEARCH_CONFIG)
+                for field, weight in SEARCH_FIELDS.items()
+            ),
+        )
+        document = queryset.model.objects.filter(pk=OuterRef("pk")).annotate(
+            vector=vector
+        )
+        queryset.update(search_vector=Subquery(document.values("vector")[:1]))
+        return
+    if connection.vendor != "sqlite":
+        return
+
+    ids, params = queryset.values("pk").query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE course_id IN ({ids})", params)
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (course_id, {', '.join(FTS_COLUMNS)}) "
+            f"SELECT c.id, c.name, c.alias, COALESCE(cat.name, ''), "
+            f"COALESCE(i.name, ''), COALESCE(c.description, '') "
+            f"FROM course_course c "
+            f"LEFT JOIN course_category_coursecategory cat ON cat.id = c.category_id "
+            f"LEFT JOIN institution_institution i ON i.id = c.institution_id "
+            f"WHERE c.id IN ({ids})",
+            params,
+        )
+
+
+def create_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX course_search_vector_idx ON course_course "
+            "USING gin (search_vector)"
+        )
+    elif vendor == "sqlite":
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            f"course_id UNINDEXED, {', '.join(FTS_COLUMNS)}, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rank) "
+            f"VALUES ('rank', 'bm25({', '.join(map(str, FTS_WEIGHTS))})')"
+        )
+    Course = apps.get_model("course", "Course")
+    index_courses(Course.objects.using(schema_editor.connection.alias).all())
+
+
+def drop_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS course_search_vector_idx")
+    elif vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0003_course_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseSearchEntry',
+            fields=[
+                ('course', models.OneToOneField(db_column='course_id', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='course.course')),
+                ('document', models.TextField(db_column='course_search')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'course_search',
+                'managed': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("course", "0004_course_search"),
+        ("course_category", "0002_coursecategory_updated_at"),
+        ("institution", "0003_institution_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="course",
+            index=models.Index(
+                fields=["active", "category", "-rating", "-id"],
+                name="course_active_cat_rating_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="course",
+            index=models.Index(
+                fields=["institution", "active"], name="course_institution_active_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="course",
+            index=models.Index(fields=["rating", "id"], name="course_rating_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="course",
+            index=models.Index(fields=["reviews", "id"], name="course_reviews_id_idx"),
+        ),
+    ]
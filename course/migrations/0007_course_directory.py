@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("course", "0006_uuid7_primary_key"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CourseDirectoryEntry",
+            fields=[
+                ("course", models.UUIDField(primary_key=True, serialize=False)),
+                ("alias", models.CharField(max_length=16, unique=True)),
+                ("name", models.CharField(max_length=64, unique=True)),
+                ("shard", models.CharField(max_length=64)),
+            ],
+        ),
+    ]
@@ -2,5 +2,7 @@
 
 from typing import Sequence
 from course.models.course import Course
+from course.models.directory import CourseDirectoryEntry
+from course.models.search import CourseSearchEntry
 
-__all__: Sequence[str] = ["Course"]
+__all__: Sequence[str] = ["Course", "CourseDirectoryEntry", "CourseSearchEntry"]
@@ -1,6 +1,17 @@
-from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, router
 from django.core.validators import MinValueValidator, MaxValueValidator, RegexValidator
-import uuid
+from minerva.ids import uuid7
+from minerva.sharding import claim_directory
+
+# Most modules a course may have.
+MAX_MODULES = 16
+
+
+class CourseManager(models.Manager):
+    def get_queryset(self):
+        # The search document is only ever read inside the database.
+        return super().get_queryset().defer("search_vector")
 
 
 class Course(models.Model):
@@ -8,21 +19,23 @@ class Course(models.Model):
     Model for Courses
 
     Attributes:
-        id (uuid): Unique identifier for the course
+        id (uuid): Unique, time-ordered (UUIDv7) identifier for the course
         name (str): Name complete of course
         alias (str): A short form of call a course
         description (str): A description about the course
         creation_date (date): Date of creation of the course
         last_update (date): Date of the last update
+        updated_at (datetime): Timestamp of the last update, used as cache validator
         modules (int): count the number of modules
         active (bool): true if the course is active
         assessment_items (int): elemnts of evaluate
         reviews (int): The number of reviews
         comments (int): The number of comments
         rating (float): The mean appraisement of the course
+        search_vector (tsvector): Weighted search document, maintained by course.search (PostgreSQL only)
     """
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     category = models.ForeignKey(
         "course_category.CourseCategory", on_delete=models.SET_NULL, null=True
     )
@@ -44,16 +57,46 @@ class Course(models.Model):
     description = models.TextField(max_length=512, null=True, blank=True)
     creation_date = models.DateField(auto_now_add=True, blank=True)
     last_update = models.DateField(auto_now=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     modules = models.IntegerField(
         default=0,
         blank=True,
         null=True,
-        validators=[MinValueValidator(0), MaxValueValidator(16)],
+        validators=[MinValueValidator(0), MaxValueValidator(MAX_MODULES)],
     )
     assessment_items = models.PositiveIntegerField(default=0, blank=True)
     reviews = models.PositiveIntegerField(default=0, blank=True)
     comments = models.PositiveIntegerField(default=0, blank=True)
     rating = models.DecimalField(max_digits=4, decimal_places=2, null=True, blank=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = CourseManager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["creation_date", "id"], name="course_creation_date_id_idx"
+            ),
+            # Browse filters of the course list, newest ratings first.
+            models.Index(
+                fields=["active", "category", "-rating", "-id"],
+                name="course_active_cat_rating_idx",
+            ),
+            models.Index(
+                fields=["institution", "active"], name="course_institution_active_idx"
+            ),
+            # Sort keys of the course list (scanned backwards for descending).
+            models.Index(fields=["rating", "id"], name="course_rating_id_idx"),
+            models.Index(fields=["reviews", "id"], name="course_reviews_id_idx"),
+        ]
 
     def __str__(self):
         return self.name
+
+    def save(self, *args, **kwargs):
+        """
+        Claims the alias and name across the shards, when sharded, before saving.
+        """
+        using = kwargs.get("using") or router.db_for_write(Course, instance=self)
+        with claim_directory([self], using):
+            super().save(*args, **kwargs)
@@ -0,0 +1,22 @@
+from django.db import models
+
+
+class CourseDirectoryEntry(models.Model):
+    """
+    Shard of a course, when the catalog is sharded (see minerva.sharding).
+
+    Kept on the default database only. The unique constraints of the course
+    table only hold within a shard; the ones of this table keep aliases and
+    names unique across every shard.
+
+    Attributes:
+        course (uuid): Id of the course; not a foreign key, as the course is on another database
+        alias (str): Alias of the course
+        name (str): Name of the course
+        shard (str): Alias of the database holding the course
+    """
+
+    course = models.UUIDField(primary_key=True)
+    alias = models.CharField(max_length=16, unique=True)
+    name = models.CharField(max_length=64, unique=True)
+    shard = models.CharField(max_length=64)
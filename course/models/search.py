@@ -0,0 +1,32 @@
+from django.db import models
+
+
+class CourseSearchEntry(models.Model):
+    """
+    Row of the SQLite FTS5 table used for course search (see course.search).
+
+    Not managed by Django: the table only exists on SQLite, where it is
+    created by a migration. It lets course queries join the full-text
+    index instead of running one MATCH per course.
+
+    Attributes:
+        course (uuid): Course the row indexes
+        document (str): Hidden column named after the table; comparing it to a
+            query string performs a full-text MATCH
+        rank (float): bm25 score of the row for the MATCH, lower is better
+    """
+
+    course = models.OneToOneField(
+        "course.Course",
+        primary_key=True,
+        db_column="course_id",
+        db_constraint=False,
+        on_delete=models.DO_NOTHING,
+        related_name="search_entry",
+    )
+    document = models.TextField(db_column="course_search")
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = "course_search"
@@ -0,0 +1,200 @@
+import re
+from functools import reduce
+from operator import add
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections
+from django.db.models import F, FloatField, OuterRef, Subquery
+from django.db.models.functions import Cast
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.utils import timezone
+
+from course.models import CourseSearchEntry
+
+# Text search configuration: no stemming, so both backends tokenize alike.
+SEARCH_CONFIG = "simple"
+
+# Searched fields with their weight, from most to least relevant.
+SEARCH_FIELDS = {
+    "name": "A",
+    "alias": "A",
+    "category__name": "B",
+    "institution__name": "B",
+    "description": "C",
+}
+
+# SQLite full-text table, one row per course, mapped by CourseSearchEntry.
+# Column weights of its bm25 rank follow SEARCH_FIELDS (course_id is not indexed).
+FTS_TABLE = CourseSearchEntry._meta.db_table
+FTS_COLUMNS = ["name", "alias", "category", "institution", "description"]
+FTS_WEIGHTS = [0, 10, 10, 4, 4, 1]
+
+
+def search_courses(queryset, query):
+    """
+    Filter ``queryset`` to the courses matching ``query``, annotated with ``rank``.
+
+    Every word of ``query`` must match. A higher ``rank`` is a better match.
+    On PostgreSQL the maintained ``search_vector`` column is matched through
+    its GIN index; on SQLite the FTS5 table is used instead.
+
+    Args:
+        queryset (QuerySet): Courses to search.
+        query (str): Words typed by the user; punctuation is ignored.
+    """
+    words = re.findall(r"\w+", query)
+    if not words:
+        return queryset.none()
+
+    if connections[queryset.db].vendor == "postgresql":
+        search = SearchQuery(" ".join(words), config=SEARCH_CONFIG)
+        # Cast to double precision so cursors carry the exact rank.
+        rank = Cast(SearchRank(F("search_vector"), search), FloatField())
+        return queryset.filter(search_vector=search).annotate(rank=rank)
+
+    match = " ".join('"%s"' % word for word in words)
+    # Joins the FTS5 table; its rank column is a bm25 score, lower is better.
+    rank = -F("search_entry__rank")
+    return queryset.filter(search_entry__document=match).annotate(rank=rank)
+
+
+def index_courses(queryset):
+    """
+    Rebuild the search data of the courses in ``queryset``.
+
+    One set-based statement on PostgreSQL (two on SQLite), however many
+    courses are affected.
+    """
+    model = queryset.model
+    connection = connections[queryset.db]
+    if connection.vendor == "postgresql":
+        vector = reduce(
+            add,
+            (
+                SearchVector(field, weight=weight, config=SEARCH_CONFIG)
+                for field, weight in SEARCH_FIELDS.items()
+            ),
+        )
+        document = model.objects.filter(pk=OuterRef("pk")).annotate(vector=vector)
+        queryset.update(search_vector=Subquery(document.values("vector")[:1]))
+        return
+    if connection.vendor != "sqlite":
+        return
+
+    ids, params = queryset.values("pk").query.sql_with_params()
+    table = model._meta.db_table
+    category = model._meta.get_field("category").related_model._meta.db_table
+    institution = model._meta.get_field("institution").related_model._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE course_id IN ({ids})", params)
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (course_id, {', '.join(FTS_COLUMNS)}) "
+            f"SELECT c.id, c.name, c.alias, COALESCE(cat.name, ''), "
+            f"COALESCE(i.name, ''), COALESCE(c.description, '') "
+            f"FROM {table} c "
+            f"LEFT JOIN {category} cat ON cat.id = c.category_id "
+            f"LEFT JOIN {institution} i ON i.id = c.institution_id "
+            f"WHERE c.id IN ({ids})",
+            params,
+        )
+
+
+def unindex_course(course):
+    """
+    Drop a deleted course from the SQLite full-text table.
+    """
+    connection = connections[course._state.db or "default"]
+    if connection.vendor != "sqlite":
+        return
+    pk = course._meta.pk.get_db_prep_value(course.pk, connection)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE course_id = %s", [pk])
+
+
+def create_search_index(schema_editor):
+    """
+    Create the GIN index (PostgreSQL) or the FTS5 table (SQLite).
+
+    Done from a migration rather than ``Meta.indexes`` because neither
+    exists on the other backend.
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX course_search_vector_idx ON course_course "
+            "USING gin (search_vector)"
+        )
+    elif vendor == "sqlite":
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            f"course_id UNINDEXED, {', '.join(FTS_COLUMNS)}, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        # Persistent setting: the rank column uses the weighted bm25.
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rank) "
+            f"VALUES ('rank', 'bm25({', '.join(map(str, FTS_WEIGHTS))})')"
+        )
+
+
+def drop_search_index(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS course_search_vector_idx")
+    elif vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def track_search(course_model, related_models):
+    """
+    Keep the search data in step with saves and deletes.
+
+    A course is reindexed when it is saved; every course of a category or
+    institution is reindexed when that object is renamed or deleted. The
+    courses of a deleted one also get a new ``updated_at``: they are
+    detached (SET NULL) with a queryset update, which leaves it alone, and
+    their cache validators would otherwise still match.
+    """
+
+    def course_saved(sender, instance, using, raw=False, **kwargs):
+        if not raw:
+            index_courses(course_model.objects.using(using).filter(pk=instance.pk))
+
+    def course_deleted(sender, instance, **kwargs):
+        unindex_course(instance)
+
+    post_save.connect(
+        course_saved, sender=course_model, weak=False, dispatch_uid="course_search"
+    )
+    post_delete.connect(
+        course_deleted, sender=course_model, weak=False, dispatch_uid="course_search"
+    )
+
+    for model, field in related_models:
+
+        def related_saved(
+            sender, instance, using, raw=False, created=False, field=field, **kwargs
+        ):
+            if not raw and not created:
+                courses = course_model.objects.using(using)
+                index_courses(courses.filter(**{field: instance.pk}))
+
+        def related_deleting(sender, instance, using, field=field, **kwargs):
+            # The courses are detached (SET NULL) before post_delete.
+            instance._search_course_ids = list(
+                course_model.objects.using(using)
+                .filter(**{field: instance.pk})
+                .values_list("pk", flat=True)
+            )
+
+        def related_deleted(sender, instance, using, **kwargs):
+            ids = getattr(instance, "_search_course_ids", None)
+            if ids:
+                courses = course_model.objects.using(using).filter(pk__in=ids)
+                courses.update(updated_at=timezone.now())
+                index_courses(courses)
+
+        uid = f"course_search:{model._meta.label}"
+        post_save.connect(related_saved, sender=model, weak=False, dispatch_uid=uid)
+        pre_delete.connect(related_deleting, sender=model, weak=False, dispatch_uid=uid)
+        post_delete.connect(related_deleted, sender=model, weak=False, dispatch_uid=uid)
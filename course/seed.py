@@ -0,0 +1,152 @@
+import random
+import uuid
+from decimal import Decimal
+from itertools import islice
+
+from django.db import transaction
+
+from course.models import Course
+from course.search import index_courses
+from course_category.models import CourseCategory
+from institution.models import Institution
+from minerva.cache import response_cache
+from minerva.sharding import (
+    GLOBAL_DATABASE,
+    claim_directory,
+    is_sharded,
+    mirror_global,
+    partition_by_shard,
+    shard_querysets,
+)
+from module.models import Module
+from module.models.module import RANK_STEP
+
+SEED_BATCH_SIZE = 5000
+# Aliases of seeded courses start with this prefix (aliases allow 16 chars).
+SEED_ALIAS_PREFIX = "seed-"
+
+
+def seed_catalog(
+    institutions=1000,
+    categories=100,
+    courses=100_000,
+    modules_per_course=16,
+    batch_size=SEED_BATCH_SIZE,
+    seed=0,
+    progress=None,
+):
+    """
+    Insert a synthetic catalog with ``bulk_create``.
+
+    The same arguments always produce the same rows, primary keys included,
+    so benchmark results can be compared across commits. Rows are generated
+    lazily and inserted ``batch_size`` at a time, one transaction per batch,
+    so memory use does not depend on the size of the catalog. With shards,
+    courses and modules are inserted on the shard of their institution, the
+    courses are recorded in the course directory, and institutions and
+    categories are copied to every shard.
+
+    Args:
+        institutions (int): Institutions to create.
+        categories (int): Course categories to create.
+        courses (int): Courses, spread randomly over institutions and categories.
+        modules_per_course (int): Modules of every course (at most 16).
+        batch_size (int): Rows per INSERT statement.
+        seed (int): Seed of the random generator.
+        progress (callable): Called with the model and the number of rows
+            inserted so far after every batch.
+
+    Returns:
+        dict: Number of rows inserted per model name.
+    """
+    rng = random.Random(seed)
+
+    def new_id():
+        return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+    institution_ids = [new_id() for _ in range(institutions)]
+    category_ids = [new_id() for _ in range(categories)]
+    course_ids = [new_id() for _ in range(courses)]
+
+    institution_rows = (
+        Institution(
+            id=pk,
+            name=f"Institution {index}",
+            description=f"Synthetic institution {index}.",
+            url=f"https://institution-{index}.example.com",
+            image=f"institutions/{index}.png",
+            icon=f"institutions/{index}-icon.png",
+        )
+        for index, pk in enumerate(institution_ids)
+    )
+    category_rows = (
+        CourseCategory(id=pk, name=f"Category {index}")
+        for index, pk in enumerate(category_ids)
+    )
+    course_rows = (
+        Course(
+            id=pk,
+            name=f"Course {index}",
+            alias=f"{SEED_ALIAS_PREFIX}{index:x}",
+            description=f"Synthetic course {index}.",
+            institution_id=rng.choice(institution_ids) if institution_ids else None,
+            category_id=rng.choice(category_ids) if category_ids else None,
+            active=rng.random() < 0.8,
+            modules=modules_per_course,
+            assessment_items=rng.randint(0, 64),
+            reviews=rng.randint(0, 5000),
+            comments=rng.randint(0, 500),
+            rating=Decimal(rng.randint(100, 500)) / 100,
+        )
+        for index, pk in enumerate(course_ids)
+    )
+    module_rows = (
+        Module(
+            id=new_id(),
+            id_course_id=course_id,
+            name=f"Module {order}",
+            description=f"Module {order} of a synthetic course.",
+            rank=order * RANK_STEP,
+            instructional_items=rng.randint(1, 64),
+            assessment_items=rng.randint(1, 64),
+        )
+        for course_id in course_ids
+        for order in range(1, modules_per_course + 1)
+    )
+
+    counts = {}
+    course_shards = {}
+    for model, rows in (
+        (Institution, institution_rows),
+        (CourseCategory, category_rows),
+        (Course, course_rows),
+        (Module, module_rows),
+    ):
+        counts[model.__name__] = _insert(
+            model, rows, batch_size, progress, course_shards
+        )
+
+    seeded = Course.objects.filter(alias__startswith=SEED_ALIAS_PREFIX)
+    for courses in shard_querysets(seeded):
+        index_courses(courses)
+    for namespace in ("institution", "course_category", "course", "module"):
+        response_cache.bump(namespace)
+    return counts
+
+
+def _insert(model, rows, batch_size, progress, course_shards):
+    inserted = 0
+    while batch := list(islice(rows, batch_size)):
+        if is_sharded(model):
+            groups = partition_by_shard(batch, course_shards)
+        else:
+            groups = {GLOBAL_DATABASE: batch}
+        for alias, objs in groups.items():
+            with claim_directory(objs, alias), transaction.atomic(using=alias):
+                model.objects.using(alias).bulk_create(objs, batch_size=batch_size)
+        if not is_sharded(model):
+            mirror_global(model, batch)
+        inserted += len(batch)
+        if progress is not None:
+            progress(model, inserted)
+    return inserted
@@ -1,5 +1,12 @@
 """Init file for serializers in the courses app."""
 
-from course.serializers.course import CourseSerializer
+from course.serializers.catalog import CatalogCourseSerializer
+from course.serializers.course import CourseSerializer, CourseFilterSerializer
+from course.serializers.tree import CourseTreeSerializer
 
-__all__ = ["CourseSerializer"]
+__all__ = [
+    "CatalogCourseSerializer",
+    "CourseSerializer",
+    "CourseFilterSerializer",
+    "CourseTreeSerializer",
+]
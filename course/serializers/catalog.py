@@ -0,0 +1,55 @@
+from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
+from course.models import Course
+from course.models.course import MAX_MODULES
+from module.models import Module
+
+
+class CatalogModuleSerializer(serializers.ModelSerializer):
+    """Module of an imported course, in course order."""
+
+    class Meta:
+        model = Module
+        fields = ["name", "description", "instructional_items", "assessment_items"]
+
+
+class CatalogCourseSerializer(serializers.ModelSerializer):
+    """
+    One course of a catalog import (see ``course.importer``).
+
+    Validated without touching the database: the uniqueness of ``name`` and
+    ``alias`` and the existence of the category and institution are checked
+    for a whole batch of rows at once by the importer.
+    """
+
+    category = serializers.UUIDField(required=False, allow_null=True)
+    institution = serializers.UUIDField(required=False, allow_null=True)
+    course_modules = CatalogModuleSerializer(
+        many=True, required=False, max_length=MAX_MODULES
+    )
+
+    class Meta:
+        model = Course
+        fields = [
+            "name",
+            "alias",
+            "description",
+            "active",
+            "category",
+            "institution",
+            "assessment_items",
+            "reviews",
+            "comments",
+            "rating",
+            "course_modules",
+        ]
+
+    def get_fields(self):
+        fields = super().get_fields()
+        for field in fields.values():
+            field.validators = [
+                validator
+                for validator in field.validators
+                if not isinstance(validator, UniqueValidator)
+            ]
+        return fields
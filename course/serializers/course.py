@@ -1,9 +1,87 @@
 from rest_framework import serializers
 from course.models import Course
+from course_category.serializers import CourseCategorySerializer
+from institution.serializers import InstitutionSerializer
+from minerva.serializers import SparseFieldsetMixin
+from minerva.sharding import DIRECTORY_FIELDS, directory_holder, is_sharded
 
 
-class CourseSerializer(serializers.ModelSerializer):
+class UniqueAcrossShards:
+    """
+    Reject a value another course has on any shard: the unique constraints
+    of the course table only hold within one.
+    """
+
+    requires_context = True
+
+    def __call__(self, value, serializer_field):
+        if not is_sharded():
+            return
+        holder = directory_holder(serializer_field.source, value)
+        instance = serializer_field.parent.instance
+        if holder is not None and (instance is None or holder != instance.pk):
+            raise serializers.ValidationError(
+                f"course with this {serializer_field.source} already exists.",
+                code="unique",
+            )
+
+
+class CourseSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    expandable_fields = {
+        "category": CourseCategorySerializer,
+        "institution": InstitutionSerializer,
+    }
 
     class Meta:
         model = Course
-        fields = "__all__"
+        exclude = ["search_vector"]
+
+    def get_fields(self):
+        fields = super().get_fields()
+        for name in DIRECTORY_FIELDS:
+            if name in fields:
+                fields[name].validators.append(UniqueAcrossShards())
+        return fields
+
+
+class CourseFilterSerializer(serializers.Serializer):
+    """
+    Query parameters of the course list.
+
+    Every ordering is paired with ``id`` in the same direction, so each one
+    is served by a single ``(field, id)`` index scanned either way.
+    """
+
+    ORDERINGS = {
+        name: (f"{prefix}{field}", f"{prefix}id")
+        for field in ("creation_date", "name", "rating", "reviews")
+        for prefix, name in (("", field), ("-", f"-{field}"))
+    }
+
+    category = serializers.UUIDField(required=False)
+    institution = serializers.UUIDField(required=False)
+    active = serializers.BooleanField(required=False, allow_null=True, default=None)
+    min_rating = serializers.DecimalField(max_digits=4, decimal_places=2, required=False)
+    ordering = serializers.ChoiceField(choices=list(ORDERINGS), default="creation_date")
+
+    def filter_queryset(self, queryset):
+        """
+        Apply the validated filters to ``queryset``.
+        """
+        data = self.validated_data
+        for name in ("category", "institution"):
+            if name in data:
+                queryset = queryset.filter(**{name: data[name]})
+        if data["active"] is not None:
+            # Written as IN: a bare boolean column in WHERE (what active=True
+            # compiles to) cannot seek an index on SQLite.
+            queryset = queryset.filter(active__in=[data["active"]])
+        if "min_rating" in data:
+            queryset = queryset.filter(rating__gte=data["min_rating"])
+        return queryset
+
+    def get_ordering(self):
+        """
+        Sort key for the keyset paginator.
+        """
+        return self.ORDERINGS[self.validated_data["ordering"]]
@@ -0,0 +1,28 @@
+from rest_framework import serializers
+from course.serializers.course import CourseSerializer
+from course_category.serializers import CourseCategorySerializer
+from institution.serializers import InstitutionSerializer
+from module.models import Module
+
+
+class CourseTreeModuleSerializer(serializers.ModelSerializer):
+    """Module nested in a course tree; the course is the parent object."""
+
+    order = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Module
+        exclude = ["rank", "id_course"]
+
+
+class CourseTreeSerializer(CourseSerializer):
+    """
+    Course with its category, institution and ordered modules inlined.
+
+    Expects courses loaded with ``course.views.tree.tree_queryset``, so the
+    whole tree is read with a fixed number of queries.
+    """
+
+    category = CourseCategorySerializer(read_only=True)
+    institution = InstitutionSerializer(read_only=True)
+    course_modules = CourseTreeModuleSerializer(many=True, read_only=True)
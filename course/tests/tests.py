@@ -1,4 +1,14 @@
 import base64
+import json
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import DatabaseError, connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient, APITestCase
 from django.contrib.auth.models import User
 from rest_framework import status
@@ -6,7 +16,11 @@ from django.urls import reverse
 from course_category.models import CourseCategory
 from institution.models import Institution
 from course.models import Course
+from course import importer
+from course.importer import import_catalog, parse_catalog
+from course.seed import seed_catalog
 from course.serializers import CourseSerializer
+from module.models import Module
 
 
 class CourseTests(APITestCase):
@@ -49,7 +63,148 @@ class CourseTests(APITestCase):
         courses = Course.objects.all()
         serializer = CourseSerializer(courses, many=True)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data["results"], serializer.data)
+        self.assertIsNone(response.data["next"])
+        self.assertIsNone(response.data["previous"])
+
+    def test_get_courses_paginated_with_cursor(self):
+        """
+        Test to ensure the course list is paged with opaque next/previous cursors.
+        """
+        for i in range(4):
+            Course.objects.create(name=f"Paged Course {i}", alias=f"paged-{i}")
+        expected = [
+            str(pk)
+            for pk in Course.objects.order_by("creation_date", "id").values_list(
+                "id", flat=True
+            )
+        ]
+
+        url = reverse("course_list_create") + "?page_size=2"
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data["results"]), 2)
+            seen.extend(course["id"] for course in response.data["results"])
+            url = response.data["next"]
+        self.assertEqual(seen, expected)
+
+        response = self.client.get(reverse("course_list_create") + "?page_size=2")
+        response = self.client.get(response.data["next"])
+        response = self.client.get(response.data["previous"])
+        self.assertEqual(
+            [course["id"] for course in response.data["results"]], expected[:2]
+        )
+        self.assertIsNone(response.data["previous"])
+
+    def test_get_courses_with_invalid_cursor(self):
+        """
+        Test to confirm a malformed or forged cursor returns 404.
+        """
+        response = self.client.get(reverse("course_list_create") + "?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        forged = base64.urlsafe_b64encode(b'{"p":[null,null]}').decode().rstrip("=")
+        for ordering in ("creation_date", "rating"):
+            response = self.client.get(
+                reverse("course_list_create"), {"cursor": forged, "ordering": ordering}
+            )
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_get_courses_filtered(self):
+        """
+        Test to filter the course list by category, institution, active and rating.
+        """
+        other = Course.objects.create(
+            name="Other Course", alias="other", active=True, rating=Decimal("4.50")
+        )
+        Course.objects.filter(pk=self.course.pk).update(rating=Decimal("3.00"))
+        url = reverse("course_list_create")
+
+        def ids(params):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return [course["id"] for course in response.data["results"]]
+
+        self.assertEqual(ids({"category": self.category.id}), [str(self.course.id)])
+        self.assertEqual(
+            ids({"institution": self.institution.id, "active": "false"}),
+            [str(self.course.id)],
+        )
+        self.assertEqual(ids({"active": "true"}), [str(other.id)])
+        self.assertEqual(ids({"min_rating": "4"}), [str(other.id)])
+        self.assertEqual(ids({"ordering": "-rating"}), [str(other.id), str(self.course.id)])
+
+        response = self.client.get(url, {"ordering": "price", "min_rating": "x"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(response.data), {"ordering", "min_rating"})
+
+    def test_get_courses_ordered_by_nullable_rating(self):
+        """
+        Test that paging by rating visits unrated courses exactly once, both ways.
+        """
+        for i in range(6):
+            Course.objects.create(
+                name=f"Rated Course {i}",
+                alias=f"rated-{i}",
+                rating=None if i % 2 else Decimal(i),
+            )
+        for ordering in ("rating", "-rating"):
+            expected = [
+                str(pk)
+                for pk in Course.objects.order_by(ordering, ordering.replace("rating", "id"))
+                .values_list("id", flat=True)
+            ]
+            url = reverse("course_list_create") + f"?ordering={ordering}&page_size=2"
+            seen = []
+            while url:
+                response = self.client.get(url)
+                seen.extend(course["id"] for course in response.data["results"])
+                url = response.data["next"]
+            self.assertEqual(seen, expected)
+
+            response = self.client.get(response.data["previous"])
+            self.assertEqual(
+                [course["id"] for course in response.data["results"]], expected[-3:-1]
+            )
+
+    def test_get_courses_with_sparse_fieldset(self):
+        """
+        Test to ensure ?fields= narrows every course to the requested fields.
+        """
+        response = self.client.get(
+            reverse("course_list_create") + "?fields=id,name,alias"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["results"],
+            [{"id": str(self.course.id), "name": "Test Course", "alias": "test-course"}],
+        )
+
+    def test_get_courses_with_expand(self):
+        """
+        Test to ensure ?expand= inlines the category and institution objects.
+        """
+        response = self.client.get(
+            reverse("course_list_create") + "?expand=category,institution"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        course = response.data["results"][0]
+        self.assertEqual(course["category"]["name"], "Test Category")
+        self.assertEqual(course["institution"]["name"], "Test Institution")
+        self.assertIn("description", course)
+
+    def test_get_courses_with_unknown_field(self):
+        """
+        Test to confirm unknown ?fields= or ?expand= values are rejected.
+        """
+        response = self.client.get(reverse("course_list_create") + "?fields=name,foo")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("fields", response.data)
+        response = self.client.get(reverse("course_list_create") + "?expand=modules")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("expand", response.data)
 
     def test_create_course(self):
         """
@@ -140,6 +295,89 @@ class CourseTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data, serializer.data)
 
+    def test_get_single_course_by_slug_with_fieldset(self):
+        """
+        Test to verify ?fields= and ?expand= also apply to the detail endpoints.
+        """
+        response = self.client.get(
+            reverse("course_detail_by_slug", kwargs={"alias": "test-course"})
+            + "?fields=name,category&expand=category"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data), {"name", "category"})
+        self.assertEqual(response.data["category"]["id"], str(self.category.id))
+        self.assertEqual(response.data["category"]["name"], "Test Category")
+
+    def test_get_single_course_not_modified(self):
+        """
+        Test to verify a matching If-None-Match returns 304 until the course changes.
+        """
+        url = reverse("course_detail_by_id", kwargs={"id": self.course.id})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+        self.assertIn("Last-Modified", response)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get(url + "?fields=name", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.course.name = "Renamed Course"
+        self.course.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_get_all_courses_not_modified(self):
+        """
+        Test to verify the list ETag changes when a course is added or removed.
+        """
+        url = reverse("course_list_create")
+        response = self.client.get(url)
+        etag = response["ETag"]
+        self.assertNotIn("Last-Modified", response)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Course.objects.create(name="Another Course", alias="another")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+
+        Course.objects.filter(alias="another").delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # A delete leaves the newest timestamp unchanged.
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE="Fri, 01 Jan 2100 00:00:00 GMT"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_category_delete_changes_etags(self):
+        """
+        Test to verify deleting a course's category invalidates the old ETags.
+        """
+        urls = [
+            reverse("course_list_create"),
+            reverse("course_detail_by_id", kwargs={"id": self.course.id}),
+        ]
+        etags = [self.client.get(url)["ETag"] for url in urls]
+
+        self.category.delete()
+        for url, etag in zip(urls, etags):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data["category"])
+
     def test_update_course_by_slug(self):
         """
         Test to ensure an existing course can be updated using its slug.
@@ -194,3 +432,614 @@ class CourseTests(APITestCase):
             reverse("course_detail_by_slug", kwargs={"alias": "nonexistent-slug"})
         )
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_search_courses_ranked(self):
+        """
+        Test that search matches every word and ranks name matches above description matches.
+        """
+        described = Course.objects.create(
+            name="Introduction", alias="intro", description="Learn python from scratch."
+        )
+        named = Course.objects.create(name="Python Basics", alias="python")
+        url = reverse("course_search")
+
+        response = self.client.get(url, {"q": "python!"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [course["id"] for course in response.data["results"]],
+            [str(named.id), str(described.id)],
+        )
+        self.assertNotIn("search_vector", response.data["results"][0])
+
+        response = self.client.get(url, {"q": "python scratch"})
+        self.assertEqual(
+            [course["id"] for course in response.data["results"]], [str(described.id)]
+        )
+
+        response = self.client.get(url, {"q": "python", "page_size": 1})
+        self.assertEqual(response.data["results"][0]["id"], str(named.id))
+        response = self.client.get(response.data["next"])
+        self.assertEqual(response.data["results"][0]["id"], str(described.id))
+        self.assertIsNone(response.data["next"])
+
+    def test_search_courses_by_related_names(self):
+        """
+        Test that search covers the institution name and follows a rename.
+        """
+        url = reverse("course_search")
+        response = self.client.get(url, {"q": "institution"})
+        self.assertEqual(
+            [course["id"] for course in response.data["results"]], [str(self.course.id)]
+        )
+
+        self.institution.name = "Minerva University"
+        self.institution.save()
+        response = self.client.get(url, {"q": "institution"})
+        self.assertEqual(response.data["results"], [])
+        response = self.client.get(url, {"q": "minerva"})
+        self.assertEqual(len(response.data["results"]), 1)
+
+        self.category.delete()
+        response = self.client.get(url, {"q": "category"})
+        self.assertEqual(response.data["results"], [])
+
+    def test_search_courses_without_query(self):
+        """
+        Test that a search without words is rejected.
+        """
+        response = self.client.get(reverse("course_search"), {"q": " "})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("q", response.data)
+
+    def test_get_course_tree(self):
+        """
+        Test to retrieve a course with its category, institution and ordered modules.
+        """
+        for i in range(3):
+            Module.objects.create(
+                id_course=self.course,
+                name=f"Module {i}",
+                instructional_items=1,
+                assessment_items=1,
+            )
+        url = reverse("course_tree", kwargs={"alias": self.course.alias})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["category"]["name"], "Test Category")
+        self.assertEqual(response.data["institution"]["name"], "Test Institution")
+        self.assertEqual(
+            [(module["name"], module["order"]) for module in response.data["course_modules"]],
+            [("Module 0", 1), ("Module 1", 2), ("Module 2", 3)],
+        )
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get(reverse("course_tree", kwargs={"alias": "missing"}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_course_tree_query_count_does_not_grow(self):
+        """
+        Test that the tree endpoints cost the same queries for 1 or 10 modules per course.
+        """
+        other = Course.objects.create(name="Other Course", alias="other")
+
+        def count(url):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(queries)
+
+        detail = reverse("course_tree", kwargs={"alias": self.course.alias})
+        listing = reverse("course_tree_list")
+        counts = []
+        for modules in (1, 10):
+            for course in (self.course, other):
+                while Module.objects.filter(id_course=course).count() < modules:
+                    Module.objects.create(
+                        id_course=course,
+                        name="Module",
+                        instructional_items=1,
+                        assessment_items=1,
+                    )
+            counts.append((count(detail), count(listing)))
+        self.assertEqual(counts[0], counts[1])
+
+        response = self.client.get(listing)
+        self.assertEqual(
+            [len(course["course_modules"]) for course in response.data["results"]],
+            [10, 10],
+        )
+
+
+class CatalogExportTests(APITestCase):
+    """
+    Test suite for the streaming catalog export.
+    """
+
+    def setUp(self):
+        """
+        Set up two courses, each with modules, and an authenticated client.
+        """
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        credentials = base64.b64encode(b"testuser:testpassword").decode("utf-8")
+        self.client.credentials(HTTP_AUTHORIZATION="Basic " + credentials)
+
+        self.expected = {}
+        for i in range(2):
+            course = Course.objects.create(name=f"Course {i}", alias=f"course-{i}")
+            for j in range(3):
+                Module.objects.create(
+                    id_course=course,
+                    name=f"Module {i}.{j}",
+                    instructional_items=1,
+                    assessment_items=1,
+                )
+            self.expected[str(course.id)] = [f"Module {i}.{j}" for j in range(3)]
+        Course.objects.create(name="Empty Course", alias="empty")
+
+    def assert_catalog(self, courses):
+        """
+        Assert every course is exported once with its modules in order.
+        """
+        self.assertEqual(len(courses), 3)
+        for course in courses:
+            self.assertEqual(
+                [module["name"] for module in course["course_modules"]],
+                self.expected.get(course["id"], []),
+            )
+
+    def test_export_streams_json_array(self):
+        """
+        Test that the export endpoint streams a JSON array of nested courses.
+        """
+        response = self.client.get(reverse("catalog_export"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertTrue(response["Content-Type"].startswith("application/json"))
+        self.assert_catalog(json.loads(b"".join(response.streaming_content)))
+
+    def test_export_streams_ndjson(self):
+        """
+        Test that the export endpoint emits one course per line for NDJSON.
+        """
+        response = self.client.get(
+            reverse("catalog_export"), HTTP_ACCEPT="application/x-ndjson"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assert_catalog([json.loads(line) for line in lines])
+
+    def test_export_command(self):
+        """
+        Test that the export_catalog command writes the same catalog.
+        """
+        output = StringIO()
+        call_command("export_catalog", "--format", "ndjson", "--chunk-size", "2", stdout=output)
+        self.assert_catalog([json.loads(line) for line in output.getvalue().splitlines()])
+
+
+class CourseListPlanTests(APITestCase):
+    """
+    Query plans of the course list on a seeded catalog.
+    """
+
+    def setUp(self):
+        """
+        Seed a few hundred courses spread over categories and institutions.
+        """
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        credentials = base64.b64encode(b"testuser:testpassword").decode("utf-8")
+        self.client.credentials(HTTP_AUTHORIZATION="Basic " + credentials)
+
+        self.categories = [
+            CourseCategory.objects.create(name=f"Category {i}") for i in range(4)
+        ]
+        self.institutions = [
+            Institution.objects.create(name=f"Institution {i}") for i in range(4)
+        ]
+        Course.objects.bulk_create(
+            Course(
+                name=f"Course {i}",
+                alias=f"course-{i}",
+                category=self.categories[i % 4],
+                institution=self.institutions[i // 4 % 4],
+                active=i % 3 != 0,
+                rating=None if i % 7 == 0 else Decimal(i % 500) / 100,
+                reviews=i * 37 % 1000,
+            )
+            for i in range(400)
+        )
+
+    def explain_pages(self, params):
+        """
+        EXPLAIN QUERY PLAN lines of the queries serving the first two pages.
+        """
+        url = reverse("course_list_create") + "?page_size=20&" + params
+        plans = []
+        for _ in range(2):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            page = [query["sql"] for query in queries if "LIMIT" in query["sql"]][-1]
+            with connection.cursor() as cursor:
+                cursor.execute("EXPLAIN QUERY PLAN " + page)
+                plans.append([row[-1] for row in cursor.fetchall()])
+            url = response.data["next"]
+        return plans
+
+    def test_browse_filters_use_indexes(self):
+        """
+        Test that the common browse filters and orderings never scan the table.
+        """
+        category = self.categories[1].id
+        institution = self.institutions[2].id
+        cases = {
+            "": "course_creation_date_id_idx",
+            "ordering=-reviews": "course_reviews_id_idx",
+            "ordering=rating": "course_rating_id_idx",
+            "ordering=-rating": "course_rating_id_idx",
+            f"category={category}&active=true&ordering=-rating": "course_active_cat_rating_idx",
+            f"category={category}&active=true": "course_active_cat_rating_idx",
+            f"institution={institution}&active=true": "course_institution_active_idx",
+        }
+        for params, index in cases.items():
+            for plan in self.explain_pages(params):
+                with self.subTest(params=params, plan=plan):
+                    self.assertIn(index, plan[0])
+                    for line in plan:
+                        if line.startswith(("SCAN", "SEARCH")):
+                            self.assertIn("INDEX", line)
+
+
+class SeedAndBenchmarkTests(APITestCase):
+    """
+    Test suite for the synthetic catalog seeder and the API benchmark runner.
+    """
+
+    def test_seed_is_reproducible(self):
+        """
+        Test that the seeder inserts the requested rows with stable keys.
+        """
+        counts = seed_catalog(
+            institutions=3, categories=2, courses=10, modules_per_course=4, seed=7
+        )
+        self.assertEqual(
+            counts, {"Institution": 3, "CourseCategory": 2, "Course": 10, "Module": 40}
+        )
+        course = Course.objects.get(name="Course 0")
+        self.assertEqual(course.course_modules.count(), 4)
+        first_ids = set(Course.objects.values_list("id", flat=True))
+
+        Module.objects.all().delete()
+        Course.objects.all().delete()
+        Institution.objects.all().delete()
+        CourseCategory.objects.all().delete()
+        seed_catalog(
+            institutions=3, categories=2, courses=10, modules_per_course=4, seed=7
+        )
+        self.assertEqual(set(Course.objects.values_list("id", flat=True)), first_ids)
+
+    def test_seed_command_refuses_seeded_database(self):
+        """
+        Test that seeding twice is refused instead of failing on unique names.
+        """
+        args = ["--institutions", "1", "--categories", "1", "--courses", "2"]
+        call_command("seed_catalog", *args, stdout=StringIO())
+        self.assertEqual(Module.objects.count(), 32)
+        with self.assertRaises(CommandError):
+            call_command("seed_catalog", *args, stdout=StringIO())
+
+    def test_benchmark_reports_every_get_url(self):
+        """
+        Test that the runner covers the URLconf and reports latency percentiles.
+        """
+        seed_catalog(institutions=2, categories=2, courses=3, modules_per_course=2)
+        output = StringIO()
+        call_command(
+            "benchmark_api", "--requests", "3", "--warmup", "0", stdout=output
+        )
+        report = json.loads(output.getvalue())
+        results = report["results"]
+        for name in ("course_list_create", "course_detail_by_slug", "module_list"):
+            self.assertEqual(results[name]["status"], [200])
+            self.assertEqual(results[name]["requests"], 3)
+            self.assertLessEqual(results[name]["p50_ms"], results[name]["p99_ms"])
+        self.assertEqual(results["course_search"]["status"], [200])
+        self.assertEqual(report["skipped"]["logout"], "no GET handler")
+        self.assertEqual(report["meta"]["rows"]["Course"], 3)
+
+    def test_benchmark_fails_on_regression(self):
+        """
+        Test that a p95 latency above the baseline threshold fails the run.
+        """
+        baseline = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False)
+        self.addCleanup(os.remove, baseline.name)
+        with baseline:
+            json.dump({"results": {"cache_stats": {"p95_ms": 0.0001}}}, baseline)
+        with self.assertRaisesMessage(CommandError, "cache_stats"):
+            call_command(
+                "benchmark_api",
+                "--url",
+                "cache_stats",
+                "--requests",
+                "2",
+                "--baseline",
+                baseline.name,
+                stdout=StringIO(),
+            )
+
+    def test_insert_benchmark_compares_keys_and_rolls_back(self):
+        """
+        Test that the insert benchmark times both key generators and leaves
+        the module table as it was.
+        """
+        seed_catalog(institutions=1, categories=1, courses=2, modules_per_course=3)
+        stdout = StringIO()
+        call_command(
+            "benchmark_inserts", "--rows", "50", "--batch-size", "20", "--rounds", "2",
+            stdout=stdout,
+        )
+        report = json.loads(stdout.getvalue())
+        self.assertEqual(set(report["results"]), {"uuid4", "uuid7"})
+        self.assertEqual(len(report["results"]["uuid7"]["seconds"]), 2)
+        self.assertEqual(report["meta"]["existing_rows"], 6)
+        self.assertEqual(Module.objects.count(), 6)
+
+    def test_new_rows_get_time_ordered_keys(self):
+        """
+        Test that new rows get version 7 keys that sort in creation order.
+        """
+        first = Institution.objects.create(name="First", image="i", icon="i")
+        second = CourseCategory.objects.create(name="Second")
+        self.assertEqual(first.pk.version, 7)
+        self.assertLess(first.pk, second.pk)
+
+
+class CatalogImportTests(APITestCase):
+    """
+    Test suite for the bulk catalog import.
+    """
+
+    def setUp(self):
+        """
+        Set up an institution, an existing course with modules and an admin.
+        """
+        self.client = APIClient()
+        self.admin = User.objects.create_user(
+            username="admin", password="adminpassword", is_staff=True
+        )
+        self.institution = Institution.objects.create(
+            name="Test Institution", description="An institution"
+        )
+        self.course = Course.objects.create(name="Existing", alias="existing")
+        for j in range(3):
+            Module.objects.create(
+                id_course=self.course,
+                name=f"Old {j}",
+                instructional_items=1,
+                assessment_items=1,
+            )
+
+    def ndjson(self, *courses):
+        """
+        Return the courses as NDJSON lines.
+        """
+        return [json.dumps(course) + "\n" for course in courses]
+
+    def test_import_creates_and_updates_courses(self):
+        """
+        Test that new aliases are created and known ones updated in place,
+        with their modules replaced by the listed ones.
+        """
+        module = {"instructional_items": 2, "assessment_items": 1}
+        lines = self.ndjson(
+            {
+                "name": "Renamed",
+                "alias": "existing",
+                "institution": str(self.institution.id),
+                "course_modules": [{"name": "New 0", **module}],
+            },
+            {
+                "name": "Fresh",
+                "alias": "fresh",
+                "active": True,
+                "course_modules": [{"name": f"Fresh {j}", **module} for j in range(2)],
+            },
+            {"name": "Bare", "alias": "bare"},
+        )
+        summary = import_catalog(parse_catalog(lines, "ndjson"))
+        self.assertEqual(
+            summary, {"created": 2, "updated": 1, "modules": 3, "errors": []}
+        )
+
+        course = Course.objects.get(alias="existing")
+        self.assertEqual(course.id, self.course.id)
+        self.assertEqual(course.name, "Renamed")
+        self.assertEqual(course.institution, self.institution)
+        self.assertEqual(course.modules, 1)
+        self.assertEqual(
+            list(course.course_modules.order_by("rank").values_list("name", flat=True)),
+            ["New 0"],
+        )
+        fresh = Course.objects.get(alias="fresh")
+        self.assertTrue(fresh.active)
+        self.assertEqual(fresh.modules, 2)
+        self.assertEqual(
+            list(fresh.course_modules.order_by("rank").values_list("name", flat=True)),
+            ["Fresh 0", "Fresh 1"],
+        )
+        self.assertEqual(Course.objects.get(alias="bare").modules, 0)
+
+    def test_import_keeps_modules_not_listed(self):
+        """
+        Test that a course imported without modules keeps its own.
+        """
+        lines = self.ndjson({"name": "Existing", "alias": "existing", "reviews": 4})
+        summary = import_catalog(parse_catalog(lines, "ndjson"))
+        self.assertEqual(summary["updated"], 1)
+        course = Course.objects.get(alias="existing")
+        self.assertEqual(course.reviews, 4)
+        self.assertEqual(course.modules, 3)
+        self.assertEqual(course.course_modules.count(), 3)
+
+    def test_csv_groups_rows_by_alias(self):
+        """
+        Test that consecutive CSV rows of one alias make one course.
+        """
+        lines = [
+            "alias,name,active,module_name,module_instructional_items,"
+            "module_assessment_items\n",
+            "csv-a,CSV A,true,A 0,1,1\n",
+            "csv-a,CSV A,true,A 1,1,1\n",
+            "csv-b,CSV B,,,,\n",
+        ]
+        summary = import_catalog(parse_catalog(lines))
+        self.assertEqual(
+            summary, {"created": 2, "updated": 0, "modules": 2, "errors": []}
+        )
+        course = Course.objects.get(alias="csv-a")
+        self.assertTrue(course.active)
+        self.assertEqual(course.course_modules.count(), 2)
+        self.assertEqual(Course.objects.get(alias="csv-b").course_modules.count(), 0)
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        """
+        Test that every invalid row is reported with its line number while
+        the valid rows are still imported.
+        """
+        lines = self.ndjson({"name": "Good", "alias": "good"})
+        lines += ["{not json\n"]
+        lines += self.ndjson(
+            {"name": "Again", "alias": "good"},
+            {"name": "Existing", "alias": "other"},
+            {"name": "Orphan", "alias": "orphan", "institution": str(self.course.id)},
+            {"name": "No alias"},
+            {"name": "Good 2", "alias": "good-2"},
+        )
+        summary = import_catalog(parse_catalog(lines, "ndjson"), batch_size=3)
+        self.assertEqual(summary["created"], 2)
+        errors = {error["line"]: error for error in summary["errors"]}
+        self.assertEqual(sorted(errors), [2, 3, 4, 5, 6])
+        self.assertIn("Invalid JSON", errors[2]["errors"]["non_field_errors"][0])
+        self.assertIn("alias", errors[3]["errors"])
+        self.assertEqual(errors[4]["alias"], "other")
+        self.assertIn("name", errors[4]["errors"])
+        self.assertIn("institution", errors[5]["errors"])
+        self.assertIn("alias", errors[6]["errors"])
+        self.assertEqual(
+            set(Course.objects.values_list("alias", flat=True)),
+            {"existing", "good", "good-2"},
+        )
+
+    def test_failed_write_only_rejects_failing_rows(self):
+        """
+        Test that a write failing in the database is retried row by row, so
+        only the failing course is rejected.
+        """
+        write = importer._write
+
+        def failing_write(alias, courses, *args):
+            if any(course.alias == "bad" for course in courses):
+                raise DatabaseError("constraint failed")
+            return write(alias, courses, *args)
+
+        lines = self.ndjson(
+            {"name": "One", "alias": "one"},
+            {"name": "Bad", "alias": "bad"},
+            {"name": "Two", "alias": "two"},
+        )
+        with mock.patch.object(importer, "_write", side_effect=failing_write):
+            summary = import_catalog(parse_catalog(lines, "ndjson"))
+        self.assertEqual(summary["created"], 2)
+        self.assertEqual(
+            [(error["line"], error["alias"]) for error in summary["errors"]],
+            [(2, "bad")],
+        )
+        self.assertEqual(
+            set(Course.objects.values_list("alias", flat=True)),
+            {"existing", "one", "two"},
+        )
+
+    def test_import_queries_per_batch(self):
+        """
+        Test that the number of queries depends on the batches, not the rows.
+        """
+        institution = str(self.institution.id)
+        module = {"name": "M", "instructional_items": 1, "assessment_items": 1}
+
+        def catalog(size):
+            return self.ndjson(
+                *(
+                    {
+                        "name": f"Course {size}.{i}",
+                        "alias": f"course-{size}-{i}",
+                        "institution": institution,
+                        "course_modules": [module, module],
+                    }
+                    for i in range(size)
+                )
+            )
+
+        with CaptureQueriesContext(connection) as small:
+            import_catalog(parse_catalog(catalog(2), "ndjson"))
+        with CaptureQueriesContext(connection) as large:
+            import_catalog(parse_catalog(catalog(40), "ndjson"))
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(Module.objects.filter(name="M").count(), 84)
+
+    def test_import_endpoint(self):
+        """
+        Test that admins can upload a CSV or NDJSON catalog.
+        """
+        self.client.force_authenticate(user=self.admin)
+        url = reverse("catalog_import")
+        response = self.client.post(
+            url, "alias,name\nup-a,Up A\n", content_type="text/csv"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data, {"created": 1, "updated": 0, "modules": 0, "errors": []}
+        )
+        response = self.client.post(
+            url,
+            "".join(self.ndjson({"name": "Up B", "alias": "up-b"}, {"alias": "x"})),
+            content_type="application/x-ndjson",
+        )
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual(response.data["errors"][0]["line"], 2)
+        self.assertTrue(Course.objects.filter(alias="up-b").exists())
+
+    def test_import_endpoint_requires_admin(self):
+        """
+        Test that users who are not staff cannot import a catalog.
+        """
+        user = User.objects.create_user(username="testuser", password="testpassword")
+        self.client.force_authenticate(user=user)
+        response = self.client.post(
+            reverse("catalog_import"), "alias,name\na,A\n", content_type="text/csv"
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(Course.objects.filter(alias="a").exists())
+
+    def test_import_command(self):
+        """
+        Test that the import_catalog command reads a file and reports errors.
+        """
+        catalog = tempfile.NamedTemporaryFile(
+            "w", suffix=".ndjson", delete=False, encoding="utf-8"
+        )
+        self.addCleanup(os.remove, catalog.name)
+        with catalog:
+            catalog.writelines(self.ndjson({"name": "Cmd", "alias": "cmd"}, {}))
+        stdout, stderr = StringIO(), StringIO()
+        call_command("import_catalog", catalog.name, stdout=stdout, stderr=stderr)
+        self.assertIn("1 created, 0 updated, 0 modules, 1 rejected", stdout.getvalue())
+        self.assertIn("line 2", stderr.getvalue())
+        self.assertTrue(Course.objects.filter(alias="cmd").exists())
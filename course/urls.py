@@ -1,8 +1,21 @@
 from django.urls import path
-from course.views import CourseView, CourseDetailViewById, CourseDetailViewBySlug
+from course.views import (
+    CourseView,
+    CourseDetailViewById,
+    CourseDetailViewBySlug,
+    CatalogExportView,
+    CatalogImportView,
+    CourseSearchView,
+    CourseTreeView,
+    CourseTreeDetailView,
+)
 
 urlpatterns = [
     path("courses/", CourseView.as_view(), name="course_list_create"),
+    path("courses/export/", CatalogExportView.as_view(), name="catalog_export"),
+    path("courses/import/", CatalogImportView.as_view(), name="catalog_import"),
+    path("courses/search/", CourseSearchView.as_view(), name="course_search"),
+    path("courses/tree/", CourseTreeView.as_view(), name="course_tree_list"),
     path(
         "courses/<uuid:id>/",
         CourseDetailViewById.as_view(),
@@ -13,4 +26,9 @@ urlpatterns = [
         CourseDetailViewBySlug.as_view(),
         name="course_detail_by_slug",
     ),
+    path(
+        "course/<slug:alias>/tree/",
+        CourseTreeDetailView.as_view(),
+        name="course_tree",
+    ),
 ]
@@ -7,5 +7,18 @@ from course.views.course import (
     CourseDetailViewById,
     CourseDetailViewBySlug,
 )
+from course.views.catalog_import import CatalogImportView
+from course.views.export import CatalogExportView
+from course.views.search import CourseSearchView
+from course.views.tree import CourseTreeView, CourseTreeDetailView
 
-__all__ = ["CourseView", "CourseDetailViewById", "CourseDetailViewBySlug"]
+__all__ = [
+    "CourseView",
+    "CourseDetailViewById",
+    "CourseDetailViewBySlug",
+    "CatalogExportView",
+    "CatalogImportView",
+    "CourseSearchView",
+    "CourseTreeView",
+    "CourseTreeDetailView",
+]
@@ -0,0 +1,65 @@
+from drf_spectacular.utils import extend_schema
+from rest_framework import permissions, serializers
+from rest_framework.parsers import BaseParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from course.importer import decode_lines, import_catalog, parse_catalog
+
+
+class CatalogParser(BaseParser):
+    """
+    Parse an uploaded catalog lazily: the body is read line by line while
+    the courses are imported, so it is never held in memory as a whole.
+    """
+
+    catalog_format = "csv"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return parse_catalog(decode_lines(stream or ()), self.catalog_format)
+
+
+class CSVCatalogParser(CatalogParser):
+    media_type = "text/csv"
+
+
+class NDJSONCatalogParser(CatalogParser):
+    media_type = "application/x-ndjson"
+    catalog_format = "ndjson"
+
+
+class CatalogImportErrorSerializer(serializers.Serializer):
+    line = serializers.IntegerField()
+    alias = serializers.CharField(allow_null=True)
+    errors = serializers.DictField()
+
+
+class CatalogImportSummarySerializer(serializers.Serializer):
+    created = serializers.IntegerField()
+    updated = serializers.IntegerField()
+    modules = serializers.IntegerField()
+    errors = CatalogImportErrorSerializer(many=True)
+
+
+class CatalogImportView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+    parser_classes = [CSVCatalogParser, NDJSONCatalogParser]
+    """
+    API endpoint for importing courses and their modules in bulk.
+    """
+
+    @extend_schema(
+        request={
+            "text/csv": {"type": "string"},
+            "application/x-ndjson": {"type": "string"},
+        },
+        responses={200: CatalogImportSummarySerializer},
+    )
+    def post(self, request):
+        """
+        Create or update the courses of the CSV or NDJSON catalog in the
+        request body, matched on alias, with their modules.
+
+        Rows that fail validation are reported with their line number and
+        skipped; the other rows are imported.
+        """
+        return Response(import_catalog(request.data))
@@ -3,12 +3,36 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework import status, permissions
 from course.models import Course
-from course.serializers import CourseSerializer
+from course.serializers import CourseSerializer, CourseFilterSerializer
+from minerva.cache import cache_response
+from minerva.conditional import list_validators, object_validators
+from minerva.pagination import KeysetPagination
+from minerva.serializers import FIELDSET_PARAMETERS
+from minerva.sharding import routed_to_shard, shard_for_institution, shard_with
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
 
 
+def institution_shard(source):
+    """
+    Locator of the shard of the institution named in the query string
+    (``query_params``) or the body (``data``) of the request. A body without
+    one goes to the shard of the courses without an institution.
+    """
+
+    def locate(request, **kwargs):
+        values = getattr(request, source)
+        institution = values.get("institution") if hasattr(values, "get") else None
+        if institution or source == "data":
+            return shard_for_institution(institution)
+        return None
+
+    return locate
+
+
 class CourseView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    ordering = ("creation_date", "id")
     """
     API endpoints for CRUD operations on Course objects.
     """
@@ -16,16 +40,37 @@ class CourseView(APIView):
     @extend_schema(
         request=None,
         responses=CourseSerializer(many=True),
+        parameters=[CourseFilterSerializer, *FIELDSET_PARAMETERS],
     )
+    @cache_response("course", "course_category", "institution")
+    @routed_to_shard(institution_shard("query_params"), required=False)
     def get(self, request):
         """
-        Retrieve all Course objects.
+        Retrieve a page of Course objects, filtered and ordered by the query
+        parameters (by default every course, ordered by creation date).
         """
-        courses = Course.objects.all()
-        serializer = CourseSerializer(courses, many=True)
-        return Response(serializer.data)
+        filters = CourseFilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        self.ordering = filters.get_ordering()
+        fields, expand = CourseSerializer.parse_fieldset(request)
+
+        courses = filters.filter_queryset(Course.objects.all())
+        validators = list_validators(request, courses, expand)
+        if validators.matches(request):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers=validators.headers
+            )
+
+        courses = CourseSerializer.setup_queryset(
+            courses, fields, expand, required=self.ordering
+        )
+        paginator = self.pagination_class()
+        courses = paginator.paginate_queryset(courses, request, view=self)
+        serializer = CourseSerializer(courses, many=True, fields=fields, expand=expand)
+        return validators.apply(paginator.get_paginated_response(serializer.data))
 
     @extend_schema(request=CourseSerializer, responses=CourseSerializer)
+    @routed_to_shard(institution_shard("data"), required=False)
     def post(self, request):
         """
         Create a new Course object.
@@ -40,16 +85,33 @@ class CourseView(APIView):
 class CourseDetailViewById(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
-    @extend_schema(request=None, responses=CourseSerializer)
+    @extend_schema(
+        request=None, responses=CourseSerializer, parameters=FIELDSET_PARAMETERS
+    )
+    @cache_response("course", "course_category", "institution")
+    @routed_to_shard(shard_with(Course, pk="id"))
     def get(self, request, id):
         """
         Retrieve a single Course object by UUID.
         """
-        course = get_object_or_404(Course, id=id)
-        serializer = CourseSerializer(course)
-        return Response(serializer.data)
+        fields, expand = CourseSerializer.parse_fieldset(request)
+        validators = object_validators(
+            request, Course.objects.filter(id=id), expand
+        )
+        if validators.matches(request):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers=validators.headers
+            )
+
+        courses = CourseSerializer.setup_queryset(
+            Course.objects.all(), fields, expand, required=["id"]
+        )
+        course = get_object_or_404(courses, id=id)
+        serializer = CourseSerializer(course, fields=fields, expand=expand)
+        return Response(serializer.data, headers=validators.headers)
 
     @extend_schema(request=CourseSerializer, responses=CourseSerializer)
+    @routed_to_shard(shard_with(Course, pk="id"))
     def put(self, request, id):
         """
         Update an existing Course object by UUID.
@@ -62,6 +124,7 @@ class CourseDetailViewById(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     @extend_schema(request=None, responses={204: None})
+    @routed_to_shard(shard_with(Course, pk="id"))
     def delete(self, request, id):
         """
         Delete a Course object by UUID.
@@ -74,16 +137,33 @@ class CourseDetailViewById(APIView):
 class CourseDetailViewBySlug(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
-    @extend_schema(request=None, responses=CourseSerializer)
+    @extend_schema(
+        request=None, responses=CourseSerializer, parameters=FIELDSET_PARAMETERS
+    )
+    @cache_response("course", "course_category", "institution")
+    @routed_to_shard(shard_with(Course, alias="alias"))
     def get(self, request, alias):
         """
         Retrieve a single Course object by alias.
         """
-        course = get_object_or_404(Course, alias=alias)
-        serializer = CourseSerializer(course)
-        return Response(serializer.data)
+        fields, expand = CourseSerializer.parse_fieldset(request)
+        validators = object_validators(
+            request, Course.objects.filter(alias=alias), expand
+        )
+        if validators.matches(request):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers=validators.headers
+            )
+
+        courses = CourseSerializer.setup_queryset(
+            Course.objects.all(), fields, expand, required=["alias"]
+        )
+        course = get_object_or_404(courses, alias=alias)
+        serializer = CourseSerializer(course, fields=fields, expand=expand)
+        return Response(serializer.data, headers=validators.headers)
 
     @extend_schema(request=CourseSerializer, responses=CourseSerializer)
+    @routed_to_shard(shard_with(Course, alias="alias"))
     def put(self, request, alias):
         """
         Update an existing Course object by alias.
@@ -96,6 +176,7 @@ class CourseDetailViewBySlug(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     @extend_schema(request=None, responses={204: None})
+    @routed_to_shard(shard_with(Course, alias="alias"))
     def delete(self, request, alias):
         """
         Delete a Course object by alias.
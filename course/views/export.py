@@ -0,0 +1,26 @@
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.views import APIView
+from rest_framework import permissions
+from course.export import NDJSONRenderer, stream_catalog
+from drf_spectacular.utils import extend_schema, OpenApiTypes
+
+
+class CatalogExportView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [JSONRenderer, NDJSONRenderer]
+    """
+    Streaming export of every course with its modules.
+    """
+
+    @extend_schema(request=None, responses={200: OpenApiTypes.BINARY})
+    def get(self, request):
+        """
+        Stream the full catalog as a JSON array, or as NDJSON with
+        ``Accept: application/x-ndjson`` or ``?format=ndjson``.
+        """
+        renderer = request.accepted_renderer
+        return StreamingHttpResponse(
+            stream_catalog(renderer.format),
+            content_type=f"{renderer.media_type}; charset=utf-8",
+        )
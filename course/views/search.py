@@ -0,0 +1,53 @@
+from rest_framework import permissions, serializers
+from rest_framework.views import APIView
+from course.models import Course
+from course.search import search_courses
+from course.serializers import CourseSerializer
+from minerva.cache import cache_response
+from minerva.pagination import KeysetPagination
+from minerva.serializers import FIELDSET_PARAMETERS
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
+
+
+class CourseSearchView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    ordering = ("-rank", "id")
+    """
+    API endpoint for ranked full-text search over the course catalog.
+    """
+
+    @extend_schema(
+        request=None,
+        responses=CourseSerializer(many=True),
+        parameters=[
+            OpenApiParameter(
+                name="q",
+                type=OpenApiTypes.STR,
+                description="Words to search for in the course name, alias and "
+                "description and in the category and institution names.",
+                required=True,
+            ),
+            *FIELDSET_PARAMETERS,
+        ],
+    )
+    @cache_response("course", "course_category", "institution")
+    def get(self, request):
+        """
+        Retrieve a page of the courses matching every word of ``q``, best match first.
+        """
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            raise serializers.ValidationError(
+                {"q": ["This query parameter is required."]}
+            )
+        fields, expand = CourseSerializer.parse_fieldset(request)
+
+        courses = CourseSerializer.setup_queryset(
+            Course.objects.all(), fields, expand, required=["id"]
+        )
+        courses = search_courses(courses, query)
+        paginator = self.pagination_class()
+        courses = paginator.paginate_queryset(courses, request, view=self)
+        serializer = CourseSerializer(courses, many=True, fields=fields, expand=expand)
+        return paginator.get_paginated_response(serializer.data)
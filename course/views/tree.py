@@ -0,0 +1,84 @@
+from django.db.models import Prefetch
+from django.shortcuts import get_object_or_404
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework import status, permissions
+from course.models import Course
+from course.serializers import CourseTreeSerializer
+from module.models import Module
+from minerva.cache import cache_response
+from minerva.conditional import list_validators
+from minerva.pagination import KeysetPagination
+from minerva.sharding import routed_to_shard, shard_with
+from drf_spectacular.utils import extend_schema
+
+# Relations whose updated_at feeds the validators of a tree.
+TREE_RELATED = ("category", "institution", "course_modules")
+
+
+def tree_queryset(courses):
+    """
+    Load courses with everything ``CourseTreeSerializer`` renders.
+
+    The category and institution are joined in the course query and the
+    modules of every course come from one more query, with their order
+    annotated, so the cost is two queries however many modules there are.
+    """
+    modules = Module.objects.with_order().order_by("rank")
+    return courses.select_related("category", "institution").prefetch_related(
+        Prefetch("course_modules", queryset=modules)
+    )
+
+
+class CourseTreeView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    ordering = ("creation_date", "id")
+    """
+    API endpoint for pages of courses with their related objects inlined.
+    """
+
+    @extend_schema(request=None, responses=CourseTreeSerializer(many=True))
+    @cache_response("course", "module", "course_category", "institution")
+    def get(self, request):
+        """
+        Retrieve a page of course trees, ordered by creation date.
+        """
+        validators = list_validators(request, Course.objects.all(), TREE_RELATED)
+        if validators.matches(request):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers=validators.headers
+            )
+
+        paginator = self.pagination_class()
+        courses = paginator.paginate_queryset(
+            tree_queryset(Course.objects.all()), request, view=self
+        )
+        serializer = CourseTreeSerializer(courses, many=True)
+        return validators.apply(paginator.get_paginated_response(serializer.data))
+
+
+class CourseTreeDetailView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    """
+    API endpoint for one course with its category, institution and modules.
+    """
+
+    @extend_schema(request=None, responses=CourseTreeSerializer)
+    @cache_response("course", "module", "course_category", "institution")
+    @routed_to_shard(shard_with(Course, alias="alias"))
+    def get(self, request, alias):
+        """
+        Retrieve a course tree by alias.
+        """
+        validators = list_validators(
+            request, Course.objects.filter(alias=alias), TREE_RELATED
+        )
+        if validators.matches(request):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers=validators.headers
+            )
+
+        course = get_object_or_404(tree_queryset(Course.objects.all()), alias=alias)
+        serializer = CourseTreeSerializer(course)
+        return Response(serializer.data, headers=validators.headers)
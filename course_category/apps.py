@@ -3,3 +3,10 @@ from django.apps import AppConfig
 class CourseCategoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'course_category'
+
+    def ready(self):
+        from minerva.cache import track_model
+        from minerva.sharding import track_global
+
+        track_model(self.get_model('CourseCategory'), 'course_category')
+        track_global(self.get_model('CourseCategory'))
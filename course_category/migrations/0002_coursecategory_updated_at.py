@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course_category', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coursecategory',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:25
+
+import minerva.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("course_category", "0002_coursecategory_updated_at"),
+    ]
+
+    operations = [
+        # The default only exists in Python: existing keys are kept and the
+        # table is not rebuilt, as altering the field would on SQLite.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name="coursecategory",
+                    name="id",
+                    field=models.UUIDField(
+                        default=minerva.ids.uuid7,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -1,5 +1,5 @@
 from django.db import models
-import uuid
+from minerva.ids import uuid7
 
 
 class CourseCategory(models.Model):
@@ -7,12 +7,14 @@ class CourseCategory(models.Model):
     Model for CourseCategory
 
     Attributes:
-        id (uuid): Unique identifier for the category
+        id (uuid): Unique, time-ordered (UUIDv7) identifier for the category
         name (str): Name complete of category
+        updated_at (datetime): Timestamp of the last update, used as cache validator
     """
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     name = models.CharField(max_length=100, unique=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.name
@@ -36,7 +36,7 @@ class CourseCategoryTests(APITestCase):
         course_categories = CourseCategory.objects.all()
         serializer = CourseCategorySerializer(course_categories, many=True)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data["results"], serializer.data)
 
     def test_get_single_course_category(self):
         """
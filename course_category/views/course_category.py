@@ -5,19 +5,32 @@ from rest_framework import status, permissions
 from course_category.models import CourseCategory
 from course_category.serializers import CourseCategorySerializer
 from drf_spectacular.utils import extend_schema
+from minerva.cache import cache_response
+from minerva.conditional import list_validators, object_validators
+from minerva.pagination import KeysetPagination
 
 
 class CourseCategoryListView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    ordering = ("name", "id")
 
     @extend_schema(request=None, responses=CourseCategorySerializer(many=True))
+    @cache_response("course_category")
     def get(self, request):
         """
-        Retrieve all CourseCategory objects.
+        Retrieve a page of CourseCategory objects, ordered by name.
         """
-        course_categories = CourseCategory.objects.all()
+        validators = list_validators(request, CourseCategory.objects.all())
+        if validators.matches(request):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers=validators.headers
+            )
+
+        paginator = self.pagination_class()
+        course_categories = paginator.paginate_queryset(CourseCategory.objects.all(), request, view=self)
         serializer = CourseCategorySerializer(course_categories, many=True)
-        return Response(serializer.data)
+        return validators.apply(paginator.get_paginated_response(serializer.data))
 
     @extend_schema(request=CourseCategorySerializer, responses=CourseCategorySerializer)
     def post(self, request):
@@ -35,13 +48,20 @@ class CourseCategoryDetailView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     @extend_schema(request=None, responses=CourseCategorySerializer)
+    @cache_response("course_category")
     def get(self, request, id):
         """
         Retrieve a single CourseCategory object by UUID.
         """
+        validators = object_validators(request, CourseCategory.objects.filter(id=id))
+        if validators.matches(request):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers=validators.headers
+            )
+
         course_category = get_object_or_404(CourseCategory, id=id)
         serializer = CourseCategorySerializer(course_category)
-        return Response(serializer.data)
+        return Response(serializer.data, headers=validators.headers)
 
     @extend_schema(request=CourseCategorySerializer, responses=CourseCategorySerializer)
     def put(self, request, id):
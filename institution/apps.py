@@ -3,3 +3,10 @@ from django.apps import AppConfig
 class InstitutionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'institution'
+
+    def ready(self):
+        from minerva.cache import track_model
+        from minerva.sharding import track_global
+
+        track_model(self.get_model('Institution'), 'institution')
+        track_global(self.get_model('Institution'))
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('institution', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='institution',
+            index=models.Index(fields=['name', 'id'], name='institution_name_id_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('institution', '0002_institution_institution_name_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='institution',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -56,7 +56,7 @@ class InstitutionTests(APITestCase):
         institutions = Institution.objects.all()
         serializer = InstitutionSerializer(institutions, many=True)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data["results"], serializer.data)
 
     def test_get_single_institution(self):
         """
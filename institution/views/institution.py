@@ -5,19 +5,32 @@ from rest_framework import status, permissions
 from institution.models import Institution
 from institution.serializers import InstitutionSerializer
 from drf_spectacular.utils import extend_schema
+from minerva.cache import cache_response
+from minerva.conditional import list_validators, object_validators
+from minerva.pagination import KeysetPagination
 
 
 class InstitutionListView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    ordering = ("name", "id")
 
     @extend_schema(request=None, responses=InstitutionSerializer(many=True))
+    @cache_response("institution")
     def get(self, request):
         """
-        Retrieve all Institution objects.
+        Retrieve a page of Institution objects, ordered by name.
         """
-        institutions = Institution.objects.all()
+        validators = list_validators(request, Institution.objects.all())
+        if validators.matches(request):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers=validators.headers
+            )
+
+        paginator = self.pagination_class()
+        institutions = paginator.paginate_queryset(Institution.objects.all(), request, view=self)
         serializer = InstitutionSerializer(institutions, many=True)
-        return Response(serializer.data)
+        return validators.apply(paginator.get_paginated_response(serializer.data))
 
     @extend_schema(request=InstitutionSerializer, responses=InstitutionSerializer)
     def post(self, request):
@@ -35,13 +48,20 @@ class InstitutionDetailView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     @extend_schema(request=None, responses=InstitutionSerializer)
+    @cache_response("institution")
     def get(self, request, id):
         """
         Retrieve a single Institution object by UUID.
         """
+        validators = object_validators(request, Institution.objects.filter(id=id))
+        if validators.matches(request):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers=validators.headers
+            )
+
         institution = get_object_or_404(Institution, id=id)
         serializer = InstitutionSerializer(institution)
-        return Response(serializer.data)
+        return Response(serializer.data, headers=validators.headers)
 
     @extend_schema(request=InstitutionSerializer, responses=InstitutionSerializer)
     def put(self, request, id):
@@ -2,6 +2,9 @@
 ASGI config for minerva project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server (for instance gunicorn with uvicorn workers) so
+async views such as the async Google login run on the event loop instead of
+holding a worker thread.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -0,0 +1,421 @@
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from functools import cached_property
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+from rest_framework.authentication import BasicAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from minerva import metrics, profiling
+from minerva.cache import shared_cache, shared_memo
+from users.models import RevokedToken
+
+
+class CredentialCache:
+    """
+    Bounded, short-lived LRU of recently verified Basic credentials.
+
+    Entries are keyed by an HMAC of the username and password (keyed with
+    ``SECRET_KEY``), so neither is kept in memory. Each entry remembers the
+    user and the password hash that was verified; a hit is only accepted
+    while that hash is still the user's current one, so a password change
+    in any process invalidates it.
+
+    Attributes:
+        timeout (int): Seconds an entry may be used.
+        max_entries (int): Entries kept before the least recently used is dropped.
+    """
+
+    key_salt = "minerva.authentication.CredentialCache"
+
+    def __init__(self, timeout, max_entries):
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def digest(self, userid, password):
+        value = f"{userid}\0{password}"
+        return salted_hmac(self.key_salt, value, algorithm="sha256").hexdigest()
+
+    def get(self, digest):
+        """
+        Return ``(user pk, password hash)`` for a live entry, or None.
+        """
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None and entry[2] <= time.monotonic():
+                del self._entries[digest]
+                entry = None
+            metrics.count_cache_lookup("credentials", entry is not None)
+            if entry is None:
+                return None
+            self._entries.move_to_end(digest)
+            return entry[:2]
+
+    def set(self, digest, user):
+        with self._lock:
+            self._entries[digest] = (
+                user.pk,
+                user.password,
+                time.monotonic() + self.timeout,
+            )
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, digest):
+        with self._lock:
+            self._entries.pop(digest, None)
+
+    def invalidate_user(self, user_pk):
+        """
+        Drop every entry of a user, e.g. after a password change.
+        """
+        with self._lock:
+            for digest in [
+                digest for digest, entry in self._entries.items() if entry[0] == user_pk
+            ]:
+                del self._entries[digest]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+credential_cache = CredentialCache(
+    settings.CREDENTIALS_CACHE_TIMEOUT, settings.CREDENTIALS_CACHE_MAX_ENTRIES
+)
+
+
+class TimedAuthenticationMixin:
+    """
+    Report the time spent in ``authenticate`` as the ``auth`` timing of the
+    request (Server-Timing header and metrics).
+    """
+
+    def authenticate(self, request):
+        with profiling.span("auth"):
+            return super().authenticate(request)
+
+
+class CachedBasicAuthentication(TimedAuthenticationMixin, BasicAuthentication):
+    """
+    HTTP Basic authentication that skips the password hasher on repeat requests.
+
+    The first request with a given username and password is verified by
+    the authentication backends as usual (a full PBKDF2 run). For the next
+    ``CREDENTIALS_CACHE_TIMEOUT`` seconds the same credentials only cost a
+    primary key lookup of the user, which also re-checks that the account
+    is active and that its password hash has not changed. Failed attempts
+    are never cached.
+    """
+
+    def authenticate_credentials(self, userid, password, request=None):
+        digest = credential_cache.digest(userid, password)
+        entry = credential_cache.get(digest)
+        if entry is not None:
+            user_pk, password_hash = entry
+            users = get_user_model()._default_manager
+            user = users.filter(pk=user_pk, is_active=True).first()
+            if user is not None and constant_time_compare(user.password, password_hash):
+                return (user, None)
+            credential_cache.discard(digest)
+
+        user, auth = super().authenticate_credentials(userid, password, request)
+        credential_cache.set(digest, user)
+        return (user, auth)
+
+
+class TokenVersions:
+    """
+    Per-user version embedded in access tokens as the ``ver`` claim.
+
+    The claims of a token are trusted only while its version is the user's
+    current one. Bumping the version (on any change to the user, its groups
+    or its permissions) sends older tokens back to a database lookup until
+    the client logs in again. Versions live in the shared cache, so a bump
+    made by one worker process is seen by all of them, within
+    ``SHARED_CACHE_MEMO_TIMEOUT`` (see ``SharedCacheMemo``); a missing
+    version is seeded from the clock, so an evicted one never matches an
+    old token.
+    """
+
+    key_prefix = "token_version"
+
+    def key(self, user_pk):
+        return f"{self.key_prefix}:{user_pk}"
+
+    def current(self, user_pk):
+        key = self.key(user_pk)
+        version = shared_memo.get_many([key]).get(key)
+        if version is None:
+            shared_cache.add(key, time.time_ns(), timeout=None)
+            version = shared_cache.get(key)
+            shared_memo.set(key, version)
+        return version
+
+    def bump(self, user_pk):
+        """
+        Invalidate the claims of every token issued to the user so far.
+
+        Inside a transaction the version is bumped again on commit, since a
+        token may have been issued from the pre-commit data in between.
+        """
+        self._incr(user_pk)
+        if transaction.get_connection().in_atomic_block:
+            transaction.on_commit(lambda: self._incr(user_pk))
+
+    def _incr(self, user_pk):
+        key = self.key(user_pk)
+        try:
+            shared_cache.incr(key)
+        except ValueError:
+            shared_cache.add(key, time.time_ns(), timeout=None)
+        shared_memo.discard(key)
+
+
+token_versions = TokenVersions()
+
+
+class BloomFilter:
+    """
+    Set of strings answering "maybe present" or "certainly absent".
+
+    Sized for ``capacity`` items at a false positive rate of ``error_rate``;
+    items cannot be removed.
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = capacity
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray(-(-self.size // 8))
+        self.count = 0
+
+    def _positions(self, item):
+        # Double hashing: k positions from the two halves of one digest.
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        step = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * step) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+class RevocationList:
+    """
+    Access tokens revoked before their expiry (``RevokedToken`` rows).
+
+    Each process keeps a Bloom filter of the revoked ``jti`` claims, so
+    checking a token that was not revoked needs no query. Only a filter hit
+    (a revoked token or a rare false positive) is confirmed in the database.
+
+    Every ``refresh_interval`` seconds the filter is topped up with the rows
+    revoked since the last refresh, re-reading ``overlap`` more seconds to
+    cover slow commits and clock skew; revocations made by other processes
+    apply within that interval. Every ``prune_interval`` seconds expired
+    rows are deleted (once per interval across every process, under a lock
+    in the shared cache) and the filter is rebuilt from the remaining rows.
+    """
+
+    prune_key = "token_revocation:prune"
+    min_capacity = 1024
+
+    def __init__(self, refresh_interval, prune_interval, overlap=60):
+        self.refresh_interval = refresh_interval
+        self.prune_interval = prune_interval
+        self.overlap = timedelta(seconds=overlap)
+        self._filter = None
+        self._synced_at = None
+        self._refresh_at = self._rebuild_at = 0.0
+        self._lock = threading.Lock()
+
+    def revoke(self, token):
+        """
+        Revoke a validated token until its ``exp``.
+        """
+        jti = token[jwt_settings.JTI_CLAIM]
+        expires_at = datetime.fromtimestamp(token["exp"], tz=dt_timezone.utc)
+        RevokedToken.objects.bulk_create(
+            [RevokedToken(jti=jti, expires_at=expires_at)], ignore_conflicts=True
+        )
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(jti)
+
+    def is_revoked(self, jti):
+        self._sync()
+        if jti not in self._filter:
+            return False
+        return RevokedToken.objects.filter(
+            jti=jti, expires_at__gt=timezone.now()
+        ).exists()
+
+    def clear(self):
+        with self._lock:
+            self._filter = None
+
+    def _sync(self):
+        if self._filter is not None and time.monotonic() < self._refresh_at:
+            return
+        # Only the first load is waited for; while another thread refreshes,
+        # the current filter is used as is.
+        if not self._lock.acquire(blocking=self._filter is None):
+            return
+        try:
+            now = time.monotonic()
+            if (
+                self._filter is None
+                or now >= self._rebuild_at
+                or self._filter.count > self._filter.capacity
+            ):
+                self._rebuild()
+                self._rebuild_at = now + self.prune_interval
+            elif now >= self._refresh_at:
+                self._top_up()
+            self._refresh_at = now + self.refresh_interval
+        finally:
+            self._lock.release()
+
+    def _rebuild(self):
+        if shared_cache.add(self.prune_key, True, timeout=self.prune_interval):
+            RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+        synced_at = timezone.now()
+        jtis = RevokedToken.objects.filter(expires_at__gt=synced_at).values_list(
+            "jti", flat=True
+        )
+        revoked = BloomFilter(max(self.min_capacity, 2 * jtis.count()))
+        for jti in jtis.iterator():
+            revoked.add(jti)
+        self._filter, self._synced_at = revoked, synced_at
+
+    def _top_up(self):
+        synced_at = timezone.now()
+        jtis = RevokedToken.objects.filter(
+            revoked_at__gte=self._synced_at - self.overlap
+        ).values_list("jti", flat=True)
+        for jti in jtis.iterator():
+            if jti not in self._filter:
+                self._filter.add(jti)
+        self._synced_at = synced_at
+
+
+revocation_list = RevocationList(
+    settings.TOKEN_REVOCATION_REFRESH_INTERVAL, settings.TOKEN_REVOCATION_PRUNE_INTERVAL
+)
+
+
+class ClaimsAccessToken(AccessToken):
+    """
+    Access token carrying what the API needs to know about its user.
+
+    Claims: the user id, ``username``, ``email``, ``is_staff``,
+    ``is_superuser`` and ``ver`` (see ``TokenVersions``).
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token["username"] = user.get_username()
+        token["email"] = user.email
+        token["is_staff"] = user.is_staff
+        token["is_superuser"] = user.is_superuser
+        token["ver"] = token_versions.current(user.pk)
+        return token
+
+
+class ClaimsUser(TokenUser):
+    """
+    Stateless user rebuilt from the claims of a ``ClaimsAccessToken``.
+    """
+
+    @cached_property
+    def email(self):
+        return self.token.get("email", "")
+
+
+class ClaimsJWTAuthentication(TimedAuthenticationMixin, JWTAuthentication):
+    """
+    JWT authentication that builds ``request.user`` from the token claims.
+
+    A token whose ``ver`` claim is still the user's current version yields
+    a ``ClaimsUser`` without any database query. Other tokens (older
+    versions, or tokens issued without claims) fall back to loading the
+    user, which also enforces ``is_active``. Revoked tokens are rejected
+    (see ``RevocationList``).
+    """
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        jti = token.get(jwt_settings.JTI_CLAIM)
+        if jti is not None and revocation_list.is_revoked(jti):
+            raise InvalidToken("Token has been revoked")
+        return token
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(jwt_settings.USER_ID_CLAIM)
+        version = validated_token.get("ver")
+        if user_id is not None and version is not None:
+            if version == token_versions.current(user_id):
+                return ClaimsUser(validated_token)
+        return super().get_user(validated_token)
+
+
+def _invalidate_user(sender, instance, **kwargs):
+    credential_cache.invalidate_user(instance.pk)
+    token_versions.bump(instance.pk)
+
+
+def _invalidate_members(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        users = [instance.pk]
+    elif pk_set is not None:
+        users = pk_set
+    else:
+        # Cleared from the group or permission side, still attached here.
+        users = instance.user_set.values_list("pk", flat=True)
+    for user_pk in users:
+        token_versions.bump(user_pk)
+
+
+post_save.connect(
+    _invalidate_user,
+    sender=settings.AUTH_USER_MODEL,
+    dispatch_uid="credential_cache",
+)
+post_delete.connect(
+    _invalidate_user,
+    sender=settings.AUTH_USER_MODEL,
+    dispatch_uid="credential_cache",
+)
+for _relation in ("groups", "user_permissions"):
+    m2m_changed.connect(
+        _invalidate_members,
+        sender=getattr(get_user_model(), _relation).through,
+        dispatch_uid=f"token_versions:{_relation}",
+    )
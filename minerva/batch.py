@@ -0,0 +1,209 @@
+"""
+Batch endpoint support: many API calls in one HTTP request.
+
+Each sub-request is resolved against the URLconf and dispatched to its
+APIView in process, as the user the batch request authenticated as. The
+middleware, and the credentials check, run once for the whole batch.
+"""
+
+import json
+import logging
+from contextlib import ExitStack
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from rest_framework import serializers, status
+from rest_framework.views import APIView
+
+from minerva.cache import CACHE_NAMESPACES, response_cache
+from minerva.sharding import GLOBAL_DATABASE, shards
+
+logger = logging.getLogger("minerva.batch")
+
+BATCH_METHODS = ("GET", "HEAD", "OPTIONS", "POST", "PUT", "PATCH", "DELETE")
+# Request headers that are about the batch request itself.
+BATCH_ONLY_HEADERS = (
+    "CONTENT_TYPE",
+    "CONTENT_LENGTH",
+    "HTTP_IF_MATCH",
+    "HTTP_IF_NONE_MATCH",
+    "HTTP_IF_MODIFIED_SINCE",
+    "HTTP_IF_UNMODIFIED_SINCE",
+)
+
+
+class BatchOperationSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=BATCH_METHODS)
+    path = serializers.RegexField(r"^/", max_length=2048)
+    body = serializers.JSONField(required=False, allow_null=True)
+
+    def to_internal_value(self, data):
+        if isinstance(data, dict) and isinstance(data.get("method"), str):
+            data = {**data, "method": data["method"].upper()}
+        return super().to_internal_value(data)
+
+
+class BatchResultSerializer(serializers.Serializer):
+    status = serializers.IntegerField()
+    headers = serializers.DictField(child=serializers.CharField())
+    body = serializers.JSONField(allow_null=True)
+
+
+def batch_serializer(data):
+    return BatchOperationSerializer(
+        data=data,
+        many=True,
+        allow_empty=False,
+        max_length=settings.BATCH_MAX_REQUESTS,
+    )
+
+
+def run_batch(request, operations, atomic=False):
+    """
+    Run ``operations`` one after the other and return their responses.
+
+    Args:
+        request (Request): The authenticated batch request.
+        operations (list): Validated ``{"method", "path", "body"}`` dicts.
+        atomic (bool): Run every operation in one transaction (per
+            database). The first operation answering with an error status
+            (500 included, for an operation that raised) stops the batch
+            and rolls everything back: it keeps its own response, the
+            others are answered with 424.
+
+    Returns:
+        list: One ``{"status", "headers", "body"}`` dict per operation.
+    """
+    if not atomic:
+        return [dispatch(request, operation) for operation in operations]
+
+    results = []
+    with ExitStack() as stack:
+        aliases = [GLOBAL_DATABASE, *shards()]
+        for alias in aliases:
+            stack.enter_context(transaction.atomic(using=alias))
+        for operation in operations:
+            result = dispatch(request, operation)
+            results.append(result)
+            if result["status"] >= 400:
+                break
+        else:
+            return results
+        for alias in aliases:
+            transaction.set_rollback(True, using=alias)
+
+    failed = len(results) - 1
+    # Responses cached during the batch may hold the rolled back writes.
+    for namespace in CACHE_NAMESPACES:
+        response_cache.bump(namespace)
+    detail = f"Operation at index {failed} failed; the batch was rolled back."
+    return [
+        (
+            results[index]
+            if index == failed
+            else _result(status.HTTP_424_FAILED_DEPENDENCY, {"detail": detail})
+        )
+        for index in range(len(operations))
+    ]
+
+
+def dispatch(request, operation):
+    """
+    Call the view of one operation and return its response as a dict.
+
+    An exception raised by the view is logged and answered with 500 for
+    this operation only, so the results of the others are not lost.
+    """
+    url = urlsplit(operation["path"])
+    try:
+        match = resolve(url.path)
+    except Resolver404:
+        return _result(status.HTTP_404_NOT_FOUND, {"detail": "Not found."})
+    view_class = getattr(match.func, "cls", None)
+    if not (
+        isinstance(view_class, type)
+        and issubclass(view_class, APIView)
+        and getattr(view_class, "batchable", True)
+    ):
+        return _result(
+            status.HTTP_400_BAD_REQUEST,
+            {"detail": "This path cannot be part of a batch."},
+        )
+
+    subrequest = build_request(request, operation["method"], url, operation.get("body"))
+    subrequest.resolver_match = match
+    try:
+        response = match.func(subrequest, *match.args, **match.kwargs)
+    except Exception:
+        logger.exception(
+            "Batch operation %s %s failed", operation["method"], operation["path"]
+        )
+        return _result(
+            status.HTTP_500_INTERNAL_SERVER_ERROR,
+            {"detail": "A server error occurred."},
+        )
+    if response.streaming:
+        response.close()
+        return _result(
+            status.HTTP_400_BAD_REQUEST,
+            {"detail": "Streaming responses cannot be part of a batch."},
+        )
+    if hasattr(response, "render"):
+        response.render()
+    headers = {
+        name: value
+        for name, value in response.items()
+        if name.lower() not in ("content-type", "content-length", "vary")
+    }
+    body = None
+    if response.content:
+        if response.get("Content-Type", "").startswith("application/json"):
+            body = json.loads(response.content)
+        else:
+            body = response.content.decode(response.charset)
+    return _result(response.status_code, body, headers)
+
+
+def build_request(request, method, url, body=None):
+    """
+    Build the request of one operation from the batch request: same client,
+    cookies and authenticated user, with its own method, path and JSON body.
+    """
+    content = b"" if body is None else json.dumps(body).encode()
+    subrequest = HttpRequest()
+    subrequest.method = method
+    subrequest.path = subrequest.path_info = url.path
+    subrequest.META = {
+        key: value
+        for key, value in request.META.items()
+        if key not in BATCH_ONLY_HEADERS
+    }
+    subrequest.META.update(
+        REQUEST_METHOD=method,
+        PATH_INFO=url.path,
+        QUERY_STRING=url.query,
+        HTTP_ACCEPT="application/json",
+    )
+    if body is not None:
+        subrequest.META.update(
+            CONTENT_TYPE="application/json", CONTENT_LENGTH=str(len(content))
+        )
+    subrequest.GET = QueryDict(url.query)
+    subrequest.COOKIES = request.COOKIES
+    subrequest._stream = BytesIO(content)
+    subrequest._read_started = False
+    # Reuse the authentication of the batch request instead of checking the
+    # credentials again for every operation.
+    subrequest.user = request.user
+    if request.user.is_authenticated:
+        subrequest._force_auth_user = request.user
+        subrequest._force_auth_token = request.auth
+    return subrequest
+
+
+def _result(code, body=None, headers=None):
+    return {"status": code, "headers": headers or {}, "body": body}
@@ -0,0 +1,329 @@
+import re
+import statistics
+import subprocess
+import time
+import uuid
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, connections, transaction
+from django.test import Client, override_settings
+from django.urls import URLPattern, URLResolver, get_resolver
+
+from course.models import Course
+from course_category.models import CourseCategory
+from institution.models import Institution
+from minerva.authentication import ClaimsAccessToken
+from minerva.ids import uuid7
+from minerva.sharding import shard_querysets
+from module.models import Module
+from module.models.module import RANK_STEP
+
+BENCHMARK_USERNAME = "api-benchmark"
+# Namespaces whose URLs are not part of the API.
+SKIPPED_NAMESPACES = ("admin",)
+
+
+def _first(model, field="pk"):
+    value = model.objects.order_by("pk").values_list(field, flat=True).first()
+    if value is None:
+        raise LookupError(f"no {model._meta.verbose_name} to request")
+    return value
+
+
+# Keyword arguments of the URLs with path parameters, by URL name, taken
+# from existing rows. A URL with parameters that is missing here is
+# reported as skipped, so new endpoints are noticed.
+URL_KWARGS = {
+    "course_detail_by_id": lambda: {"id": _first(Course)},
+    "course_detail_by_slug": lambda: {"alias": _first(Course, "alias")},
+    "course_tree": lambda: {"alias": _first(Course, "alias")},
+    "course_syllabus": lambda: {"alias": _first(Course, "alias")},
+    "module_detail": lambda: {"id": _first(Module)},
+    "institution_detail_update_delete": lambda: {"id": _first(Institution)},
+    "course_category_detail_update_delete": lambda: {"id": _first(CourseCategory)},
+}
+# Query parameters the URLs need to answer with data rather than an error.
+URL_QUERIES = {
+    "course_search": {"q": "course"},
+}
+# Primary key generators compared by InsertBenchmark.
+KEY_GENERATORS = {"uuid4": uuid.uuid4, "uuid7": uuid7}
+
+
+def iter_urls(resolver=None, prefix="", namespace=None):
+    """
+    Yield ``(name, route, pattern)`` for every named URL of the URLconf.
+    """
+    resolver = resolver or get_resolver()
+    for pattern in resolver.url_patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            inner = pattern.namespace or namespace
+            if inner in SKIPPED_NAMESPACES:
+                continue
+            yield from iter_urls(pattern, route, inner)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            name = f"{namespace}:{pattern.name}" if namespace else pattern.name
+            yield name, route, pattern
+
+
+def build_path(route, kwargs):
+    """
+    Fill the ``<converter:name>`` parameters of a route.
+    """
+    path = re.sub(r"<(?:\w+:)?(\w+)>", lambda match: str(kwargs[match[1]]), route)
+    return "/" + path
+
+
+def percentile(sorted_values, fraction):
+    """
+    Percentile by linear interpolation between the closest ranks.
+    """
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    position = (len(sorted_values) - 1) * fraction
+    low = int(position)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (
+        position - low
+    )
+
+
+class APIBenchmark:
+    """
+    Time GET requests to every URL of the URLconf, in process.
+
+    Requests go through the whole middleware chain and view with Django's
+    test client (no network), authenticated with a staff JWT. Every URL is
+    requested ``warmup`` times unmeasured, then ``requests`` times. With
+    ``cold_cache`` the cache is cleared before every request, so cached
+    responses are never served.
+    """
+
+    def __init__(self, requests=100, warmup=5, cold_cache=False, only=None):
+        self.requests = requests
+        self.warmup = warmup
+        self.cold_cache = cold_cache
+        self.only = set(only or ())
+
+    def user(self):
+        user, _ = get_user_model().objects.get_or_create(
+            username=BENCHMARK_USERNAME, defaults={"is_staff": True}
+        )
+        return user
+
+    def run(self):
+        """
+        Returns:
+            dict: ``meta`` about the run, ``results`` per URL name and the
+            ``skipped`` URLs with the reason.
+        """
+        token = ClaimsAccessToken.for_user(self.user())
+        client = Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+        results, skipped = {}, {}
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            self._run(client, results, skipped)
+        return {
+            "meta": self.meta(),
+            "results": results,
+            "skipped": skipped,
+        }
+
+    def _run(self, client, results, skipped):
+        for name, route, pattern in iter_urls():
+            if self.only and name not in self.only:
+                continue
+            view_class = getattr(pattern.callback, "view_class", None)
+            if view_class is not None and not hasattr(view_class, "get"):
+                skipped[name] = "no GET handler"
+                continue
+            if "<" in route:
+                if name not in URL_KWARGS:
+                    skipped[name] = "no sample arguments for the path parameters"
+                    continue
+                try:
+                    kwargs = URL_KWARGS[name]()
+                except LookupError as error:
+                    skipped[name] = str(error)
+                    continue
+            else:
+                kwargs = {}
+            path = build_path(route, kwargs)
+            results[name] = self.measure(client, path, URL_QUERIES.get(name))
+
+    def measure(self, client, path, query=None):
+        latencies = []
+        statuses = set()
+        queries = 0
+
+        def count_query(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        for _ in range(self.warmup):
+            self.get(client, path, query)
+        with ExitStack() as stack:
+            # Reads may go to a replica or a shard rather than the default.
+            for alias_connection in connections.all():
+                stack.enter_context(alias_connection.execute_wrapper(count_query))
+            for _ in range(self.requests):
+                if self.cold_cache:
+                    cache.clear()
+                started = time.perf_counter()
+                response = self.get(client, path, query)
+                latencies.append(time.perf_counter() - started)
+                statuses.add(response.status_code)
+
+        latencies.sort()
+        total = sum(latencies)
+        return {
+            "path": path,
+            "query": query or {},
+            "status": sorted(statuses),
+            "requests": len(latencies),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+            "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+            "throughput_rps": round(len(latencies) / total, 1) if total else None,
+            "queries_per_request": round(queries / len(latencies), 2),
+        }
+
+    def get(self, client, path, query):
+        response = client.get(path, query)
+        if response.streaming:
+            # Streamed bodies are produced while they are read.
+            for _ in response.streaming_content:
+                pass
+        return response
+
+    def meta(self):
+        return {
+            "commit": git_commit(),
+            "database": connection.vendor,
+            "rows": {
+                model.__name__: model.objects.count()
+                for model in (Institution, CourseCategory, Course, Module)
+            },
+            "requests": self.requests,
+            "warmup": self.warmup,
+            "cold_cache": self.cold_cache,
+        }
+
+
+class InsertBenchmark:
+    """
+    Time bulk inserts of modules keyed by each of ``KEY_GENERATORS``.
+
+    The modules are added to one course of the existing catalog, so they go
+    into the primary key index of the whole module table (seed a large
+    catalog first). Every run is rolled back, leaving the table as it was
+    for the next run and after the benchmark, and the generators take turns
+    for ``rounds`` rounds so neither always runs on a colder cache. Only the
+    INSERT statements are timed.
+    """
+
+    def __init__(self, rows=100_000, batch_size=1000, rounds=3):
+        self.rows = rows
+        self.batch_size = batch_size
+        self.rounds = rounds
+
+    def course(self):
+        for courses in shard_querysets(Course.objects.order_by("pk")):
+            course = courses.first()
+            if course is not None:
+                return course
+        raise LookupError("no course to add modules to; seed the catalog first")
+
+    def run(self):
+        """
+        Returns:
+            dict: ``meta`` about the run and ``results`` per generator: the
+            duration of every round and the median insert throughput.
+        """
+        course = self.course()
+        modules = Module.objects.using(course._state.db)
+        timings = {name: [] for name in KEY_GENERATORS}
+        for _ in range(self.rounds):
+            for name, generate in KEY_GENERATORS.items():
+                timings[name].append(self.measure(modules, course, generate))
+        return {
+            "meta": {
+                "commit": git_commit(),
+                "database": connections[modules.db].vendor,
+                "existing_rows": modules.count(),
+                "rows": self.rows,
+                "batch_size": self.batch_size,
+                "rounds": self.rounds,
+            },
+            "results": {
+                name: {
+                    "seconds": [round(elapsed, 3) for elapsed in elapsed_times],
+                    "rows_per_second": round(
+                        self.rows / statistics.median(elapsed_times)
+                    ),
+                }
+                for name, elapsed_times in timings.items()
+            },
+        }
+
+    def measure(self, modules, course, generate):
+        last = modules.filter(id_course=course).order_by("-rank").first()
+        first_rank = (last.rank if last else 0) + RANK_STEP
+        batches = [
+            [
+                Module(
+                    id=generate(),
+                    id_course=course,
+                    name=f"Benchmark module {index}",
+                    rank=first_rank + index,
+                    instructional_items=1,
+                    assessment_items=1,
+                )
+                for index in range(start, min(start + self.batch_size, self.rows))
+            ]
+            for start in range(0, self.rows, self.batch_size)
+        ]
+        with transaction.atomic(using=modules.db):
+            started = time.perf_counter()
+            for batch in batches:
+                modules.bulk_create(batch)
+            elapsed = time.perf_counter() - started
+            transaction.set_rollback(True, using=modules.db)
+        return elapsed
+
+
+def git_commit():
+    """
+    Commit checked out in ``BASE_DIR``, or None outside of a git checkout.
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold=0.2, metric="p95_ms"):
+    """
+    URLs whose ``metric`` grew by more than ``threshold`` (a fraction) over
+    the baseline run.
+
+    Returns:
+        dict: URL name to ``(baseline value, current value)``.
+    """
+    regressions = {}
+    for name, result in results["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if before and result[metric] > before[metric] * (1 + threshold):
+            regressions[name] = (before[metric], result[metric])
+    return regressions
@@ -0,0 +1,268 @@
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils.connection import ConnectionProxy
+from rest_framework import status
+from rest_framework.response import Response
+
+from minerva import metrics, replicas
+from minerva.conditional import Validators, representation
+
+# Cache shared by every worker process (CACHES["shared"]), while ``cache``
+# may be local to the process.
+shared_cache = ConnectionProxy(caches, "shared")
+
+
+
+class SharedCacheMemo:
+    """
+    Bounded, short-lived LRU of values read from the shared cache.
+
+    The shared cache may be a database table, so values read on every
+    request (response generations, token versions) are remembered by the
+    process for ``timeout`` seconds. A change made by another process is
+    seen once the value expires; one made by this process is seen at once,
+    as the writer discards its entry.
+
+    Attributes:
+        timeout (float): Seconds a value is used before it is read again.
+        max_entries (int): Entries kept before the least recently used is dropped.
+    """
+
+    def __init__(self, timeout, max_entries):
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        """
+        Return the values of ``keys``, reading the shared cache for those not
+        remembered; keys missing from the shared cache are left out.
+        """
+        now = time.monotonic()
+        values = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] > now:
+                    values[key] = entry[0]
+                    self._entries.move_to_end(key)
+        missing = [key for key in keys if key not in values]
+        if missing:
+            for key, value in shared_cache.get_many(missing).items():
+                self.set(key, value)
+                values[key] = value
+        return values
+
+    def set(self, key, value):
+        if self.timeout <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.timeout)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+shared_memo = SharedCacheMemo(
+    settings.SHARED_CACHE_MEMO_TIMEOUT, settings.SHARED_CACHE_MEMO_MAX_ENTRIES
+)
+
+# Namespaces of the cached API responses.
+CACHE_NAMESPACES = ("course", "module", "institution", "course_category")
+
+
+class ResponseCache:
+    """
+    Cache of GET response bodies, versioned by per-namespace generations.
+
+    Every cache key embeds the current generation of each namespace the
+    response depends on (for example ``course`` and ``institution``). A write
+    bumps the generation of its own namespace only, which makes every key
+    built from the old generation unreachable; stale entries are never looked
+    up again and simply age out of the cache.
+
+    Response bodies are kept in the default cache, which may be local to
+    the process; the generations are kept in the shared cache, so a write
+    handled by one worker invalidates the responses cached by every worker
+    (within ``SHARED_CACHE_MEMO_TIMEOUT``, see ``SharedCacheMemo``).
+
+    Hits and misses are counted per process and exposed through ``stats``.
+
+    With read replicas, a response read from a replica shortly after a bump
+    of one of its namespaces is not cached: it may predate the write. The
+    record of recent bumps is shared like the generations.
+    """
+
+    key_prefix = "response"
+    generation_prefix = "generation"
+    recent_prefix = "bumped"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def generation_key(self, namespace):
+        return f"{self.generation_prefix}:{namespace}"
+
+    def generations(self, namespaces):
+        keys = [self.generation_key(namespace) for namespace in namespaces]
+        generations = shared_memo.get_many(keys)
+        for key in keys:
+            if key not in generations:
+                # Seed from the clock so an evicted counter never falls back to
+                # a value that old response keys were built with.
+                shared_cache.add(key, time.time_ns(), timeout=None)
+                generations[key] = shared_cache.get(key)
+                shared_memo.set(key, generations[key])
+        return [generations[key] for key in keys]
+
+    def bump(self, namespace):
+        """
+        Invalidate every response that depends on ``namespace``.
+
+        Inside a transaction the generation is bumped again on commit, since
+        a concurrent reader may have cached the pre-commit data in between.
+        """
+        self._incr(namespace)
+        if transaction.get_connection().in_atomic_block:
+            transaction.on_commit(lambda: self._incr(namespace))
+
+    def _incr(self, namespace):
+        key = self.generation_key(namespace)
+        try:
+            shared_cache.incr(key)
+        except ValueError:
+            shared_cache.add(key, time.time_ns(), timeout=None)
+        shared_memo.discard(key)
+        if settings.DATABASE_REPLICAS:
+            # Replicas may not show the write yet while they are allowed to lag.
+            lag = settings.REPLICA_MAX_LAG + settings.REPLICA_LAG_CHECK_INTERVAL
+            shared_cache.set(
+                f"{self.recent_prefix}:{namespace}", True, math.ceil(lag)
+            )
+
+    def recently_bumped(self, namespaces):
+        """
+        Whether a replica might still serve data older than the last bump of
+        one of ``namespaces``.
+        """
+        keys = [f"{self.recent_prefix}:{namespace}" for namespace in namespaces]
+        return bool(shared_cache.get_many(keys))
+
+    def key(self, request, namespaces):
+        digest = hashlib.sha1()
+        for part in (*representation(request), *self.generations(namespaces)):
+            digest.update(str(part).encode())
+            digest.update(b"\0")
+        return f"{self.key_prefix}:{digest.hexdigest()}"
+
+    def get(self, key):
+        entry = cache.get(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        metrics.count_cache_lookup("response", entry is not None)
+        return entry
+
+    def set(self, key, response):
+        headers = {
+            header: response[header]
+            for header in ("ETag", "Last-Modified")
+            if response.has_header(header)
+        }
+        cache.set(key, (response.data, headers), settings.RESPONSE_CACHE_TIMEOUT)
+
+    def stats(self, namespaces=()):
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "generations": dict(zip(namespaces, self.generations(namespaces))),
+        }
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.misses = 0
+
+
+response_cache = ResponseCache()
+
+
+def cache_response(*namespaces):
+    """
+    Decorator for APIView GET handlers serving repeated reads from the cache.
+
+    Args:
+        namespaces (str): Namespaces whose data the response is built from.
+            Responses are keyed by the path, query string, renderer and the
+            current generation of each namespace.
+
+    A cached response keeps its ETag and Last-Modified headers, so
+    conditional requests are answered with 304 without touching the
+    database.
+    """
+
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            key = response_cache.key(request, namespaces)
+            entry = response_cache.get(key)
+            if entry is not None:
+                data, headers = entry
+                if headers and Validators.from_headers(headers).matches(request):
+                    return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+                return Response(data, headers=headers)
+
+            response = handler(view, request, *args, **kwargs)
+            replica = replicas.current_replica()
+            if response.status_code == status.HTTP_200_OK and not (
+                replica is not None
+                and replica.used
+                and response_cache.recently_bumped(namespaces)
+            ):
+                response_cache.set(key, response)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def track_model(model, namespace):
+    """
+    Bump ``namespace`` whenever a ``model`` row is saved or deleted.
+
+    Bulk queryset operations (``update``, ``bulk_create``...) send no signals;
+    code using them must call ``response_cache.bump`` itself.
+    """
+
+    def receiver(sender, **kwargs):
+        response_cache.bump(namespace)
+
+    uid = f"response_cache:{model._meta.label}"
+    post_save.connect(receiver, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(receiver, sender=model, weak=False, dispatch_uid=uid)
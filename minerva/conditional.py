@@ -0,0 +1,132 @@
+import hashlib
+from datetime import datetime, timezone
+
+from django.db.models import Count, Max
+from django.http import Http404
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+
+from minerva.sharding import shard_querysets
+
+
+class Validators:
+    """
+    ETag and Last-Modified validators for a GET response.
+
+    The ETag is a strong validator derived from the modification timestamps
+    of the data plus everything that changes its representation (path, query
+    string and renderer), so two different responses never share a tag.
+
+    Attributes:
+        etag (str): Quoted entity tag.
+        last_modified (datetime): Newest ``updated_at`` of the data, if any.
+    """
+
+    def __init__(self, etag, last_modified=None):
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @classmethod
+    def for_request(cls, request, *parts, last_modified=None):
+        digest = hashlib.sha1()
+        for part in (*representation(request), *parts):
+            digest.update(str(part).encode())
+            digest.update(b"\0")
+        return cls(quote_etag(digest.hexdigest()), last_modified)
+
+    @classmethod
+    def from_headers(cls, headers):
+        """
+        Rebuild the validators previously emitted as response headers.
+        """
+        timestamp = parse_http_date_safe(headers.get("Last-Modified"))
+        last_modified = None
+        if timestamp is not None:
+            last_modified = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+        return cls(headers["ETag"], last_modified)
+
+    def matches(self, request):
+        """
+        True when the client copy is still fresh and a 304 can be returned.
+
+        ``If-None-Match`` takes precedence over ``If-Modified-Since``.
+        """
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match is not None:
+            etags = parse_etags(if_none_match)
+            return "*" in etags or self.etag.removeprefix("W/") in [
+                etag.removeprefix("W/") for etag in etags
+            ]
+
+        if_modified_since = parse_http_date_safe(request.headers.get("If-Modified-Since"))
+        if if_modified_since is None or self.last_modified is None:
+            return False
+        return int(self.last_modified.timestamp()) <= if_modified_since
+
+    @property
+    def headers(self):
+        headers = {"ETag": self.etag}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = http_date(self.last_modified.timestamp())
+        return headers
+
+    def apply(self, response):
+        """
+        Set the validator headers on ``response`` and return it.
+        """
+        for header, value in self.headers.items():
+            response[header] = value
+        return response
+
+
+def list_validators(request, queryset, related=()):
+    """
+    Validators for a list endpoint from one aggregate query.
+
+    ``Max(updated_at)`` catches inserts and updates and ``Count`` catches
+    deletes, so the whole list does not need to be loaded to validate it.
+    Each relation in ``related`` (for example the expanded ones) contributes
+    its own newest timestamp. A sharded queryset is aggregated on every
+    shard and the rows are combined.
+
+    Only an ETag is given: a Last-Modified date alone would miss deletes of
+    any row but the newest, so ``If-Modified-Since`` is not honored either.
+    """
+    aggregates = {"count": Count("pk"), "updated_at": Max("updated_at")}
+    for name in related:
+        aggregates[name] = Max(f"{name}__updated_at")
+    rows = [
+        part.order_by().aggregate(**aggregates) for part in shard_querysets(queryset)
+    ]
+    row = {key: _newest(part[key] for part in rows) for key in aggregates}
+    row["count"] = sum(part["count"] for part in rows)
+    return Validators.for_request(request, *(row[key] for key in sorted(row)))
+
+
+def object_validators(request, queryset, related=()):
+    """
+    Validators for a detail endpoint, read without loading the object.
+
+    The ``updated_at`` of each relation in ``related`` is read in the same
+    query.
+
+    Raises:
+        Http404: If ``queryset`` matches no row.
+    """
+    columns = ["pk", "updated_at", *(f"{name}__updated_at" for name in related)]
+    row = queryset.values_list(*columns).first()
+    if row is None:
+        raise Http404
+    return Validators.for_request(request, *row, last_modified=_newest(row[1:]))
+
+
+def representation(request):
+    """
+    What, besides the data, determines the body of a GET response.
+    """
+    renderer = getattr(request, "accepted_renderer", None)
+    return request.get_full_path(), getattr(renderer, "format", "")
+
+
+def _newest(timestamps):
+    timestamps = [timestamp for timestamp in timestamps if timestamp is not None]
+    return max(timestamps, default=None)
@@ -0,0 +1,48 @@
+import os
+import threading
+import time
+import uuid
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def uuid7():
+    """
+    Generate a time-ordered UUID (version 7, RFC 9562).
+
+    The first 48 bits are the Unix time in milliseconds, followed by a
+    12-bit counter and 62 random bits. Keys generated later sort after the
+    earlier ones, so inserts land at the right edge of the primary key index
+    instead of splitting pages all over it as random (version 4) keys do.
+
+    The counter keeps the keys of this process ordered within a millisecond
+    and when the clock steps back: it starts at a random value in the lower
+    half of its range on each new millisecond, and on overflow borrows the
+    next millisecond.
+
+    Returns:
+        uuid.UUID: The new key.
+    """
+    global _last_ms, _counter
+    with _lock:
+        now = time.time_ns() // 1_000_000
+        if now > _last_ms:
+            _last_ms, _counter = now, int.from_bytes(os.urandom(2), "big") & 0x7FF
+        elif _counter < 0xFFF:
+            _counter += 1
+        else:
+            _last_ms, _counter = _last_ms + 1, 0
+        millis, counter = _last_ms, _counter
+    random_bits = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+    return uuid.UUID(
+        int=millis << 80 | 0x7 << 76 | counter << 64 | 0b10 << 62 | random_bits
+    )
+
+
+def uuid7_time(value):
+    """
+    Unix time, in seconds, at which a version 7 UUID was generated.
+    """
+    return (value.int >> 80) / 1000
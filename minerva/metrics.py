@@ -0,0 +1,113 @@
+"""
+Prometheus metrics of this process, exposed at ``/metrics``.
+
+Only staff users and the addresses of ``METRICS_ALLOWED_NETWORKS`` (the
+Prometheus scrapers) may read it: the series expose the URL names and
+traffic of the API.
+
+With several worker processes (gunicorn), set ``PROMETHEUS_MULTIPROC_DIR``
+to an empty directory shared by the workers before they start: every
+worker then writes its samples to memory-mapped files in that directory
+and ``/metrics`` aggregates the files of all workers, whichever worker
+answers the scrape. ``gunicorn.conf.py`` removes the files of workers that
+exit.
+"""
+
+import ipaddress
+import os
+
+from django.conf import settings
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# View label of requests that did not resolve to a URL pattern, so unknown
+# paths cannot create new series.
+UNRESOLVED = "<unresolved>"
+
+REQUESTS = Counter(
+    "minerva_http_requests",
+    "HTTP requests by URL name, method and status.",
+    ["view", "method", "status"],
+)
+REQUEST_LATENCY = Histogram(
+    "minerva_http_request_duration_seconds",
+    "Time to handle a request, by URL name and method.",
+    ["view", "method"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+DB_QUERIES = Histogram(
+    "minerva_db_queries_per_request",
+    "SQL statements run per request, by URL name.",
+    ["view"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200),
+)
+DB_TIME = Counter(
+    "minerva_db_query_duration_seconds",
+    "Time spent running SQL statements, by URL name.",
+    ["view"],
+)
+AUTH_LATENCY = Histogram(
+    "minerva_auth_duration_seconds",
+    "Time spent authenticating a request.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+CACHE_LOOKUPS = Counter(
+    "minerva_cache_lookups",
+    "Cache lookups by cache (response, credentials) and result (hit, miss).",
+    ["cache", "result"],
+)
+
+
+def observe_request(request, response, profile):
+    """
+    Record a handled request from its ``RequestProfile``.
+    """
+    match = getattr(request, "resolver_match", None)
+    view = match.view_name if match else UNRESOLVED
+    REQUESTS.labels(view, request.method, response.status_code).inc()
+    REQUEST_LATENCY.labels(view, request.method).observe(profile.elapsed())
+    DB_QUERIES.labels(view).observe(profile.query_count)
+    DB_TIME.labels(view).inc(profile.db_time)
+    if "auth" in profile.spans:
+        AUTH_LATENCY.observe(profile.spans["auth"])
+
+
+def count_cache_lookup(cache, hit):
+    CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def may_scrape(request):
+    """
+    Whether ``request`` may read the metrics: a staff user, or a client
+    address in ``METRICS_ALLOWED_NETWORKS``.
+    """
+    user = getattr(request, "user", None)
+    if user is not None and user.is_active and user.is_staff:
+        return True
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network, strict=False)
+        for network in settings.METRICS_ALLOWED_NETWORKS
+    )
+
+
+def exposition():
+    """
+    Every metric in the Prometheus text exposition format, summed over the
+    workers in multiprocess mode.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry)
@@ -0,0 +1,174 @@
+import json
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from minerva import metrics, profiling, replicas
+
+logger = logging.getLogger("minerva.requests")
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise that can also run as part of an async middleware chain.
+
+    WhiteNoise only provides a sync ``__call__``. Under ASGI Django would then
+    run it, and everything below it in ``MIDDLEWARE``, on the single thread
+    reserved for sync code, so async views would be served one at a time.
+    Here requests that are not for a static file go straight to the async
+    chain, and static files are looked up and opened in a worker thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file, thread_sensitive=False)(
+                request.path_info
+            )
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve, thread_sensitive=False)(
+                static_file, request
+            )
+        return await self.get_response(request)
+
+
+class RequestTimingMiddleware:
+    """
+    Measure each request and report it in a ``Server-Timing`` header.
+
+    The header lists the database time (with the number of queries), the
+    time spent authenticating and evaluating serializer data, the time from
+    the view being called to its rendered response, and the total time
+    spent below this middleware. The same measurements feed the Prometheus
+    metrics of ``minerva.metrics``. Requests slower than
+    ``REQUEST_TIMING_SLOW_MS`` are also logged as a JSON record to the
+    ``minerva.requests`` logger, with the ``REQUEST_TIMING_TOP_QUERIES``
+    slowest SQL statements. None of it depends on ``DEBUG``.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_ms = settings.REQUEST_TIMING_SLOW_MS
+        self.top_queries = settings.REQUEST_TIMING_TOP_QUERIES
+        profiling.install()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with profiling.profile_request(self.top_queries) as profile:
+            response = self.get_response(request)
+        return self.finish(request, response, profile)
+
+    async def __acall__(self, request):
+        with profiling.profile_request(self.top_queries) as profile:
+            response = await self.get_response(request)
+        return self.finish(request, response, profile)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        profile = profiling.current_profile()
+        if profile is not None:
+            profile.view_started = time.perf_counter()
+
+    def finish(self, request, response, profile):
+        total = profile.elapsed()
+        timings = [
+            ("db", profile.db_time, f"{profile.query_count} queries"),
+            ("serialize", profile.spans.get("serialize", 0.0), None),
+        ]
+        if "auth" in profile.spans:
+            timings.append(("auth", profile.spans["auth"], None))
+        if profile.view_started is not None:
+            timings.append(("view", time.perf_counter() - profile.view_started, None))
+        timings.append(("total", total, None))
+
+        response["Server-Timing"] = ", ".join(
+            f"{name};dur={seconds * 1000:.1f}" + (f';desc="{desc}"' if desc else "")
+            for name, seconds, desc in timings
+        )
+
+        metrics.observe_request(request, response, profile)
+
+        if total * 1000 >= self.slow_ms:
+            match = getattr(request, "resolver_match", None)
+            record = {
+                "method": request.method,
+                "path": request.path,
+                "view": match.view_name if match else None,
+                "status": response.status_code,
+                "queries": profile.query_count,
+                **{
+                    f"{name}_ms": round(seconds * 1000, 3)
+                    for name, seconds, _ in timings
+                },
+                "slowest_queries": profile.slowest_queries(),
+            }
+            logger.warning(json.dumps(record), extra={"request_timing": record})
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Serve catalog reads of safe requests from a read replica.
+
+    The replica is picked once per request (see ``minerva.replicas``). A
+    successful write pins the client to the primary for
+    ``READ_YOUR_WRITES_WINDOW`` seconds, so it never reads data older than
+    its own writes: the response carries the pin both as a cookie and as an
+    ``X-Primary-Until`` header, for clients that do not keep cookies to
+    send back.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with replicas.route_reads(request):
+            response = self.get_response(request)
+        return self.pin(request, response)
+
+    async def __acall__(self, request):
+        with replicas.route_reads(request):
+            response = await self.get_response(request)
+        return self.pin(request, response)
+
+    def pin(self, request, response):
+        if request.method in ("GET", "HEAD", "OPTIONS", "TRACE"):
+            return response
+        if response.status_code >= 400:
+            return response
+        window = settings.READ_YOUR_WRITES_WINDOW
+        until = f"{time.time() + window:.3f}"
+        response[replicas.PIN_HEADER] = until
+        response.set_cookie(
+            replicas.PIN_COOKIE, until, max_age=window, httponly=True, samesite="Lax"
+        )
+        return response
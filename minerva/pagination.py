@@ -0,0 +1,287 @@
+import base64
+import json
+from functools import cmp_to_key, reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import CharField, F, Q, TextField
+from django.db.models.functions import Collate
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from minerva.sharding import shard_querysets
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a composite, unique sort key.
+
+    Each page is fetched with a ``WHERE (key) > (last seen key)`` filter instead
+    of an OFFSET, so the cost of a page does not grow with how deep the client
+    has paged. The cursor is an opaque base64 token holding the key of the
+    boundary row and the paging direction.
+
+    The sort key is taken from the ``ordering`` attribute of the view (a tuple
+    of field names, ``-`` prefix for descending). The primary key is appended
+    when it is not part of the ordering so the key is always unique.
+
+    A queryset of a sharded model is paged on every shard and the pages are
+    merged on the sort key, so the cost of a page grows with the number of
+    shards but still not with its depth. The merge compares values in
+    Python, so text keys are then sorted, and compared by the cursor filter,
+    with the collation of ``merge_collations`` for the database vendor: a
+    code point order, where a linguistic collation would put the rows of
+    each shard in an order the merge does not reproduce.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    ordering = ("pk",)
+    invalid_cursor_message = "Invalid cursor"
+    # Collations sorting text by code point, like Python does (SQLite's
+    # default BINARY collation already does).
+    merge_collations = {"postgresql": "C"}
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.fields = self.get_ordering(queryset, view)
+        self.nulls_largest = connections[queryset.db].features.nulls_order_largest
+
+        self.cursor = cursor = self.decode_cursor(request)
+        self.reverse = bool(cursor and cursor["reverse"])
+
+        self.sort_names = {name: name for name, _, _ in self.fields}
+        merged = len(shard_querysets(queryset)) > 1
+        if merged:
+            queryset = self._collate_text_keys(queryset)
+        order_by = [self._order_expression(name, desc) for name, desc, _ in self.fields]
+        if cursor is not None:
+            queryset = queryset.filter(self._keyset_filter(cursor["position"]))
+
+        querysets = shard_querysets(queryset.order_by(*order_by))
+        results = []
+        for part in querysets:
+            results.extend(part[: self.page_size + 1])
+        if merged:
+            results.sort(key=cmp_to_key(self._compare))
+        results = results[: self.page_size + 1]
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+        if self.reverse:
+            results.reverse()
+            self.has_next, self.has_previous = cursor is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        page_size = api_settings.PAGE_SIZE or self.max_page_size
+        try:
+            requested = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return page_size
+        if requested <= 0:
+            return page_size
+        return min(requested, self.max_page_size)
+
+    def get_ordering(self, queryset, view):
+        """
+        Resolve the view ordering into ``(field name, descending, field)`` triples.
+
+        Names may also refer to annotations of ``queryset`` (such as a search
+        rank); their output field is bound to the name so cursors are encoded
+        and decoded the same way as for model fields.
+        """
+        model = queryset.model
+        ordering = list(getattr(view, "ordering", None) or self.ordering)
+        names = {name.lstrip("-") for name in ordering}
+        if "pk" not in names and model._meta.pk.name not in names:
+            ordering.append("pk")
+
+        fields = []
+        for name in ordering:
+            desc = name.startswith("-")
+            name = name.lstrip("-")
+            if name == "pk":
+                field = model._meta.pk
+            elif name in queryset.query.annotations:
+                field = queryset.query.annotations[name].output_field.clone()
+                field.set_attributes_from_name(name)
+            else:
+                field = model._meta.get_field(name)
+            fields.append((name, desc, field))
+        return fields
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+        ]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self._build_link(self._position(-1), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self._build_link(self._position(0), reverse=True)
+
+    def encode_cursor(self, position, reverse):
+        payload = json.dumps({"p": position, "r": int(reverse)}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + "=" * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            raw = payload["p"]
+            if len(raw) != len(self.fields):
+                raise ValueError
+            position = []
+            for (_, _, field), value in zip(self.fields, raw):
+                # Null only sorts among the rows of a nullable field.
+                if value is None and not field.null:
+                    raise ValueError
+                position.append(field.to_python(value))
+            return {"raw": raw, "position": position, "reverse": bool(payload.get("r"))}
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _position(self, index):
+        """
+        Serialized sort key of the row at ``index`` of the current page.
+
+        An empty page (paged past either end) falls back to the cursor that
+        was requested, so the client can still step back.
+        """
+        if not self.page:
+            return self.cursor["raw"]
+        instance = self.page[index]
+        position = []
+        for _, _, field in self.fields:
+            value = field.value_from_object(instance)
+            position.append(None if value is None else field.value_to_string(instance))
+        return position
+
+    def _build_link(self, position, reverse):
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(position, reverse)
+        )
+
+    def _collate_text_keys(self, queryset):
+        """
+        Sort and filter the text keys of ``queryset`` on a code point
+        collation of each shard's vendor, through ``_sort_<name>`` aliases.
+        """
+        vendors = {connections[part.db].vendor for part in shard_querysets(queryset)}
+        collations = {self.merge_collations.get(vendor) for vendor in vendors}
+        if len(collations) != 1 or None in collations:
+            return queryset
+        (collation,) = collations
+        aliases = {}
+        for name, _, field in self.fields:
+            if isinstance(field, (CharField, TextField)):
+                self.sort_names[name] = f"_sort_{name}"
+                aliases[f"_sort_{name}"] = Collate(F(name), collation)
+        return queryset.alias(**aliases)
+
+    def _order_expression(self, name, desc):
+        name = self.sort_names[name]
+        return f"-{name}" if desc != self.reverse else name
+
+    def _keyset_filter(self, position):
+        """
+        Build ``(f1, f2, ...) > (v1, v2, ...)`` honouring per-field direction.
+
+        Expanded as ``f1 > v1 OR (f1 = v1 AND f2 > v2) OR ...`` so it works on
+        every backend and with mixed ascending/descending keys. NULLs in
+        nullable fields are placed where the database sorts them.
+        """
+        clauses = []
+        for index, (name, desc, field) in enumerate(self.fields):
+            equal = Q()
+            for previous in range(index):
+                equal &= self._equal(
+                    self.sort_names[self.fields[previous][0]], position[previous]
+                )
+            after = self._after(self.sort_names[name], desc, field, position[index])
+            if after is not None:
+                clauses.append(equal & after)
+        return reduce(or_, clauses)
+
+    def _compare(self, first, second):
+        """
+        Compare two rows the way the database sorts them for this page.
+        """
+        for _, desc, field in self.fields:
+            a, b = getattr(first, field.attname), getattr(second, field.attname)
+            if a == b:
+                continue
+            if a is None or b is None:
+                result = 1 if (a is None) == self.nulls_largest else -1
+            else:
+                result = -1 if a < b else 1
+            return -result if desc != self.reverse else result
+        return 0
+
+    def _equal(self, name, value):
+        return Q(**{f"{name}__isnull": True}) if value is None else Q(**{name: value})
+
+    def _after(self, name, desc, field, value):
+        """
+        Rows sorted after ``value`` on one field, or None if there are none.
+        """
+        ascending = desc == self.reverse
+        if not field.null:
+            return Q(**{f"{name}__{'gt' if ascending else 'lt'}": value})
+        nulls_after = ascending == self.nulls_largest
+        if value is None:
+            return None if nulls_after else Q(**{f"{name}__isnull": False})
+        after = Q(**{f"{name}__{'gt' if ascending else 'lt'}": value})
+        return after | Q(**{f"{name}__isnull": True}) if nulls_after else after
@@ -0,0 +1,146 @@
+import heapq
+import itertools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework.serializers import BaseSerializer
+
+_current = ContextVar("request_profile", default=None)
+
+
+class RequestProfile:
+    """
+    Timings collected while one request is handled.
+
+    Only the count and total time of all queries are kept, plus the
+    ``top_queries`` slowest statements, so memory use does not grow with the
+    number of queries (unlike ``connection.queries`` under ``DEBUG``).
+    """
+
+    def __init__(self, top_queries=5):
+        self.started = time.perf_counter()
+        self.top_queries = top_queries
+        self.query_count = 0
+        self.db_time = 0.0
+        self.spans = {}
+        self._slowest = []
+        self._order = itertools.count()
+        self._depth = {}
+        self.view_started = None
+
+    def add_query(self, sql, duration, alias):
+        self.query_count += 1
+        self.db_time += duration
+        if self.top_queries:
+            # The counter breaks ties so statements are never compared.
+            entry = (duration, next(self._order), sql, alias)
+            if len(self._slowest) < self.top_queries:
+                heapq.heappush(self._slowest, entry)
+            else:
+                heapq.heappushpop(self._slowest, entry)
+
+    def slowest_queries(self):
+        return [
+            {"sql": sql, "alias": alias, "ms": round(duration * 1000, 3)}
+            for duration, _, sql, alias in sorted(self._slowest, reverse=True)
+        ]
+
+    @contextmanager
+    def span(self, name):
+        """
+        Add the time spent in the block to ``spans[name]``; nested blocks of
+        the same name are only counted once.
+        """
+        depth = self._depth.get(name, 0)
+        self._depth[name] = depth + 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._depth[name] = depth
+            if not depth:
+                elapsed = time.perf_counter() - started
+                self.spans[name] = self.spans.get(name, 0.0) + elapsed
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+@contextmanager
+def profile_request(top_queries=5):
+    """
+    Collect a ``RequestProfile`` for the code run in the block, including
+    the code it runs in other threads through ``sync_to_async``.
+    """
+    profile = RequestProfile(top_queries)
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+
+
+def current_profile():
+    return _current.get()
+
+
+@contextmanager
+def span(name):
+    """
+    Time the block as ``name`` in the current request profile, if any.
+    """
+    profile = _current.get()
+    if profile is None:
+        yield
+    else:
+        with profile.span(name):
+            yield
+
+
+def _time_query(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.add_query(
+            sql, time.perf_counter() - started, context["connection"].alias
+        )
+
+
+def _add_query_timer(sender=None, connection=None, **kwargs):
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+def _timed_serializer_data(data):
+    @wraps(data)
+    def timed(self):
+        with span("serialize"):
+            return data(self)
+
+    timed.timed = True
+    return timed
+
+
+def install():
+    """
+    Time every query and every serializer ``data`` evaluation from now on.
+
+    Queries are timed by an execute wrapper added to each database
+    connection as it is opened. Both hooks only cost a context variable
+    lookup outside ``profile_request``.
+    """
+    connection_created.connect(_add_query_timer, dispatch_uid=__name__)
+    for connection in connections.all(initialized_only=True):
+        _add_query_timer(connection=connection)
+
+    data = BaseSerializer.data
+    if not getattr(data.fget, "timed", False):
+        BaseSerializer.data = property(_timed_serializer_data(data.fget))
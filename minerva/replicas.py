@@ -0,0 +1,176 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+# Apps whose reads may be served by a replica; everything else (users,
+# sessions, revoked tokens...) always reads the primary.
+REPLICATED_APPS = ("course", "module", "institution", "course_category")
+
+# Cookie and header carrying the time until which a client that just wrote
+# reads from the primary.
+PIN_COOKIE = "primary_until"
+PIN_HEADER = "X-Primary-Until"
+
+_routing = ContextVar("replica_routing", default=None)
+
+
+class ReplicaState:
+    """
+    Replica chosen for the current request, and whether it was read from.
+    """
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.used = False
+
+
+class LagGuard:
+    """
+    Keeps replicas that fall too far behind the primary out of rotation.
+
+    The lag of a replica is measured at most every ``check_interval``
+    seconds per process; a replica lagging more than ``max_lag`` seconds,
+    or failing the check, is skipped until a later check passes.
+    """
+
+    def __init__(self, max_lag, check_interval):
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._healthy = {}
+        self._lock = threading.Lock()
+
+    def healthy(self, alias):
+        now = time.monotonic()
+        healthy, checked_at = self._healthy.get(alias, (False, None))
+        if checked_at is not None and now - checked_at < self.check_interval:
+            return healthy
+        # One thread re-checks; the others keep the previous verdict.
+        if not self._lock.acquire(blocking=checked_at is None):
+            return healthy
+        try:
+            try:
+                healthy = self.measure(alias) <= self.max_lag
+            except DatabaseError:
+                healthy = False
+            self._healthy[alias] = (healthy, now)
+            return healthy
+        finally:
+            self._lock.release()
+
+    def measure(self, alias):
+        """
+        Seconds the replica ``alias`` is behind its primary.
+        """
+        connection = connections[alias]
+        if connection.vendor != "postgresql":
+            return 0.0
+        with connection.cursor() as cursor:
+            # Zero when everything received has been replayed, so an idle
+            # primary does not make the replica look late.
+            cursor.execute(
+                "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()"
+                " THEN 0"
+                " ELSE COALESCE(EXTRACT(EPOCH FROM now()"
+                " - pg_last_xact_replay_timestamp()), 0) END"
+            )
+            return float(cursor.fetchone()[0])
+
+    def pick(self, aliases):
+        """
+        A random healthy replica among ``aliases``, or None.
+        """
+        candidates = [alias for alias in aliases if self.healthy(alias)]
+        return random.choice(candidates) if candidates else None
+
+    def reset(self):
+        with self._lock:
+            self._healthy.clear()
+
+
+lag_guard = LagGuard(settings.REPLICA_MAX_LAG, settings.REPLICA_LAG_CHECK_INTERVAL)
+
+
+def pinned_until(request):
+    """
+    Time until which the client asked to read its own writes, if still ahead.
+    """
+    value = request.COOKIES.get(PIN_COOKIE) or request.headers.get(PIN_HEADER)
+    try:
+        until = float(value)
+    except (TypeError, ValueError):
+        return None
+    now = time.time()
+    # Values further ahead than one window were not issued by us.
+    if now < until <= now + settings.READ_YOUR_WRITES_WINDOW + 1:
+        return until
+    return None
+
+
+@contextmanager
+def route_reads(request):
+    """
+    Route the catalog reads of ``request`` to a replica when that is safe:
+    a safe method, a client that has not written within the read-your-writes
+    window, and a replica within the lag guard.
+
+    Yields:
+        ReplicaState: The replica used for the request (``alias`` is None
+        when reads go to the primary).
+    """
+    alias = None
+    if (
+        settings.DATABASE_REPLICAS
+        and request.method in ("GET", "HEAD", "OPTIONS")
+        and pinned_until(request) is None
+    ):
+        alias = lag_guard.pick(settings.DATABASE_REPLICAS)
+    state = ReplicaState(alias)
+    token = _routing.set(state)
+    try:
+        yield state
+    finally:
+        _routing.reset(token)
+
+
+def current_replica():
+    """
+    The ``ReplicaState`` of the current request, or None outside a request.
+    """
+    return _routing.get()
+
+
+class ReplicaRouter:
+    """
+    Send reads of the catalog apps to the replica chosen for the request
+    (see ``route_reads``); all writes, and all other reads, go to the
+    primary (``default``).
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if (
+            state is None
+            or state.alias is None
+            or model._meta.app_label not in REPLICATED_APPS
+        ):
+            return None
+        state.used = True
+        return state.alias
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Replicas get their schema from the primary through replication.
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
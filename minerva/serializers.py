@@ -0,0 +1,101 @@
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import serializers
+
+FIELDSET_PARAMETERS = [
+    OpenApiParameter(
+        name="fields",
+        type=OpenApiTypes.STR,
+        description="Comma separated list of fields to include in the response.",
+        required=False,
+    ),
+    OpenApiParameter(
+        name="expand",
+        type=OpenApiTypes.STR,
+        description="Comma separated list of related objects to inline in the response.",
+        required=False,
+    ),
+]
+
+
+def _split(value):
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin for ``?fields=`` and ``?expand=`` query parameters.
+
+    ``fields`` narrows the serialized output (and, through ``setup_queryset``,
+    the SQL column list) to the requested fields. ``expand`` replaces the
+    primary key of a relation listed in ``expandable_fields`` with the nested
+    representation, loaded in the same query with ``select_related``.
+
+    Attributes:
+        expandable_fields (dict): Relation name to the serializer class used
+            when the relation is expanded.
+    """
+
+    expandable_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop("fields", None)
+        expand = kwargs.pop("expand", None) or ()
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        for name in expand:
+            if name in self.fields:
+                self.fields[name] = self.expandable_fields[name](read_only=True)
+
+    @classmethod
+    def parse_fieldset(cls, request):
+        """
+        Read and validate the ``fields`` and ``expand`` query parameters.
+
+        Returns:
+            tuple: The requested field names (None when not narrowed) and the
+            relations to expand.
+        """
+        errors = {}
+        fields = request.query_params.get("fields")
+        if fields is not None:
+            fields = _split(fields)
+            unknown = set(fields) - set(cls().fields)
+            if unknown:
+                errors["fields"] = [f"Unknown field(s): {', '.join(sorted(unknown))}."]
+
+        expand = _split(request.query_params.get("expand", ""))
+        unknown = set(expand) - set(cls.expandable_fields)
+        if unknown:
+            errors["expand"] = [f"Cannot expand: {', '.join(sorted(unknown))}."]
+
+        if errors:
+            raise serializers.ValidationError(errors)
+        if fields is not None:
+            expand = [name for name in expand if name in fields]
+        return fields, expand
+
+    @classmethod
+    def setup_queryset(cls, queryset, fields=None, expand=(), required=()):
+        """
+        Restrict the loaded columns and join the expanded relations.
+
+        Args:
+            queryset (QuerySet): Base queryset of ``Meta.model``.
+            fields (list): Requested fields, or None to load every column.
+            expand (list): Relations to load with ``select_related``.
+            required (iterable): Extra columns the caller needs, such as the
+                pagination sort key (``-`` prefixes are ignored).
+        """
+        if expand:
+            queryset = queryset.select_related(*expand)
+        if fields is not None:
+            model_fields = {field.name for field in queryset.model._meta.concrete_fields}
+            columns = {name for name in fields if name in model_fields}
+            columns.update(name.lstrip("-") for name in required)
+            columns.add("pk")
+            queryset = queryset.only(*columns)
+        return queryset
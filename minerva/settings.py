@@ -1,6 +1,8 @@
 from pathlib import Path
 from datetime import timedelta
 import os
+import dj_database_url
+from corsheaders.defaults import default_headers
 import environ
 import sys
 
@@ -39,19 +41,23 @@ DEPENDENCIES_APPS = [
     "drf_spectacular",
 ]
 
-MINERVA_APPS = ["course", "institution", "course_category", "module"]
+MINERVA_APPS = ["course", "institution", "course_category", "module", "users"]
 
 INSTALLED_APPS = DJANGO_APPS + DEPENDENCIES_APPS + MINERVA_APPS
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework.authentication.BasicAuthentication",
+        "minerva.authentication.CachedBasicAuthentication",
+        "minerva.authentication.ClaimsJWTAuthentication",
     ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_PAGINATION_CLASS": "minerva.pagination.KeysetPagination",
+    "PAGE_SIZE": 50,
 }
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=1),
+    "TOKEN_USER_CLASS": "minerva.authentication.ClaimsUser",
 }
 
 SPECTACULAR_SETTINGS = {
@@ -62,9 +68,11 @@ SPECTACULAR_SETTINGS = {
 }
 
 MIDDLEWARE = [
+    "minerva.middleware.RequestTimingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "minerva.middleware.AsyncWhiteNoiseMiddleware",
+    "minerva.middleware.ReplicaRoutingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -74,6 +82,8 @@ MIDDLEWARE = [
 ]
 
 CORS_ALLOW_ALL_ORIGINS = True
+CORS_ALLOW_HEADERS = (*default_headers, "x-primary-until")
+CORS_EXPOSE_HEADERS = ["X-Primary-Until"]
 
 ROOT_URLCONF = "minerva.urls"
 
@@ -106,11 +116,118 @@ DATABASES = {
     }
 }
 
+# Read replicas of the default database, as database URLs. Catalog reads of
+# GET requests are served by them (see minerva.replicas); a client that
+# wrote reads from the primary for READ_YOUR_WRITES_WINDOW seconds, and a
+# replica lagging more than REPLICA_MAX_LAG seconds is skipped.
+DATABASE_REPLICAS = []
+for index, url in enumerate(env.list("REPLICA_DATABASE_URLS", default=[])):
+    DATABASES[f"replica_{index}"] = {
+        **dj_database_url.parse(url),
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f"replica_{index}")
+# Shards of the course catalog, as database URLs. Courses and their modules
+# live on the shard their institution hashes to (see minerva.sharding);
+# institutions and categories stay on the default database.
+DATABASE_SHARDS = []
+for index, url in enumerate(env.list("SHARD_DATABASE_URLS", default=[])):
+    DATABASES[f"shard_{index}"] = dj_database_url.parse(url)
+    DATABASE_SHARDS.append(f"shard_{index}")
+SHARD_VIRTUAL_NODES = env.int("SHARD_VIRTUAL_NODES", default=64)
+DATABASE_ROUTERS = ["minerva.sharding.ShardRouter", "minerva.replicas.ReplicaRouter"]
+READ_YOUR_WRITES_WINDOW = env.int("READ_YOUR_WRITES_WINDOW", default=10)
+REPLICA_MAX_LAG = env.float("REPLICA_MAX_LAG", default=5.0)
+REPLICA_LAG_CHECK_INTERVAL = env.int("REPLICA_LAG_CHECK_INTERVAL", default=5)
+
 if "test" in sys.argv or "test_coverage" in sys.argv:
     DATABASES["default"] = {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": ":memory:",
     }
+    # Separate database standing in for a replica in the router tests.
+    DATABASES["replica"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+    }
+    # Two more standing in for shards in the sharding tests.
+    for alias in ("shard_a", "shard_b"):
+        DATABASES[alias] = {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": ":memory:",
+        }
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "minerva",
+        "OPTIONS": {"MAX_ENTRIES": env.int("CACHE_MAX_ENTRIES", default=10000)},
+    },
+    # Small keys every worker process must see the same way, such as the
+    # generation counters that invalidate cached responses and the token
+    # versions (see minerva.cache and minerva.authentication). A database
+    # table by default (created by ``createcachetable``); point
+    # SHARED_CACHE_URL at Redis or memcached to take the lookups off the
+    # database.
+    "shared": env.cache_url(
+        "SHARED_CACHE_URL", default="dbcache://minerva_shared_cache"
+    ),
+}
+if "test" in sys.argv or "test_coverage" in sys.argv:
+    # The test run is a single process.
+    CACHES["shared"] = {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "minerva-shared",
+    }
+if CACHES["shared"]["BACKEND"].endswith(("DatabaseCache", "LocMemCache")):
+    # These backends cull entries at random once full. A culled key is
+    # reseeded, which is safe but costly: every cached response of a
+    # namespace, or every token claim of a user, is dropped. Size the cache
+    # above the number of users and cull a small share at a time.
+    CACHES["shared"].setdefault("OPTIONS", {}).update(
+        MAX_ENTRIES=env.int("SHARED_CACHE_MAX_ENTRIES", default=1_000_000),
+        CULL_FREQUENCY=env.int("SHARED_CACHE_CULL_FREQUENCY", default=100),
+    )
+
+# Values read from the shared cache on every request (response generations,
+# token versions) are remembered by each process for this many seconds: a
+# change made by another process takes up to that long to be seen, in
+# exchange for a shared cache (database) read per key and interval instead
+# of per request.
+SHARED_CACHE_MEMO_TIMEOUT = env.float("SHARED_CACHE_MEMO_TIMEOUT", default=1.0)
+SHARED_CACHE_MEMO_MAX_ENTRIES = env.int("SHARED_CACHE_MEMO_MAX_ENTRIES", default=10000)
+
+# Seconds a cached GET response is kept; writes invalidate it sooner.
+RESPONSE_CACHE_TIMEOUT = env.int("RESPONSE_CACHE_TIMEOUT", default=300)
+
+# Verified Basic credentials are trusted for this many seconds without
+# running the password hasher again (see minerva.authentication).
+CREDENTIALS_CACHE_TIMEOUT = env.int("CREDENTIALS_CACHE_TIMEOUT", default=60)
+CREDENTIALS_CACHE_MAX_ENTRIES = env.int("CREDENTIALS_CACHE_MAX_ENTRIES", default=1024)
+
+# Revoked JWTs are noticed by other processes within the refresh interval;
+# expired revocations are pruned once per prune interval.
+TOKEN_REVOCATION_REFRESH_INTERVAL = env.int(
+    "TOKEN_REVOCATION_REFRESH_INTERVAL", default=5
+)
+TOKEN_REVOCATION_PRUNE_INTERVAL = env.int(
+    "TOKEN_REVOCATION_PRUNE_INTERVAL", default=3600
+)
+
+# Requests taking longer than this are logged to "minerva.requests" with
+# their slowest SQL statements (see minerva.middleware).
+REQUEST_TIMING_SLOW_MS = env.int("REQUEST_TIMING_SLOW_MS", default=500)
+REQUEST_TIMING_TOP_QUERIES = env.int("REQUEST_TIMING_TOP_QUERIES", default=5)
+# Addresses and networks allowed to scrape /metrics without logging in (see
+# minerva.metrics). Behind a reverse proxy REMOTE_ADDR is the proxy's: then
+# keep /metrics off the public routes of the proxy.
+METRICS_ALLOWED_NETWORKS = env.list(
+    "METRICS_ALLOWED_NETWORKS", default=["127.0.0.1/32", "::1/128"]
+)
+
+# Most sub-requests a single call to the batch endpoint may carry (see
+# minerva.batch).
+BATCH_MAX_REQUESTS = env.int("BATCH_MAX_REQUESTS", default=50)
 
 AUTH_PASSWORD_VALIDATORS = [
     {
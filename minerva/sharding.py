@@ -0,0 +1,494 @@
+"""
+Sharding of the course catalog by institution.
+
+With ``DATABASE_SHARDS`` set, every course lives on the shard its
+institution hashes to on a consistent hash ring, and the rows that belong
+to a course (its modules, its search entry) live on the same shard, so a
+course is always read and written on one database. Institutions and
+categories stay on the global (``default``) database; every shard keeps a
+read-only copy of them so courses can still be joined to them.
+
+Reads that are about one course run inside ``using_shard`` (views use the
+``routed_to_shard`` decorator); reads that are not, such as the list
+endpoints, run once per shard (``shard_querysets``) and are merged.
+
+Unique constraints of the sharded tables only hold within a shard. The
+course directory, on the global database, records the shard of every
+course by id, alias and name: its own unique constraints keep aliases and
+names unique across the shards, and it finds the shard of a course with
+one query instead of asking every shard.
+
+Without ``DATABASE_SHARDS`` none of this applies and everything stays on
+the default database.
+"""
+
+import bisect
+import hashlib
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache, wraps
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models.fields.files import FieldFile
+from django.db.models.signals import post_delete, post_save
+from django.http import Http404
+
+GLOBAL_DATABASE = "default"
+# Apps whose rows are spread over the shards.
+SHARDED_APPS = ("course", "module")
+# Model placed by its institution; the rows of the other sharded models
+# follow the course they reference.
+SHARD_ROOT = "course.Course"
+SHARD_KEY = "institution"
+# Global index of the courses, by the fields unique across every shard.
+DIRECTORY = "course.CourseDirectoryEntry"
+DIRECTORY_FIELDS = ("alias", "name")
+# Models of the sharded apps that stay on the global database.
+GLOBAL_MODELS = (DIRECTORY,)
+
+_shard = ContextVar("shard", default=None)
+
+
+def _hash(key):
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """
+    Consistent hash ring over database aliases.
+
+    Each alias is placed at ``vnodes`` points of the ring and a key belongs
+    to the first point after its hash. Adding an alias only moves the keys
+    that land on its points; the others keep their alias.
+    """
+
+    def __init__(self, nodes, vnodes=None):
+        vnodes = vnodes or settings.SHARD_VIRTUAL_NODES
+        points = sorted(
+            (_hash(f"{node}#{index}"), node)
+            for node in nodes
+            for index in range(vnodes)
+        )
+        self._hashes = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def node(self, key):
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._nodes[index]
+
+
+@lru_cache(maxsize=8)
+def _ring(aliases):
+    return HashRing(aliases)
+
+
+def shards():
+    return list(settings.DATABASE_SHARDS)
+
+
+def is_sharded(model=None):
+    """
+    True when sharding is configured (and ``model``, if given, is sharded).
+    """
+    if not settings.DATABASE_SHARDS:
+        return False
+    return model is None or (
+        model._meta.app_label in SHARDED_APPS and model._meta.label not in GLOBAL_MODELS
+    )
+
+
+def shard_for_institution(institution_id):
+    """
+    Shard of the courses of an institution (courses without one share a shard).
+    """
+    key = "" if institution_id is None else str(institution_id)
+    try:
+        key = str(uuid.UUID(key))
+    except ValueError:
+        pass
+    return _ring(tuple(settings.DATABASE_SHARDS)).node(key)
+
+
+def current_shard():
+    """
+    Shard the current code runs on (see ``using_shard``), or None.
+    """
+    return _shard.get()
+
+
+@contextmanager
+def using_shard(alias):
+    """
+    Route the reads and writes of sharded models that name no database to
+    the shard ``alias``.
+    """
+    token = _shard.set(alias)
+    try:
+        yield alias
+    finally:
+        _shard.reset(token)
+
+
+def find_shard(model, **lookup):
+    """
+    Shard holding a ``model`` row matching ``lookup``.
+
+    Courses looked up by id, alias or name are found in the directory;
+    anything else is asked of every shard. Returns None when no shard has
+    one, or when the lookup values are not valid for the fields.
+    """
+    if model._meta.label == SHARD_ROOT:
+        keys = {"pk": "pk", model._meta.pk.name: "pk"}
+        keys.update((field, field) for field in DIRECTORY_FIELDS)
+        if set(lookup) <= set(keys):
+            entries = _directory().filter(
+                **{keys[field]: value for field, value in lookup.items()}
+            )
+            try:
+                return entries.values_list("shard", flat=True).first()
+            except (ValueError, ValidationError):
+                return None
+    for alias in shards():
+        try:
+            if model._base_manager.using(alias).filter(**lookup).exists():
+                return alias
+        except (ValueError, ValidationError):
+            return None
+    return None
+
+
+def shard_of(instance):
+    """
+    Shard an instance of a sharded model is, or is to be, stored on.
+    """
+    if instance._state.db in settings.DATABASE_SHARDS:
+        return instance._state.db
+    if instance._meta.label == SHARD_ROOT:
+        return shard_for_institution(getattr(instance, f"{SHARD_KEY}_id"))
+    for field in instance._meta.concrete_fields:
+        if field.is_relation and field.related_model._meta.label == SHARD_ROOT:
+            if field.is_cached(instance):
+                course = field.get_cached_value(instance)
+                if course is not None and course._state.db in settings.DATABASE_SHARDS:
+                    return course._state.db
+            course_id = getattr(instance, field.attname)
+            return current_shard() or find_shard(field.related_model, pk=course_id)
+    return current_shard()
+
+
+def shard_querysets(queryset):
+    """
+    The querysets that together read ``queryset``: one per shard when it
+    reads a sharded model outside of a shard, else ``queryset`` alone.
+    """
+    if (
+        not is_sharded(queryset.model)
+        or queryset._db is not None
+        or current_shard() is not None
+    ):
+        return [queryset]
+    return [queryset.using(alias) for alias in shards()]
+
+
+def partition_by_shard(instances, known=None):
+    """
+    Group unsaved instances of sharded models by the shard they go to.
+
+    Args:
+        instances (iterable): Courses or per-course rows.
+        known (dict): Course id to shard, filled in as courses are placed and
+            used to place per-course rows without asking the shards.
+
+    Returns:
+        dict: Shard alias to the list of its instances.
+    """
+    known = {} if known is None else known
+    groups = {}
+    for instance in instances:
+        if instance._meta.label == SHARD_ROOT:
+            alias = known[instance.pk] = shard_of(instance)
+        else:
+            course_id = next(
+                getattr(instance, field.attname)
+                for field in instance._meta.concrete_fields
+                if field.is_relation and field.related_model._meta.label == SHARD_ROOT
+            )
+            alias = known.get(course_id) or shard_of(instance)
+        groups.setdefault(alias, []).append(instance)
+    return groups
+
+
+def routed_to_shard(locate, required=True):
+    """
+    Decorator running an APIView handler on the shard of the course it is about.
+
+    Args:
+        locate (callable): Called with the request and the URL keyword
+            arguments; returns the shard alias, or None if not found.
+        required (bool): Answer 404 when no shard is found; otherwise the
+            handler runs outside of a shard (and reads every shard).
+    """
+
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            if not is_sharded():
+                return handler(view, request, *args, **kwargs)
+            alias = locate(request, **kwargs)
+            if alias is None and required:
+                raise Http404
+            with using_shard(alias):
+                return handler(view, request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def shard_with(model, **lookups):
+    """
+    Locator for ``routed_to_shard``: the shard of the ``model`` row whose
+    fields match URL keyword arguments, given as ``field="kwarg"``.
+    """
+
+    def locate(request, **kwargs):
+        return find_shard(
+            model, **{field: kwargs[name] for field, name in lookups.items()}
+        )
+
+    return locate
+
+
+def _copy_values(instance):
+    values = {}
+    for field in instance._meta.concrete_fields:
+        value = field.value_from_object(instance)
+        values[field.attname] = value.name if isinstance(value, FieldFile) else value
+    return values
+
+
+def mirror_global(model, instances):
+    """
+    Copy rows of a global model to every shard, in bulk and without signals.
+    """
+    instances = list(instances)
+    if not instances or not is_sharded():
+        return
+    update_fields = [
+        field.name for field in model._meta.concrete_fields if not field.primary_key
+    ]
+    for alias in shards():
+        model._base_manager.using(alias).bulk_create(
+            [model(**_copy_values(instance)) for instance in instances],
+            update_conflicts=True,
+            unique_fields=[model._meta.pk.name],
+            update_fields=update_fields,
+        )
+
+
+def track_global(model):
+    """
+    Keep the copies of a global model on the shards in step with saves and
+    deletes on the global database.
+
+    The copies are written through the ORM so their own signals run on each
+    shard (search reindexing, ``SET NULL`` of the courses of a deleted row).
+    """
+
+    def saved(sender, instance, using, raw=False, **kwargs):
+        if raw or using != GLOBAL_DATABASE or not is_sharded():
+            return
+        values = _copy_values(instance)
+        pk = values.pop(model._meta.pk.attname)
+        for alias in shards():
+            model._base_manager.using(alias).update_or_create(pk=pk, defaults=values)
+
+    def deleted(sender, instance, using, **kwargs):
+        if using != GLOBAL_DATABASE or not is_sharded():
+            return
+        for alias in shards():
+            for copy in model._base_manager.using(alias).filter(pk=instance.pk):
+                copy.delete(using=alias)
+
+    uid = f"sharding:{model._meta.label}"
+    post_save.connect(saved, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(deleted, sender=model, weak=False, dispatch_uid=uid)
+
+
+def _directory():
+    return apps.get_model(DIRECTORY)._base_manager.using(GLOBAL_DATABASE)
+
+
+def record_courses(courses, alias):
+    """
+    Record in the directory that ``courses`` are stored on the shard ``alias``.
+
+    Written with one upsert. Raises ``IntegrityError`` when another course
+    already has one of their aliases or names.
+    """
+    entry = apps.get_model(DIRECTORY)
+    _directory().bulk_create(
+        [
+            entry(
+                pk=course.pk,
+                shard=alias,
+                **{field: getattr(course, field) for field in DIRECTORY_FIELDS},
+            )
+            for course in courses
+        ],
+        update_conflicts=True,
+        unique_fields=[entry._meta.pk.name],
+        update_fields=[*DIRECTORY_FIELDS, "shard"],
+    )
+
+
+@contextmanager
+def claim_directory(instances, alias):
+    """
+    Hold the directory entries of the courses among ``instances`` while they
+    are written to the shard ``alias``.
+
+    The entries are written first, in a transaction of the global database
+    that commits after the body: an alias or name taken on another shard
+    fails before anything is written, and a failed write leaves no entry
+    behind. Does nothing without shards.
+    """
+    courses = [instance for instance in instances if instance._meta.label == SHARD_ROOT]
+    if not courses or not is_sharded() or alias not in settings.DATABASE_SHARDS:
+        yield
+        return
+    with transaction.atomic(using=GLOBAL_DATABASE):
+        record_courses(courses, alias)
+        yield
+
+
+def directory_entries(*fields, **lookup):
+    """
+    ``fields`` of the directory entries matching ``lookup``, as tuples.
+    """
+    return list(_directory().filter(**lookup).values_list(*fields))
+
+
+def directory_holder(field, value):
+    """
+    Id of the course whose ``field`` (``alias`` or ``name``) is ``value`` on
+    any shard, or None.
+    """
+    return _directory().filter(**{field: value}).values_list("pk", flat=True).first()
+
+
+def track_directory(model):
+    """
+    Drop the directory entry of a course deleted from its shard.
+
+    Only the entry naming that shard goes: a course moved to another shard
+    is deleted from the old one after its entry names the new one.
+    """
+
+    def deleted(sender, instance, using, **kwargs):
+        if not is_sharded() or using not in settings.DATABASE_SHARDS:
+            return
+        _directory().filter(pk=instance.pk, shard=using).delete()
+
+    post_delete.connect(
+        deleted, sender=model, weak=False, dispatch_uid=f"directory:{model._meta.label}"
+    )
+
+
+def per_course_models():
+    """
+    Sharded models holding rows of a course, with the name of their foreign key.
+    """
+    course = apps.get_model(SHARD_ROOT)
+    return [
+        (relation.related_model, relation.field.name)
+        for relation in course._meta.related_objects
+        if relation.related_model._meta.managed
+        and relation.related_model._meta.app_label in SHARDED_APPS
+    ]
+
+
+def relocate_course(course, target=None):
+    """
+    Move a course, with its per-course rows, to the shard of its institution.
+
+    The rows are copied to the new shard before they are deleted from the
+    old one, each step in a transaction of its shard: a failure in between
+    leaves the course on both shards rather than on none.
+
+    Returns:
+        bool: Whether the course was moved.
+    """
+    target = target or shard_for_institution(getattr(course, f"{SHARD_KEY}_id"))
+    source = course._state.db
+    if source == target:
+        return False
+    rows = [
+        (model, list(model._base_manager.using(source).filter(**{field: course.pk})))
+        for model, field in per_course_models()
+    ]
+    with transaction.atomic(using=target):
+        course.save(using=target, force_insert=True)
+        for model, objs in rows:
+            model._base_manager.using(target).bulk_create(objs)
+    with transaction.atomic(using=source):
+        type(course)._base_manager.using(source).filter(pk=course.pk).delete()
+    return True
+
+
+def track_shard_key(model):
+    """
+    Move a course to another shard when a save changes its institution.
+    """
+
+    def saved(sender, instance, using, raw=False, **kwargs):
+        if raw or not is_sharded() or using not in settings.DATABASE_SHARDS:
+            return
+        relocate_course(instance)
+
+    post_save.connect(
+        saved, sender=model, weak=False, dispatch_uid=f"sharding:{model._meta.label}"
+    )
+
+
+class ShardRouter:
+    """
+    Send sharded models to their shard: the shard of the instance the
+    query is about when there is one, else the shard of ``using_shard``.
+
+    Other models, and sharded models outside of a shard, are left to the
+    next router. Must come before ``ReplicaRouter``, which sends every
+    write to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not is_sharded(model):
+            return None
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db in settings.DATABASE_SHARDS:
+            return instance._state.db
+        return current_shard()
+
+    def db_for_write(self, model, **hints):
+        if not is_sharded(model):
+            return None
+        instance = hints.get("instance")
+        if instance is not None and is_sharded(type(instance)):
+            return shard_of(instance)
+        return current_shard()
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if not is_sharded():
+            return None
+        # Every shard holds a copy of the global rows.
+        if not is_sharded(type(obj1)) or not is_sharded(type(obj2)):
+            return True
+        return obj1._state.db == obj2._state.db
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Every database gets the whole schema.
+        return None
@@ -0,0 +1,1261 @@
+import base64
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth.models import Group, User
+from django.db import DatabaseError, IntegrityError, connection, connections
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from prometheus_client import REGISTRY
+from rest_framework_simplejwt.tokens import AccessToken
+from course import importer
+from course.importer import import_catalog, parse_catalog
+from course.models import Course, CourseDirectoryEntry
+from institution.models import Institution
+from minerva.authentication import (
+    BloomFilter,
+    CachedBasicAuthentication,
+    ClaimsAccessToken,
+    credential_cache,
+    revocation_list,
+    token_versions,
+)
+from minerva.benchmark import APIBenchmark
+from minerva.cache import response_cache, shared_cache, shared_memo
+from minerva.ids import uuid7, uuid7_time
+from minerva.pagination import KeysetPagination
+from minerva.replicas import PIN_HEADER, ReplicaRouter, lag_guard
+from minerva.sharding import HashRing, shard_for_institution
+from module.models import Module
+from users.models import RevokedToken
+
+
+class ResponseCacheTests(APITestCase):
+    """
+    Test suite for the generation-versioned response cache.
+    """
+
+    def setUp(self):
+        """
+        Set up an authenticated client and a course with one module.
+        """
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword", is_staff=True
+        )
+        credentials = base64.b64encode(b"testuser:testpassword").decode("utf-8")
+        self.client.credentials(HTTP_AUTHORIZATION="Basic " + credentials)
+
+        self.institution = Institution.objects.create(name="Test Institution")
+        self.course = Course.objects.create(
+            name="Test Course", alias="test-course", institution=self.institution
+        )
+        self.module = Module.objects.create(
+            id_course=self.course,
+            name="Module 1",
+            instructional_items=1,
+            assessment_items=1,
+        )
+        response_cache.reset_stats()
+
+    def get_without_catalog_queries(self, url, **extra):
+        """
+        GET ``url`` and assert no catalog table was queried to answer it.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, **extra)
+        for query in queries.captured_queries:
+            self.assertNotIn("course_course", query["sql"])
+            self.assertNotIn("module_module", query["sql"])
+        return response
+
+    def test_repeated_get_is_served_from_cache(self):
+        """
+        Test that a second identical GET hits the cache and keeps its ETag.
+        """
+        url = reverse("course_detail_by_slug", kwargs={"alias": "test-course"})
+        first = self.client.get(url)
+        second = self.get_without_catalog_queries(url)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second["ETag"], first["ETag"])
+
+        response = self.get_without_catalog_queries(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response_cache.stats()["hits"], 2)
+        self.assertEqual(response_cache.stats()["misses"], 1)
+
+    def test_write_invalidates_cached_response(self):
+        """
+        Test that an update through the API is visible on the next GET.
+        """
+        url = reverse("course_detail_by_id", kwargs={"id": self.course.id})
+        self.client.get(url)
+        self.client.put(url, {"name": "Renamed Course"}, format="json")
+        response = self.client.get(url)
+        self.assertEqual(response.data["name"], "Renamed Course")
+
+    def test_bump_by_another_worker_invalidates_cached_response(self):
+        """
+        Test that the generations are read from the shared cache, so a bump
+        made by another process is seen by this one.
+        """
+        url = reverse("course_detail_by_slug", kwargs={"alias": "test-course"})
+        self.client.get(url)
+        Course.objects.filter(pk=self.course.pk).update(name="Renamed Course")
+        # What another worker handling the write does to the shared cache.
+        shared_cache.incr(response_cache.generation_key("course"))
+        # Once this process no longer remembers the generation.
+        shared_memo.clear()
+        response = self.client.get(url)
+        self.assertEqual(response.data["name"], "Renamed Course")
+
+    def test_generations_remembered_by_the_process(self):
+        """
+        Test that generations are read from the shared cache once per memo
+        timeout, except after a bump made by this process.
+        """
+        key = response_cache.generation_key("course")
+        shared_memo.clear()
+        with mock.patch.object(shared_memo, "timeout", 60), mock.patch.object(
+            shared_cache, "get_many", wraps=shared_cache.get_many
+        ) as get_many:
+            first = response_cache.generations(["course"])
+            self.assertEqual(response_cache.generations(["course"]), first)
+            self.assertEqual(get_many.call_count, 1)
+            shared_cache.incr(key)
+            self.assertEqual(response_cache.generations(["course"]), first)
+            response_cache.bump("course")
+            self.assertEqual(
+                response_cache.generations(["course"]), [shared_cache.get(key)]
+            )
+
+    def test_write_only_bumps_affected_namespaces(self):
+        """
+        Test that saving an institution leaves module responses cached.
+        """
+        before = response_cache.generations(["institution", "module", "course"])
+        self.institution.name = "Renamed Institution"
+        self.institution.save()
+        after = response_cache.generations(["institution", "module", "course"])
+        self.assertNotEqual(before[0], after[0])
+        self.assertEqual(before[1:], after[1:])
+
+    def test_module_delete_invalidates_renumbered_modules(self):
+        """
+        Test that renumbering siblings on delete invalidates module lists.
+        """
+        second = Module.objects.create(
+            id_course=self.course,
+            name="Module 2",
+            instructional_items=1,
+            assessment_items=1,
+        )
+        url = reverse("module_list") + f"?course_id={self.course.id}"
+        self.client.get(url)
+        Module.objects.get(id=self.module.id).delete()
+        response = self.client.get(url)
+        self.assertEqual(
+            [(module["id"], module["order"]) for module in response.data["results"]],
+            [(str(second.id), 1)],
+        )
+
+    def test_cache_stats_requires_staff(self):
+        """
+        Test that the statistics endpoint is restricted to staff users.
+        """
+        response = self.client.get(reverse("cache_stats"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("hit_ratio", response.data)
+        self.assertIn("course", response.data["generations"])
+
+        self.user.is_staff = False
+        self.user.save()
+        response = self.client.get(reverse("cache_stats"))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class CachedBasicAuthenticationTests(APITestCase):
+    """
+    Test suite for the credential verification cache.
+    """
+
+    def setUp(self):
+        """
+        Set up a user and an empty credential cache.
+        """
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="testuser", password="testpassword"
+        )
+        self.url = reverse("course_list_create")
+        credential_cache.clear()
+
+    def get(self, password):
+        credentials = base64.b64encode(f"testuser:{password}".encode()).decode()
+        return self.client.get(self.url, HTTP_AUTHORIZATION="Basic " + credentials)
+
+    def test_repeated_credentials_skip_the_hasher(self):
+        """
+        Test that only the first request with the same credentials checks the password.
+        """
+        with mock.patch.object(
+            User, "check_password", autospec=True, side_effect=User.check_password
+        ) as check_password:
+            self.assertEqual(self.get("testpassword").status_code, status.HTTP_200_OK)
+            self.assertEqual(self.get("testpassword").status_code, status.HTTP_200_OK)
+            self.assertEqual(
+                self.get("wrong").status_code, status.HTTP_401_UNAUTHORIZED
+            )
+        self.assertEqual(check_password.call_count, 2)
+
+    def test_password_change_invalidates_cached_credentials(self):
+        """
+        Test that the old password stops working as soon as it is changed.
+        """
+        self.assertEqual(self.get("testpassword").status_code, status.HTTP_200_OK)
+        self.user.set_password("newpassword")
+        self.user.save()
+        self.assertEqual(
+            self.get("testpassword").status_code, status.HTTP_401_UNAUTHORIZED
+        )
+        self.assertEqual(self.get("newpassword").status_code, status.HTTP_200_OK)
+
+        # Another process only sees the new hash in the database.
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(
+            self.get("newpassword").status_code, status.HTTP_401_UNAUTHORIZED
+        )
+
+    def test_jwt_authentication(self):
+        """
+        Test that a plain JWT access token is accepted as a bearer token.
+        """
+        token = AccessToken.for_user(self.user)
+        response = self.client.get(self.url, HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class ClaimsJWTAuthenticationTests(APITestCase):
+    """
+    Test suite for stateless JWT authentication from token claims.
+    """
+
+    def setUp(self):
+        """
+        Set up a staff user and a claims token for it.
+        """
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="staff", email="staff@example.com", is_staff=True
+        )
+        self.token = ClaimsAccessToken.for_user(self.user)
+        self.url = reverse("cache_stats")
+
+    def get(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                self.url, HTTP_AUTHORIZATION=f"Bearer {self.token}"
+            )
+        user_queries = [
+            query for query in queries.captured_queries if "auth_user" in query["sql"]
+        ]
+        return response, user_queries
+
+    def test_token_carries_claims(self):
+        """
+        Test that the token embeds the user fields the views need.
+        """
+        self.assertEqual(self.token["email"], "staff@example.com")
+        self.assertEqual(self.token["username"], "staff")
+        self.assertTrue(self.token["is_staff"])
+        self.assertIn("ver", self.token)
+
+    def test_request_user_built_without_queries(self):
+        """
+        Test that a current token authenticates a staff user with no user query.
+        """
+        response, user_queries = self.get()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(user_queries, [])
+
+    def test_permission_change_forces_refetch(self):
+        """
+        Test that older tokens are checked against the database after a change.
+        """
+        self.user.is_staff = False
+        self.user.save()
+        response, user_queries = self.get()
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertNotEqual(user_queries, [])
+
+        self.token = ClaimsAccessToken.for_user(self.user)
+        response, user_queries = self.get()
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(user_queries, [])
+
+    def test_change_in_another_worker_forces_refetch(self):
+        """
+        Test that a version bumped by another process invalidates the claims.
+        """
+        User.objects.filter(pk=self.user.pk).update(is_staff=False)
+        # What the worker that saved the user does to the shared cache.
+        shared_cache.incr(token_versions.key(self.user.pk))
+        # Once this process no longer remembers the version.
+        shared_memo.clear()
+        response, user_queries = self.get()
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertNotEqual(user_queries, [])
+
+    def test_group_change_forces_refetch(self):
+        """
+        Test that adding the user to a group invalidates the token claims.
+        """
+        Group.objects.create(name="editors").user_set.add(self.user)
+        response, user_queries = self.get()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(user_queries, [])
+
+
+class TokenRevocationTests(APITestCase):
+    """
+    Test suite for revoking JWTs on logout.
+    """
+
+    def setUp(self):
+        """
+        Set up a staff user, a claims token for it and an empty revocation list.
+        """
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="staff", email="staff@example.com", is_staff=True
+        )
+        self.token = ClaimsAccessToken.for_user(self.user)
+        self.url = reverse("cache_stats")
+        revocation_list.clear()
+        shared_cache.delete(revocation_list.prune_key)
+
+    def get(self, token=None):
+        return self.client.get(
+            self.url, HTTP_AUTHORIZATION=f"Bearer {token or self.token}"
+        )
+
+    def test_logout_revokes_token(self):
+        """
+        Test that a token used to log out is rejected afterwards.
+        """
+        self.assertEqual(self.get().status_code, status.HTTP_200_OK)
+        response = self.client.post(
+            reverse("logout"), HTTP_AUTHORIZATION=f"Bearer {self.token}"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self.get().status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.post(reverse("token-verify"), {"token": str(self.token)})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        other = ClaimsAccessToken.for_user(self.user)
+        self.assertEqual(self.get(other).status_code, status.HTTP_200_OK)
+
+    def test_valid_token_checked_without_queries(self):
+        """
+        Test that a token that was not revoked is checked without any query.
+        """
+        self.get()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.get().status_code, status.HTTP_200_OK)
+        self.assertEqual(queries.captured_queries, [])
+
+    def test_revocation_by_other_process_applies_after_refresh(self):
+        """
+        Test that rows written elsewhere are picked up by the next refresh.
+        """
+        self.assertEqual(self.get().status_code, status.HTTP_200_OK)
+        RevokedToken.objects.create(
+            jti=self.token["jti"], expires_at=timezone.now() + timedelta(hours=1)
+        )
+        revocation_list._refresh_at = 0
+        self.assertEqual(self.get().status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_expired_revocations_pruned(self):
+        """
+        Test that revocations past the token expiry are deleted on rebuild.
+        """
+        RevokedToken.objects.create(
+            jti="expired", expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        RevokedToken.objects.create(
+            jti="current", expires_at=timezone.now() + timedelta(hours=1)
+        )
+        self.get()
+        self.assertEqual(
+            list(RevokedToken.objects.values_list("jti", flat=True)), ["current"]
+        )
+
+    def test_prune_runs_once_across_processes(self):
+        """
+        Test that no rows are pruned while another process holds the lock.
+        """
+        # What the process that pruned last leaves in the shared cache.
+        shared_cache.add(revocation_list.prune_key, True)
+        RevokedToken.objects.create(
+            jti="expired", expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.get()
+        self.assertTrue(RevokedToken.objects.filter(jti="expired").exists())
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        """
+        Test that added items are always found and few others are.
+        """
+        bloom = BloomFilter(1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"in-{i}")
+        self.assertTrue(all(f"in-{i}" in bloom for i in range(1000)))
+        false_positives = sum(f"out-{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+class RequestTimingMiddlewareTests(APITestCase):
+    """
+    Test suite for per-request timing and slow request logging.
+    """
+
+    def setUp(self):
+        """
+        Set up an authenticated client and a few courses to list.
+        """
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="timing", password="pw")
+        self.client.force_authenticate(user=self.user)
+        institution = Institution.objects.create(name="Test Institution")
+        for i in range(3):
+            Course.objects.create(
+                name=f"Course {i}", alias=f"course-{i}", institution=institution
+            )
+        self.url = reverse("course_list_create")
+
+    def timings(self, response):
+        return {
+            part.split(";")[0].strip(): part
+            for part in response["Server-Timing"].split(",")
+        }
+
+    def test_server_timing_header(self):
+        """
+        Test that responses carry db, serializer, view and total timings.
+        """
+        response_cache.bump("course")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        timings = self.timings(response)
+        self.assertEqual(set(timings), {"db", "serialize", "view", "total"})
+        self.assertIn(f'desc="{len(queries)} queries"', timings["db"])
+
+    @override_settings(REQUEST_TIMING_SLOW_MS=0, REQUEST_TIMING_TOP_QUERIES=2)
+    def test_slow_request_logged_with_slowest_queries(self):
+        """
+        Test that requests over the threshold are logged with their top SQL.
+        """
+        response_cache.bump("course")
+        with self.assertLogs("minerva.requests", "WARNING") as logs:
+            self.client.get(self.url)
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record["path"], self.url)
+        self.assertEqual(record["status"], 200)
+        self.assertGreater(record["queries"], 0)
+        self.assertEqual(len(record["slowest_queries"]), min(2, record["queries"]))
+        durations = [query["ms"] for query in record["slowest_queries"]]
+        self.assertEqual(durations, sorted(durations, reverse=True))
+
+    def test_fast_request_not_logged(self):
+        """
+        Test that nothing is logged below the threshold.
+        """
+        with self.assertNoLogs("minerva.requests"):
+            self.client.get(self.url)
+
+
+class MetricsTests(APITestCase):
+    """
+    Test suite for the Prometheus metrics endpoint.
+    """
+
+    def setUp(self):
+        """
+        Set up a staff user authenticating with Basic credentials.
+        """
+        self.client = APIClient()
+        User.objects.create_user(username="metrics", password="pw", is_staff=True)
+        credentials = base64.b64encode(b"metrics:pw").decode("utf-8")
+        self.client.credentials(HTTP_AUTHORIZATION="Basic " + credentials)
+
+    def sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_requests_recorded_by_url_name(self):
+        """
+        Test that requests, latency, queries and auth time are recorded.
+        """
+        labels = {"view": "cache_stats", "method": "GET"}
+        before = {
+            "requests": self.sample(
+                "minerva_http_requests_total", status="200", **labels
+            ),
+            "latency": self.sample(
+                "minerva_http_request_duration_seconds_count", **labels
+            ),
+            "auth": self.sample("minerva_auth_duration_seconds_count"),
+        }
+        self.client.get(reverse("cache_stats"))
+        self.client.get(reverse("cache_stats"))
+        self.assertEqual(
+            self.sample("minerva_http_requests_total", status="200", **labels),
+            before["requests"] + 2,
+        )
+        self.assertEqual(
+            self.sample("minerva_http_request_duration_seconds_count", **labels),
+            before["latency"] + 2,
+        )
+        self.assertGreaterEqual(
+            self.sample("minerva_auth_duration_seconds_count"), before["auth"] + 2
+        )
+        self.assertGreater(
+            self.sample("minerva_db_queries_per_request_count", view="cache_stats"), 0
+        )
+
+    def test_unresolved_paths_share_one_label(self):
+        """
+        Test that unknown paths do not create a series each.
+        """
+        self.client.get("/no/such/path/")
+        self.assertGreater(
+            self.sample(
+                "minerva_http_requests_total",
+                view="<unresolved>",
+                method="GET",
+                status="404",
+            ),
+            0,
+        )
+
+    def test_cache_lookups_counted(self):
+        """
+        Test that credential cache hits and misses are counted.
+        """
+        hits = self.sample(
+            "minerva_cache_lookups_total", cache="credentials", result="hit"
+        )
+        credential_cache.clear()
+        self.client.get(reverse("cache_stats"))
+        self.client.get(reverse("cache_stats"))
+        self.assertEqual(
+            self.sample(
+                "minerva_cache_lookups_total", cache="credentials", result="hit"
+            ),
+            hits + 1,
+        )
+
+    def test_exposition_format(self):
+        """
+        Test that /metrics serves the text exposition format to an allowed
+        scraper address without auth.
+        """
+        self.client.credentials()
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        self.assertIn(
+            b"# TYPE minerva_http_request_duration_seconds histogram",
+            response.content,
+        )
+
+    def test_exposition_restricted(self):
+        """
+        Test that /metrics is refused to other addresses unless the user is staff.
+        """
+        self.client.credentials()
+        response = self.client.get(reverse("metrics"), REMOTE_ADDR="203.0.113.7")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        with self.settings(METRICS_ALLOWED_NETWORKS=["203.0.113.0/24"]):
+            response = self.client.get(reverse("metrics"), REMOTE_ADDR="203.0.113.7")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.force_login(User.objects.get(username="metrics"))
+        response = self.client.get(reverse("metrics"), REMOTE_ADDR="203.0.113.7")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_multiprocess_metrics_aggregated(self):
+        """
+        Test that samples written by several worker processes are summed.
+        """
+        worker = (
+            "from minerva import metrics; "
+            "metrics.REQUESTS.labels('course_list_create', 'GET', 200).inc(3)"
+        )
+        with tempfile.TemporaryDirectory() as path:
+            env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": path}
+            for _ in range(2):
+                subprocess.run([sys.executable, "-c", worker], env=env, check=True)
+            with mock.patch.dict(os.environ, {"PROMETHEUS_MULTIPROC_DIR": path}):
+                response = self.client.get(reverse("metrics"))
+        self.assertIn(
+            b'minerva_http_requests_total{method="GET",status="200",'
+            b'view="course_list_create"} 6.0',
+            response.content,
+        )
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRouterTests(APITestCase):
+    """
+    Test suite for routing catalog reads to a replica with read-your-writes.
+
+    A second SQLite database stands in for the replica; it never receives
+    the writes made on the primary, like a replica that has not caught up.
+    """
+
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        """
+        Set up a staff client, one institution on each database and a clean
+        response cache and lag guard.
+        """
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="staff", is_staff=True)
+        self.client.force_authenticate(user=self.user)
+        Institution.objects.create(name="Primary")
+        Institution.objects.using("replica").create(name="Replica")
+        self.url = reverse("institution_list_create")
+        cache.clear()
+        shared_cache.clear()
+        lag_guard.reset()
+        self.addCleanup(lag_guard.reset)
+
+    def names(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {item["name"] for item in response.data["results"]}
+
+    def test_reads_served_by_replica(self):
+        """
+        Test that GET requests read the catalog from the replica.
+        """
+        self.assertEqual(self.names(self.client.get(self.url)), {"Replica"})
+
+    def test_writer_pinned_to_primary(self):
+        """
+        Test that a client reads its own write after writing, other clients
+        keep reading the replica, and the pin also works as a header.
+        """
+        response = self.client.post(
+            self.url, {"name": "New", "image": "new.png", "icon": "new-icon.png"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn(PIN_HEADER, response)
+        self.assertEqual(self.names(self.client.get(self.url)), {"Primary", "New"})
+
+        # The writer's fresh response is cached and may be served to anyone;
+        # bump the generation so the next reads are not served from it.
+        response_cache.bump("institution")
+        other = APIClient()
+        other.force_authenticate(user=self.user)
+        self.assertEqual(self.names(other.get(self.url)), {"Replica"})
+        response = other.get(self.url, HTTP_X_PRIMARY_UNTIL=response[PIN_HEADER])
+        self.assertEqual(self.names(response), {"Primary", "New"})
+
+    def test_expired_or_forged_pin_ignored(self):
+        """
+        Test that pins in the past or beyond one window are ignored.
+        """
+        for until in ("1", "99999999999", "soon"):
+            response = self.client.get(self.url, HTTP_X_PRIMARY_UNTIL=until)
+            self.assertEqual(self.names(response), {"Replica"})
+
+    def test_lagging_replica_skipped(self):
+        """
+        Test that reads go to the primary while the replica lags too much.
+        """
+        with mock.patch.object(lag_guard, "measure", return_value=60.0):
+            self.assertEqual(self.names(self.client.get(self.url)), {"Primary"})
+
+    def test_replica_response_not_cached_after_write(self):
+        """
+        Test that a replica read right after a write is not cached.
+        """
+        Institution.objects.create(name="Second")
+        self.assertEqual(self.names(self.client.get(self.url)), {"Replica"})
+        lag_guard.reset()
+        with mock.patch.object(lag_guard, "measure", return_value=60.0):
+            self.assertEqual(
+                self.names(self.client.get(self.url)), {"Primary", "Second"}
+            )
+
+    def test_write_by_another_worker_stops_caching_replica_reads(self):
+        """
+        Test that a recent bump recorded by another process in the shared
+        cache also keeps replica reads out of this process's cache.
+        """
+        shared_cache.set(f"{response_cache.recent_prefix}:institution", True)
+        self.assertEqual(self.names(self.client.get(self.url)), {"Replica"})
+        lag_guard.reset()
+        with mock.patch.object(lag_guard, "measure", return_value=60.0):
+            self.assertEqual(self.names(self.client.get(self.url)), {"Primary"})
+
+    def test_router_keeps_other_apps_and_writes_on_primary(self):
+        """
+        Test that only catalog reads are routed and writes stay on the primary.
+        """
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_write(Institution), "default")
+        self.assertIsNone(router.db_for_read(Institution))
+        self.assertFalse(router.allow_migrate("replica", "course"))
+        self.assertEqual(User.objects.count(), 1)
+
+
+@override_settings(DATABASE_SHARDS=["shard_a", "shard_b"])
+class ShardingTests(APITestCase):
+    """
+    Test suite for sharding courses and modules by institution.
+
+    Two more SQLite databases stand in for the shards; institutions and
+    categories are written to the default database.
+    """
+
+    databases = {"default", "shard_a", "shard_b"}
+
+    def setUp(self):
+        """
+        Set up a staff client and one institution hashing to each shard.
+        """
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="staff", is_staff=True)
+        self.client.force_authenticate(user=self.user)
+        self.institutions = {}
+        index = 0
+        while len(self.institutions) < 2:
+            institution = Institution.objects.create(
+                name=f"Institution {index}", image="i.png", icon="i-icon.png"
+            )
+            self.institutions.setdefault(
+                shard_for_institution(institution.pk), institution
+            )
+            index += 1
+        cache.clear()
+
+    def create_course(self, alias, shard):
+        response = self.client.post(
+            reverse("course_list_create"),
+            {
+                "name": f"Course {alias}",
+                "alias": alias,
+                "institution": str(self.institutions[shard].pk),
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data["id"]
+
+    def module_data(self, course_id, name):
+        return {
+            "id_course": course_id,
+            "name": name,
+            "instructional_items": 1,
+            "assessment_items": 1,
+        }
+
+    def test_hash_ring_moves_few_keys(self):
+        """
+        Test that adding a shard only moves keys to the new shard.
+        """
+        keys = [str(index) for index in range(2000)]
+        before = HashRing(["a", "b"])
+        after = HashRing(["a", "b", "c"])
+        moved = [key for key in keys if before.node(key) != after.node(key)]
+        self.assertTrue(all(after.node(key) == "c" for key in moved))
+        self.assertLess(len(moved), len(keys) / 2)
+        self.assertEqual(
+            [before.node(key) for key in keys],
+            [HashRing(["a", "b"]).node(key) for key in keys],
+        )
+
+    def test_global_rows_copied_to_shards(self):
+        """
+        Test that institutions stay on the default database and are copied
+        to every shard, renames and deletes included.
+        """
+        institution = self.institutions["shard_a"]
+        institution.name = "Renamed"
+        institution.save()
+        for alias in ("shard_a", "shard_b"):
+            copy = Institution.objects.using(alias).get(pk=institution.pk)
+            self.assertEqual(copy.name, "Renamed")
+        institution.delete()
+        for alias in ("shard_a", "shard_b"):
+            self.assertFalse(
+                Institution.objects.using(alias).filter(pk=institution.pk).exists()
+            )
+
+    def test_course_and_modules_on_institution_shard(self):
+        """
+        Test that a course and its modules are written to the shard of the
+        institution and read back from it.
+        """
+        course_id = self.create_course("alpha", "shard_a")
+        response = self.client.post(
+            reverse("module_list"), self.module_data(course_id, "Intro")
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        module_id = response.data["id"]
+
+        self.assertTrue(Course.objects.using("shard_a").filter(pk=course_id).exists())
+        self.assertEqual(Module.objects.using("shard_a").get(pk=module_id).order, 1)
+        for alias in ("default", "shard_b"):
+            self.assertFalse(Course.objects.using(alias).exists())
+            self.assertFalse(Module.objects.using(alias).exists())
+
+        response = self.client.get(
+            reverse("course_detail_by_slug", kwargs={"alias": "alpha"}),
+            {"expand": "institution"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["institution"]["name"], self.institutions["shard_a"].name
+        )
+        response = self.client.get(reverse("module_detail", kwargs={"id": module_id}))
+        self.assertEqual(response.data["order"], 1)
+        response = self.client.get(
+            reverse("course_syllabus", kwargs={"alias": "alpha"})
+        )
+        self.assertEqual([module["id"] for module in response.data], [module_id])
+        response = self.client.get(
+            reverse("course_detail_by_slug", kwargs={"alias": "missing"})
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_merges_shards(self):
+        """
+        Test that the course list pages through every shard in one order.
+        """
+        aliases = ["a1", "b1", "a2", "b2", "a3"]
+        for alias in aliases:
+            self.create_course(alias, "shard_a" if alias[0] == "a" else "shard_b")
+        self.assertEqual(Course.objects.using("shard_a").count(), 3)
+        self.assertEqual(Course.objects.using("shard_b").count(), 2)
+
+        names, url = [], reverse("course_list_create")
+        params = {"ordering": "name", "page_size": 2}
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            names += [course["name"] for course in response.data["results"]]
+            url, params = response.data["next"], None
+        self.assertEqual(names, sorted(f"Course {alias}" for alias in aliases))
+
+        response = self.client.get(
+            reverse("course_list_create"),
+            {"institution": str(self.institutions["shard_b"].pk)},
+        )
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_list_merge_sorts_text_by_code_point(self):
+        """
+        Test that merged pages sort text keys on the code point collation,
+        in the order the merge compares them.
+        """
+        for alias, shard in (("b1", "shard_b"), ("a1", "shard_a"), ("b2", "shard_b")):
+            self.create_course(alias, shard)
+        Course.objects.using("shard_b").filter(alias="b1").update(name="apple")
+        Course.objects.using("shard_a").filter(alias="a1").update(name="Banana")
+        Course.objects.using("shard_b").filter(alias="b2").update(name="Cherry")
+        cache.clear()
+
+        names, url = [], reverse("course_list_create")
+        params = {"ordering": "name", "page_size": 1}
+        with mock.patch.object(
+            KeysetPagination, "merge_collations", {"sqlite": "BINARY"}
+        ), CaptureQueriesContext(connections["shard_a"]) as queries:
+            while url:
+                response = self.client.get(url, params)
+                names += [course["name"] for course in response.data["results"]]
+                url, params = response.data["next"], None
+        self.assertEqual(names, ["Banana", "Cherry", "apple"])
+        self.assertTrue(
+            any('COLLATE "BINARY"' in query["sql"] for query in queries.captured_queries)
+        )
+
+    def test_institution_change_moves_course(self):
+        """
+        Test that moving a course to an institution of another shard moves
+        its modules with it.
+        """
+        course_id = self.create_course("alpha", "shard_a")
+        self.client.post(reverse("module_list"), self.module_data(course_id, "M"))
+        response = self.client.put(
+            reverse("course_detail_by_id", kwargs={"id": course_id}),
+            {"institution": str(self.institutions["shard_b"].pk)},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(Course.objects.using("shard_a").exists())
+        self.assertFalse(Module.objects.using("shard_a").exists())
+        self.assertEqual(
+            Module.objects.using("shard_b").get().id_course_id,
+            Course.objects.using("shard_b").get().pk,
+        )
+        response = self.client.get(
+            reverse("course_detail_by_id", kwargs={"id": course_id})
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_alias_and_name_unique_across_shards(self):
+        """
+        Test that a course cannot take the alias or the name of a course on
+        another shard.
+        """
+        self.create_course("alpha", "shard_a")
+        institution = str(self.institutions["shard_b"].pk)
+        for field, data in (
+            ("alias", {"name": "Other", "alias": "alpha"}),
+            ("name", {"name": "Course alpha", "alias": "other"}),
+        ):
+            response = self.client.post(
+                reverse("course_list_create"), {**data, "institution": institution}
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response.data[field][0].code, "unique")
+        self.assertFalse(Course.objects.using("shard_b").exists())
+        with self.assertRaises(IntegrityError):
+            Course.objects.using("shard_b").create(name="Other", alias="alpha")
+        self.assertFalse(Course.objects.using("shard_b").exists())
+
+    def test_slug_lookup_reads_the_directory(self):
+        """
+        Test that a course is found by alias without asking the other shards.
+        """
+        self.create_course("alpha", "shard_b")
+        with CaptureQueriesContext(connections["shard_a"]) as queries:
+            response = self.client.get(
+                reverse("course_detail_by_slug", kwargs={"alias": "alpha"})
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 0)
+
+    def test_directory_follows_moves_and_deletes(self):
+        """
+        Test that the directory names the new shard of a moved course and
+        forgets a deleted one.
+        """
+        course_id = self.create_course("alpha", "shard_a")
+        entry = CourseDirectoryEntry.objects.get()
+        self.assertEqual((str(entry.pk), entry.shard), (course_id, "shard_a"))
+        url = reverse("course_detail_by_id", kwargs={"id": course_id})
+        self.client.put(url, {"institution": str(self.institutions["shard_b"].pk)})
+        self.assertEqual(CourseDirectoryEntry.objects.get().shard, "shard_b")
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(CourseDirectoryEntry.objects.exists())
+
+    def test_benchmark_counts_shard_queries(self):
+        """
+        Test that the API benchmark counts the queries run on the shards.
+        """
+        self.create_course("alpha", "shard_a")
+        result = APIBenchmark(requests=2, warmup=0, cold_cache=True).measure(
+            self.client, reverse("course_list_create")
+        )
+        self.assertEqual(result["status"], [200])
+        self.assertGreaterEqual(result["queries_per_request"], 2)
+
+    def test_catalog_import_writes_to_shards(self):
+        """
+        Test that imported courses land on the shard of their institution,
+        moving the ones whose institution changed.
+        """
+        course_id = self.create_course("alpha", "shard_a")
+        self.client.post(reverse("module_list"), self.module_data(course_id, "M"))
+        module = {"name": "N", "instructional_items": 1, "assessment_items": 1}
+        lines = [
+            json.dumps(course) + "\n"
+            for course in (
+                {
+                    "name": "Course alpha",
+                    "alias": "alpha",
+                    "institution": str(self.institutions["shard_b"].pk),
+                    "course_modules": [module, module],
+                },
+                {
+                    "name": "Course beta",
+                    "alias": "beta",
+                    "institution": str(self.institutions["shard_a"].pk),
+                },
+            )
+        ]
+        response = self.client.post(
+            reverse("catalog_import"),
+            "".join(lines),
+            content_type="application/x-ndjson",
+        )
+        self.assertEqual(
+            response.data, {"created": 1, "updated": 1, "modules": 2, "errors": []}
+        )
+        self.assertEqual(Course.objects.using("shard_a").get().alias, "beta")
+        alpha = Course.objects.using("shard_b").get()
+        self.assertEqual(str(alpha.pk), course_id)
+        self.assertEqual(
+            list(Module.objects.using("shard_b").values_list("name", flat=True)),
+            ["N", "N"],
+        )
+        self.assertFalse(Module.objects.using("shard_a").exists())
+
+    def test_catalog_import_keeps_course_when_move_fails(self):
+        """
+        Test that a course whose move to another shard fails stays, unchanged,
+        on its old shard while the other rows are imported.
+        """
+        course_id = self.create_course("alpha", "shard_a")
+        self.client.post(reverse("module_list"), self.module_data(course_id, "M"))
+        lines = [
+            json.dumps(course) + "\n"
+            for course in (
+                {
+                    "name": "Renamed alpha",
+                    "alias": "alpha",
+                    "institution": str(self.institutions["shard_b"].pk),
+                },
+                {
+                    "name": "Course gamma",
+                    "alias": "gamma",
+                    "institution": str(self.institutions["shard_b"].pk),
+                },
+            )
+        ]
+        write = importer._write
+
+        def failing_write(alias, courses, *args):
+            write(alias, courses, *args)
+            if any(course.alias == "alpha" for course in courses):
+                raise DatabaseError("disk full")
+
+        with mock.patch.object(importer, "_write", side_effect=failing_write):
+            summary = import_catalog(parse_catalog(lines, "ndjson"))
+        self.assertEqual(summary["created"], 1)
+        self.assertEqual([error["alias"] for error in summary["errors"]], ["alpha"])
+        alpha = Course.objects.using("shard_a").get()
+        self.assertEqual(alpha.name, "Course alpha")
+        self.assertEqual(Module.objects.using("shard_a").get().name, "M")
+        self.assertEqual(Course.objects.using("shard_b").get().alias, "gamma")
+        self.assertFalse(Module.objects.using("shard_b").exists())
+        self.assertEqual(
+            dict(CourseDirectoryEntry.objects.values_list("alias", "shard")),
+            {"alpha": "shard_a", "gamma": "shard_b"},
+        )
+
+
+class UUIDv7Tests(APITestCase):
+    """
+    Test suite for the time-ordered UUID generator.
+    """
+
+    def test_layout(self):
+        """
+        Test that the version, variant and timestamp fields are set.
+        """
+        before = time.time()
+        value = uuid7()
+        self.assertEqual(value.version, 7)
+        self.assertEqual(value.variant, uuid.RFC_4122)
+        self.assertAlmostEqual(uuid7_time(value), before, delta=1)
+
+    def test_monotonic_within_a_millisecond(self):
+        """
+        Test that keys sort in generation order, even with a frozen clock.
+        """
+        values = [uuid7() for _ in range(1000)]
+        self.assertEqual(values, sorted(values))
+        with mock.patch("minerva.ids.time.time_ns", return_value=10**18):
+            frozen = [uuid7() for _ in range(5000)]
+        self.assertEqual(frozen, sorted(frozen))
+        self.assertEqual(len(set(frozen)), len(frozen))
+
+
+class BatchTests(APITestCase):
+    """
+    Test suite for the batch endpoint.
+    """
+
+    def setUp(self):
+        """
+        Set up a course with a module and a client using Basic credentials.
+        """
+        self.client = APIClient()
+        User.objects.create_user(username="testuser", password="testpassword")
+        credentials = base64.b64encode(b"testuser:testpassword").decode("utf-8")
+        self.client.credentials(HTTP_AUTHORIZATION="Basic " + credentials)
+        self.course = Course.objects.create(name="Course", alias="course")
+        self.module = Module.objects.create(
+            id_course=self.course,
+            name="Module",
+            instructional_items=1,
+            assessment_items=1,
+        )
+        self.url = reverse("batch")
+        cache.clear()
+
+    def batch(self, operations, **params):
+        url = self.url
+        if params:
+            url += "?" + "&".join(f"{key}={value}" for key, value in params.items())
+        return self.client.post(url, operations, format="json")
+
+    def course_path(self):
+        return reverse("course_detail_by_id", kwargs={"id": self.course.id})
+
+    def module_path(self):
+        return reverse("module_detail", kwargs={"id": self.module.id})
+
+    def test_operations_run_in_order_with_one_authentication(self):
+        """
+        Test that every operation is answered, in order, and that the
+        credentials are only checked for the batch request.
+        """
+        with mock.patch.object(
+            CachedBasicAuthentication,
+            "authenticate",
+            autospec=True,
+            side_effect=CachedBasicAuthentication.authenticate,
+        ) as authenticate:
+            response = self.batch(
+                [
+                    {"method": "put", "path": self.course_path(), "body": {"name": "New"}},
+                    {"method": "PUT", "path": self.module_path(), "body": {"name": "M2"}},
+                    {"method": "GET", "path": self.course_path() + "?fields=name"},
+                ]
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(authenticate.call_count, 1)
+        self.assertEqual([result["status"] for result in response.data], [200] * 3)
+        self.assertEqual(response.data[1]["body"]["name"], "M2")
+        self.assertEqual(response.data[2]["body"], {"name": "New"})
+        self.assertIn("ETag", response.data[2]["headers"])
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.name, "New")
+
+    def test_failed_operations_do_not_stop_the_batch(self):
+        """
+        Test that errors are reported per operation and the others still run.
+        """
+        response = self.batch(
+            [
+                {"method": "GET", "path": "/missing/"},
+                {"method": "PUT", "path": self.module_path(), "body": {"name": ""}},
+                {"method": "GET", "path": "/metrics"},
+                {"method": "POST", "path": self.url, "body": []},
+                {"method": "DELETE", "path": self.course_path()},
+            ]
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [result["status"] for result in response.data], [404, 400, 400, 400, 204]
+        )
+        self.assertIn("name", response.data[1]["body"])
+        self.assertIsNone(response.data[4]["body"])
+        self.assertFalse(Course.objects.exists())
+
+    def test_atomic_batch_rolls_back_on_failure(self):
+        """
+        Test that an atomic batch undoes every write when one operation
+        fails, including responses cached in between.
+        """
+        response = self.batch(
+            [
+                {"method": "PUT", "path": self.course_path(), "body": {"name": "New"}},
+                {"method": "GET", "path": self.course_path()},
+                {"method": "PUT", "path": self.module_path(), "body": {"name": ""}},
+                {"method": "GET", "path": self.module_path()},
+            ],
+            atomic="true",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [result["status"] for result in response.data], [424, 424, 400, 424]
+        )
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.name, "Course")
+        response = self.client.get(self.course_path())
+        self.assertEqual(response.data["name"], "Course")
+
+        response = self.batch(
+            [{"method": "PUT", "path": self.course_path(), "body": {"name": "New"}}],
+            atomic="true",
+        )
+        self.assertEqual(response.data[0]["status"], status.HTTP_200_OK)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.name, "New")
+
+    def test_operation_raising_is_answered_with_500(self):
+        """
+        Test that an exception in one view only fails its own operation, and
+        rolls back an atomic batch like any other failure.
+        """
+        operations = [
+            {"method": "PUT", "path": self.module_path(), "body": {"name": "M2"}},
+            {"method": "PUT", "path": self.course_path(), "body": {"name": "New"}},
+            {"method": "GET", "path": self.module_path()},
+        ]
+        with mock.patch.object(Course, "save", side_effect=IntegrityError("clash")):
+            with self.assertLogs("minerva.batch", "ERROR"):
+                response = self.batch(operations)
+            self.assertEqual(
+                [result["status"] for result in response.data], [200, 500, 200]
+            )
+            self.assertEqual(response.data[2]["body"]["name"], "M2")
+
+            with self.assertLogs("minerva.batch", "ERROR"):
+                response = self.batch(
+                    [{**operations[0], "body": {"name": "M3"}}, *operations[1:]],
+                    atomic="true",
+                )
+        self.assertEqual(
+            [result["status"] for result in response.data], [424, 500, 424]
+        )
+        self.module.refresh_from_db()
+        self.assertEqual(self.module.name, "M2")
+
+    def test_invalid_batches_are_rejected(self):
+        """
+        Test that a malformed or oversized batch runs none of its operations.
+        """
+        valid = {"method": "DELETE", "path": self.course_path()}
+        for operations in (
+            [],
+            {"method": "GET", "path": "/"},
+            [valid, {"method": "TRACE", "path": "/"}],
+            [valid, {"method": "GET", "path": "courses/"}],
+        ):
+            response = self.batch(operations)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        with self.settings(BATCH_MAX_REQUESTS=2):
+            response = self.batch([valid] * 3)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(Course.objects.exists())
+
+    def test_operations_keep_their_permissions(self):
+        """
+        Test that an anonymous batch gets each view's own authentication errors.
+        """
+        self.client.credentials()
+        response = self.batch([{"method": "GET", "path": self.course_path()}])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(
+            response.data[0]["status"],
+            (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN),
+        )
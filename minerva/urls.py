@@ -26,6 +26,7 @@ from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
+from minerva.views import BatchView, CacheStatsView, metrics_view
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -43,4 +44,7 @@ urlpatterns = [
     path("api/redoc/", SpectacularRedocView.as_view(url_name="schema"), name="redoc"),
     path("api/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    path("api/cache/stats/", CacheStatsView.as_view(), name="cache_stats"),
+    path("batch/", BatchView.as_view(), name="batch"),
+    path("metrics", metrics_view, name="metrics"),
 ]
@@ -0,0 +1,87 @@
+from django.http import HttpResponse, HttpResponseForbidden
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from prometheus_client import CONTENT_TYPE_LATEST
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from minerva import metrics
+from minerva.batch import (
+    BatchOperationSerializer,
+    BatchResultSerializer,
+    batch_serializer,
+    run_batch,
+)
+from minerva.cache import CACHE_NAMESPACES, response_cache
+
+
+class CacheStatsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    @extend_schema(
+        request=None,
+        responses={
+            200: {
+                "type": "object",
+                "properties": {
+                    "hits": {"type": "integer"},
+                    "misses": {"type": "integer"},
+                    "hit_ratio": {"type": "number"},
+                    "generations": {"type": "object"},
+                },
+            }
+        },
+    )
+    def get(self, request):
+        """
+        Hit/miss statistics of the response cache for this worker process.
+        """
+        return Response(response_cache.stats(CACHE_NAMESPACES))
+
+
+class BatchView(APIView):
+    """
+    API endpoint running several API calls in one request.
+    """
+
+    # A batch cannot contain another batch.
+    batchable = False
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="atomic",
+                type=OpenApiTypes.BOOL,
+                description="Run every operation in one transaction, rolled back "
+                "if any of them fails.",
+                required=False,
+            )
+        ],
+        request=BatchOperationSerializer(many=True),
+        responses={200: BatchResultSerializer(many=True)},
+    )
+    def post(self, request):
+        """
+        Run a list of ``{method, path, body}`` operations, in order, as the
+        authenticated user, and return their responses in the same order as
+        ``{status, headers, body}``.
+
+        Each operation goes through the view its path resolves to, with its
+        usual permissions and validation; a failed operation does not stop
+        the others unless ``?atomic=true``.
+        """
+        serializer = batch_serializer(request.data)
+        serializer.is_valid(raise_exception=True)
+        atomic = request.query_params.get("atomic", "").lower() in ("1", "true")
+        return Response(run_batch(request, serializer.validated_data, atomic))
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint (see minerva.metrics), for staff users and
+    allowed scraper addresses only.
+    """
+    if not metrics.may_scrape(request):
+        return HttpResponseForbidden()
+    return HttpResponse(metrics.exposition(), content_type=CONTENT_TYPE_LATEST)
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class ModuleConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "module"
+
+    def ready(self):
+        from minerva.cache import track_model
+
+        track_model(self.get_model("Module"), "module")
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:05
+
+from django.db import migrations, models
+
+RANK_STEP = 1 << 16
+
+
+def order_to_rank(apps, schema_editor):
+    """
+    Give every module a gapped rank that preserves its current order.
+    """
+    Module = apps.get_model("module", "Module")
+    modules = Module.objects.using(schema_editor.connection.alias)
+    batch = []
+    course, position = None, 0
+    rows = modules.order_by("id_course_id", "order", "id").only("id", "id_course_id")
+    for module in rows.iterator(chunk_size=1000):
+        if module.id_course_id != course:
+            course, position = module.id_course_id, 0
+        position += 1
+        module.rank = position * RANK_STEP
+        batch.append(module)
+        if len(batch) >= 1000:
+            modules.bulk_update(batch, ["rank"])
+            batch = []
+    modules.bulk_update(batch, ["rank"])
+
+
+def rank_to_order(apps, schema_editor):
+    Module = apps.get_model("module", "Module")
+    modules = Module.objects.using(schema_editor.connection.alias)
+    batch = []
+    course, position = None, 0
+    rows = modules.order_by("id_course_id", "rank").only("id", "id_course_id")
+    for module in rows.iterator(chunk_size=1000):
+        if module.id_course_id != course:
+            course, position = module.id_course_id, 0
+        position += 1
+        module.order = position
+        batch.append(module)
+        if len(batch) >= 1000:
+            modules.bulk_update(batch, ["order"])
+            batch = []
+    modules.bulk_update(batch, ["order"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0003_course_updated_at'),
+        ('module', '0002_module_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='module',
+            name='rank',
+            field=models.BigIntegerField(editable=False, null=True),
+        ),
+        migrations.RemoveConstraint(
+            model_name='module',
+            name='unique_order_per_course',
+        ),
+        migrations.RunPython(order_to_rank, rank_to_order),
+        migrations.RemoveField(
+            model_name='module',
+            name='order',
+        ),
+        migrations.AlterField(
+            model_name='module',
+            name='rank',
+            field=models.BigIntegerField(editable=False),
+        ),
+        migrations.AddConstraint(
+            model_name='module',
+            constraint=models.UniqueConstraint(fields=('id_course', 'rank'), name='unique_rank_per_course'),
+        ),
+    ]
@@ -1,6 +1,177 @@
-import uuid
-from django.db import models
+from django.db import models, router, transaction
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
+from course.models import Course
+from minerva.cache import response_cache
+from minerva.ids import uuid7
+
+# Gap left between the ranks of consecutive modules. A module can be moved
+# between the same two neighbours about 16 times before they run out of room
+# and the course has to be spread out again.
+RANK_STEP = 1 << 16
+
+
+def plan_ranks(ranks):
+    """
+    Ranks for modules listed in their new order, changing as few as possible.
+
+    Args:
+        ranks (list): Current rank of each module in the new order, or None
+            for modules that do not exist yet.
+
+    Returns:
+        list: Strictly increasing ranks. The longest increasing run of the
+        current ranks is kept; the other modules get evenly spaced ranks in
+        the gaps, or the whole list is spread out again if a gap is too small.
+    """
+    result = [None] * len(ranks)
+    for index in _longest_increasing(ranks):
+        result[index] = ranks[index]
+
+    start = 0
+    while start < len(result):
+        if result[start] is not None:
+            start += 1
+            continue
+        end = start
+        while end < len(result) and result[end] is None:
+            end += 1
+        low = result[start - 1] if start else 0
+        high = result[end] if end < len(result) else None
+        if high is None:
+            step = RANK_STEP
+        else:
+            step = (high - low) // (end - start + 1)
+            if step < 1:
+                return [index * RANK_STEP for index in range(1, len(ranks) + 1)]
+        for offset, index in enumerate(range(start, end), start=1):
+            result[index] = low + offset * step
+        start = end
+    return result
+
+
+def _longest_increasing(ranks):
+    """
+    Indexes of the longest strictly increasing subsequence of ``ranks``, skipping None.
+    """
+    best = {}
+    for index, rank in enumerate(ranks):
+        if rank is None:
+            continue
+        previous = max(
+            (best[other] for other in best if ranks[other] < rank),
+            key=len,
+            default=[],
+        )
+        best[index] = previous + [index]
+    return max(best.values(), key=len, default=[])
+
+
+class ModuleQuerySet(models.QuerySet):
+    def with_order(self):
+        """
+        Annotate each module with its 1-based ``order`` within its course.
+
+        Computed with a correlated count over the ``(id_course, rank)`` index,
+        so it stays correct however the queryset is filtered.
+        """
+        earlier = (
+            Module.objects.filter(
+                id_course_id=OuterRef("id_course_id"), rank__lte=OuterRef("rank")
+            )
+            .order_by()
+            .values("id_course_id")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        return self.annotate(order=Subquery(earlier))
+
+    def replace_syllabus(self, course_id, items):
+        """
+        Make the modules of a course match ``items``, in that order.
+
+        Modules missing from ``items`` are deleted, items with an ``id`` update
+        that module and items without one are created. Only rows whose fields
+        or rank actually change are written, with one statement per kind of
+        change, so the number of queries does not depend on the module count:
+        counter UPDATE, module SELECT, then as needed the DELETE (two
+        statements), the rank placeholder UPDATE, the bulk UPDATE and the bulk
+        INSERT.
+
+        Args:
+            course_id (uuid): Course whose syllabus is replaced.
+            items (list): Dicts of module fields, optionally with ``id``.
+
+        Returns:
+            list: The modules of the course, in order, with ``order`` set.
+
+        Raises:
+            Module.DoesNotExist: If an ``id`` is not a module of the course.
+        """
+        fields = ["name", "description", "instructional_items", "assessment_items"]
+        with transaction.atomic(using=router.db_for_write(self.model)):
+            now = timezone.now()
+            # Written first: takes the course row lock, like Module.save.
+            Course.objects.filter(pk=course_id).update(
+                modules=len(items), updated_at=now
+            )
+            current = {
+                module.pk: module for module in Module.objects.filter(id_course_id=course_id)
+            }
+            missing = {item["id"] for item in items if "id" in item} - set(current)
+            if missing:
+                raise Module.DoesNotExist(
+                    f"Not modules of this course: {', '.join(map(str, missing))}."
+                )
+
+            modules = [
+                current.get(item.get("id")) or Module(id_course_id=course_id)
+                for item in items
+            ]
+            ranks = plan_ranks([module.rank for module in modules])
+            kept = {module.pk for module in modules if module.rank is not None}
+            Module.objects.filter(pk__in=set(current) - kept).delete()
+
+            changed, created = [], []
+            for order, (module, item, rank) in enumerate(
+                zip(modules, items, ranks), start=1
+            ):
+                module.order = order
+                if module.rank is None:
+                    module.rank = rank
+                    module.updated_at = now
+                    for field in fields:
+                        setattr(module, field, item.get(field))
+                    created.append(module)
+                    continue
+                dirty = module.rank != rank
+                for field in fields:
+                    if field in item and getattr(module, field) != item[field]:
+                        setattr(module, field, item[field])
+                        dirty = True
+                if dirty:
+                    module.updated_at = now
+                    changed.append((module, rank))
+
+            moved = [module for module, rank in changed if module.rank != rank]
+            if moved:
+                # Park moved rows on ranks no real module uses (<= 0), so the
+                # unique (id_course, rank) constraint holds row by row.
+                for index, module in enumerate(moved, start=1):
+                    module.rank = -index
+                Module.objects.bulk_update(moved, ["rank"])
+            for module, rank in changed:
+                module.rank = rank
+            Module.objects.bulk_update(
+                [module for module, _ in changed], [*fields, "rank", "updated_at"]
+            )
+            Module.objects.bulk_create(created)
+        # Bulk writes send no signals.
+        response_cache.bump("course")
+        response_cache.bump("module")
+        return modules
 
 
 class Module(models.Model):
@@ -8,61 +179,183 @@ class Module(models.Model):
     Model for Modules
 
     Attributes:
-        id (uuid): Unique identifier for the module
+        id (uuid): Unique, time-ordered (UUIDv7) identifier for the module
         id_course (uuid): Foreign key to the associated course
         name (str): Name of the module
         description (str): Description of the module
-        order (int): The order in which the module appears in the course (automatically assigned)
+        rank (int): Sparse sort key of the module within the course (automatically assigned)
+        order (int): The order in which the module appears in the course, computed from rank
         instructional_items (int): Number of instructional elements in the module
         assessment_items (int): Number of assessment elements in the module
+        updated_at (datetime): Timestamp of the last update, used as cache validator
     """
 
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     id_course = models.ForeignKey(
         "course.Course", on_delete=models.CASCADE, related_name="course_modules"
     )
     name = models.CharField(max_length=64)
     description = models.TextField(max_length=512, blank=True, null=True)
-    order = models.IntegerField(default=0, null=True, blank=True)
+    rank = models.BigIntegerField(editable=False)
     instructional_items = models.PositiveIntegerField(
         validators=[MinValueValidator(1), MaxValueValidator(64)]
     )
     assessment_items = models.PositiveIntegerField(
         validators=[MinValueValidator(1), MaxValueValidator(64)]
     )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = ModuleQuerySet.as_manager()
+
+    _order = None
 
     class Meta:
         constraints = [
             models.UniqueConstraint(
-                fields=["id_course", "order"], name="unique_order_per_course"
+                fields=["id_course", "rank"], name="unique_rank_per_course"
             )
         ]
 
+    @property
+    def order(self):
+        """
+        1-based position of the module in its course.
+
+        Set by ``Module.objects.with_order()``; otherwise counted on first access.
+        """
+        if self._order is None:
+            siblings = Module.objects.db_manager(hints={"instance": self})
+            self._order = siblings.filter(
+                id_course_id=self.id_course_id, rank__lte=self.rank
+            ).count()
+        return self._order
+
+    @order.setter
+    def order(self, value):
+        self._order = value
+
+    def refresh_from_db(self, *args, **kwargs):
+        self._order = None
+        super().refresh_from_db(*args, **kwargs)
+
     def save(self, *args, **kwargs):
         """
-        Assigns 'order' and updates the module count for the course.
+        Assigns 'rank' at the end of the course and updates the module count.
 
-        Necessary to keep the module order consistent and update the course's module count.
+        The course counter is incremented with a single ``UPDATE ... SET
+        modules = modules + 1`` before anything is read. That statement takes
+        the course row lock, so concurrent creates for the same course are
+        serialized until the transaction commits and each one sees the rank
+        written by the previous one. Creating a module costs three statements
+        (counter UPDATE, rank SELECT, INSERT) inside one transaction.
         """
-        if not self.order:
-            self.order = self.id_course.modules + 1
+        if self.rank is not None:
+            return super().save(*args, **kwargs)
+
+        try:
+            using = kwargs.get("using") or router.db_for_write(Module, instance=self)
+            with transaction.atomic(using=using):
+                Course.objects.filter(pk=self.id_course_id).update(
+                    modules=Coalesce("modules", 0) + 1, updated_at=timezone.now()
+                )
+                last = Module.objects.filter(id_course_id=self.id_course_id).aggregate(
+                    rank=Max("rank"), count=Count("pk")
+                )
+                self.rank = (last["rank"] or 0) + RANK_STEP
+                self._order = last["count"] + 1
+                super().save(*args, **kwargs)
+        except Exception:
+            # Rolled back: let a retry assign the rank again.
+            self.rank = self._order = None
+            raise
+        if Module.id_course.is_cached(self) and self.id_course.modules is not None:
+            # Keep a loaded course in step, so a later course.save() does not
+            # write back a stale count.
             self.id_course.modules += 1
-            self.id_course.save()
-        super().save(*args, **kwargs)
+        # The counter UPDATE sends no signals.
+        response_cache.bump("course")
 
     def delete(self, *args, **kwargs):
         """
-        Updates the module count and reorders the remaining modules after deletion.
-        Necessary to maintain an accurate module count and ensure proper order sequence.
+        Updates the module count of the course after deletion.
+
+        The later modules keep their ranks, so their order shifts down
+        without being rewritten. Deleting a module costs two statements
+        (counter UPDATE, DELETE) inside one transaction.
+
+        Raises:
+            Module.DoesNotExist: If the module was already deleted; the
+                counter is left untouched.
+        """
+        using = kwargs.get("using") or router.db_for_write(Module, instance=self)
+        with transaction.atomic(using=using):
+            Course.objects.filter(pk=self.id_course_id).update(
+                modules=models.F("modules") - 1, updated_at=timezone.now()
+            )
+            result = super().delete(*args, **kwargs)
+            if not result[0]:
+                raise Module.DoesNotExist("Module has already been deleted.")
+        if Module.id_course.is_cached(self) and self.id_course.modules:
+            self.id_course.modules -= 1
+        # The counter UPDATE sends no signals.
+        response_cache.bump("course")
+        return result
+
+    def move_to(self, position):
         """
-        course = self.id_course
-        module_order = self.order
-        course.modules -= 1
-        course.save()
-        super().delete(*args, **kwargs)
-        Module.objects.filter(id_course=course, order__gt=module_order).update(
-            order=models.F("order") - 1
-        )
+        Move the module to the 1-based ``position`` within its course.
+
+        Only this row is rewritten: its new rank is the midpoint of the ranks
+        of its new neighbours. When they have no gap left, the ranks of the
+        whole course are spread out again (two UPDATE statements).
+
+        Args:
+            position (int): Target position, clamped to the course bounds.
+        """
+        with transaction.atomic(using=router.db_for_write(Module, instance=self)):
+            now = timezone.now()
+            # Touching the course takes its row lock and changes the list
+            # validators, since the order of every module may change.
+            Course.objects.filter(pk=self.id_course_id).update(updated_at=now)
+            siblings = list(
+                Module.objects.filter(id_course_id=self.id_course_id)
+                .exclude(pk=self.pk)
+                .order_by("rank")
+                .values_list("pk", "rank")
+            )
+            position = max(1, min(position, len(siblings) + 1))
+            ranks = [rank for _, rank in siblings]
+            previous = ranks[position - 2] if position > 1 else 0
+            following = ranks[position - 1] if position <= len(ranks) else None
+
+            if following is None:
+                self.rank = previous + RANK_STEP
+            elif following - previous > 1:
+                self.rank = (previous + following) // 2
+            else:
+                self._spread_ranks([pk for pk, _ in siblings], position)
+            Module.objects.filter(pk=self.pk).update(rank=self.rank, updated_at=now)
+            self._order = position
+        # The UPDATEs above send no signals.
+        response_cache.bump("course")
+        response_cache.bump("module")
+
+    def _spread_ranks(self, sibling_ids, position):
+        """
+        Renumber the course with ``RANK_STEP`` gaps, leaving ``position`` free.
+
+        Ranks go through non-positive placeholders first (real ranks are
+        always >= 1), so the unique ``(id_course, rank)`` constraint holds
+        after every row even on databases that check it row by row.
+        """
+        placeholders = [
+            Module(pk=pk, rank=-index) for index, pk in enumerate(sibling_ids, start=1)
+        ]
+        Module.objects.bulk_update([*placeholders, Module(pk=self.pk, rank=0)], ["rank"])
+        for index, module in enumerate(placeholders, start=1):
+            module.rank = (index + (index >= position)) * RANK_STEP
+        Module.objects.bulk_update(placeholders, ["rank"])
+        self.rank = position * RANK_STEP
 
     def __str__(self):
         return self.name
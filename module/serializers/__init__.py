@@ -1,5 +1,9 @@
 """Init file for serializers in the module app."""
 
-from module.serializers.module import ModuleSerializer
+from module.serializers.module import (
+    ModuleSerializer,
+    ModuleMoveSerializer,
+    SyllabusModuleSerializer,
+)
 
-__all__ = ["ModuleSerializer"]
+__all__ = ["ModuleSerializer", "ModuleMoveSerializer", "SyllabusModuleSerializer"]
@@ -1,9 +1,38 @@
 from rest_framework import serializers
+from course.serializers import CourseSerializer
+from minerva.serializers import SparseFieldsetMixin
 from module.models import Module
 
 
-class ModuleSerializer(serializers.ModelSerializer):
+class ModuleSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    expandable_fields = {"id_course": CourseSerializer}
+    order = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Module
-        fields = "__all__"
+        exclude = ["rank"]
+
+
+class ModuleMoveSerializer(serializers.Serializer):
+    """Target 1-based position of a module within its course."""
+
+    order = serializers.IntegerField(min_value=1)
+
+
+class SyllabusListSerializer(serializers.ListSerializer):
+    def validate(self, attrs):
+        ids = [item["id"] for item in attrs if "id" in item]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError("A module is listed more than once.")
+        return attrs
+
+
+class SyllabusModuleSerializer(serializers.ModelSerializer):
+    """One entry of a full course syllabus; entries without ``id`` are created."""
+
+    id = serializers.UUIDField(required=False)
+
+    class Meta:
+        model = Module
+        fields = ["id", "name", "description", "instructional_items", "assessment_items"]
+        list_serializer_class = SyllabusListSerializer
@@ -1,4 +1,8 @@
 import base64
+import threading
+from django.db import connection, OperationalError
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APITestCase
 from rest_framework.test import APIClient
 from django.contrib.auth.models import User
@@ -42,7 +46,22 @@ class ModuleTests(APITestCase):
         url = reverse("module_list") + f"?course_id={self.course.id}"
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_get_modules_paginated_in_course_order(self):
+        """
+        Test that module pages follow the course order and link to the next page.
+        """
+        url = reverse("module_list") + f"?course_id={self.course.id}&page_size=1"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["name"], "Module 1")
+        self.assertIsNone(response.data["previous"])
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual(response.data["results"][0]["name"], "Module 2")
+        self.assertIn(f"course_id={self.course.id}", response.data["previous"])
+        self.assertIsNone(response.data["next"])
 
     def test_create_module(self):
         """
@@ -72,6 +91,81 @@ class ModuleTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["name"], "Module 1")
 
+    def test_get_module_with_fieldset_and_expand(self):
+        """
+        Test to retrieve a narrowed module with its course inlined.
+        """
+        url = reverse("module_detail", kwargs={"id": self.module_1.id})
+        response = self.client.get(url + "?fields=name,order,id_course&expand=id_course")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data), {"name", "order", "id_course"})
+        self.assertEqual(response.data["id_course"]["name"], "Test Course")
+
+    def test_get_module_not_modified_until_reordered(self):
+        """
+        Test that a module's ETag changes when deleting a sibling renumbers it.
+        """
+        url = reverse("module_detail", kwargs={"id": self.module_2.id})
+        etag = self.client.get(url)["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.module_1.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["order"], 1)
+
+    def test_move_module(self):
+        """
+        Test to move a module to another position, rewriting only its own row.
+        """
+        module_3 = Module.objects.create(
+            id_course=self.course,
+            name="Module 3",
+            instructional_items=1,
+            assessment_items=1,
+        )
+        ranks = dict(Module.objects.values_list("id", "rank"))
+
+        url = reverse("module_detail", kwargs={"id": module_3.id})
+        response = self.client.patch(url, {"order": 1}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["order"], 1)
+
+        response = self.client.get(reverse("module_list") + f"?course_id={self.course.id}")
+        self.assertEqual(
+            [(module["name"], module["order"]) for module in response.data["results"]],
+            [("Module 3", 1), ("Module 1", 2), ("Module 2", 3)],
+        )
+        moved = dict(Module.objects.values_list("id", "rank"))
+        self.assertEqual(
+            [pk for pk in ranks if ranks[pk] != moved[pk]], [module_3.id]
+        )
+
+        response = self.client.patch(url, {"order": 0}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_move_module_spreads_ranks_when_gap_is_exhausted(self):
+        """
+        Test that repeated moves into the same slot keep a consistent order.
+        """
+        module_3 = Module.objects.create(
+            id_course=self.course,
+            name="Module 3",
+            instructional_items=1,
+            assessment_items=1,
+        )
+        for _ in range(20):
+            self.module_2.move_to(2)
+            module_3.move_to(2)
+        names = list(
+            Module.objects.with_order()
+            .filter(id_course=self.course)
+            .order_by("order")
+            .values_list("name", flat=True)
+        )
+        self.assertEqual(names, ["Module 1", "Module 3", "Module 2"])
+
     def test_update_module(self):
         """
         Test to update a module by UUID.
@@ -126,3 +220,217 @@ class ModuleTests(APITestCase):
         response = self.client.post(url, data, format="json")
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(response.data["order"], 2)
+
+    def test_create_and_delete_query_count(self):
+        """
+        Test the documented statement count of Module.save and Module.delete.
+        """
+
+        def statements(queries):
+            return [
+                query["sql"]
+                for query in queries.captured_queries
+                if not query["sql"].startswith(("SAVEPOINT", "RELEASE SAVEPOINT"))
+            ]
+
+        with CaptureQueriesContext(connection) as queries:
+            module = Module.objects.create(
+                id_course=self.course,
+                name="Module 3",
+                instructional_items=1,
+                assessment_items=1,
+            )
+        self.assertEqual(len(statements(queries)), 3)
+        self.assertEqual(module.order, 3)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.module_1.delete()
+        self.assertEqual(len(statements(queries)), 2)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.modules, 2)
+
+    def test_replace_syllabus(self):
+        """
+        Test to replace the modules of a course with a reordered, edited list.
+        """
+        Course.objects.filter(pk=self.course.pk).update(alias="test")
+        module_3 = Module.objects.create(
+            id_course=self.course,
+            name="Module 3",
+            instructional_items=1,
+            assessment_items=1,
+        )
+        ranks = dict(Module.objects.values_list("id", "rank"))
+        url = reverse("course_syllabus", kwargs={"alias": "test"})
+        data = [
+            {"id": str(module_3.id), "name": "Module 3", "instructional_items": 1, "assessment_items": 1},
+            {"name": "Module 4", "instructional_items": 2, "assessment_items": 2},
+            {"id": str(self.module_1.id), "name": "Renamed", "instructional_items": 5, "assessment_items": 3},
+        ]
+        response = self.client.put(url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(module["name"], module["order"]) for module in response.data],
+            [("Module 3", 1), ("Module 4", 2), ("Renamed", 3)],
+        )
+        self.assertFalse(Module.objects.filter(pk=self.module_2.pk).exists())
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.modules, 3)
+        # Module 3 keeps its rank, only Module 1 is moved behind it.
+        self.assertEqual(Module.objects.get(pk=module_3.pk).rank, ranks[module_3.id])
+
+        response = self.client.get(url)
+        self.assertEqual(
+            [module["name"] for module in response.data],
+            ["Module 3", "Module 4", "Renamed"],
+        )
+
+    def test_replace_syllabus_rejects_foreign_and_duplicate_modules(self):
+        """
+        Test that a syllabus listing another course's module or a module twice is rejected.
+        """
+        Course.objects.filter(pk=self.course.pk).update(alias="test")
+        other = Course.objects.create(name="Other Course", alias="other")
+        foreign = Module.objects.create(
+            id_course=other, name="Foreign", instructional_items=1, assessment_items=1
+        )
+        url = reverse("course_syllabus", kwargs={"alias": "test"})
+        item = {"name": "Module", "instructional_items": 1, "assessment_items": 1}
+
+        response = self.client.put(url, [{**item, "id": str(foreign.id)}], format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.put(
+            url, [{**item, "id": str(self.module_1.id)}] * 2, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Module.objects.filter(id_course=self.course).count(), 2)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.modules, 2)
+
+    def test_replace_syllabus_query_count_does_not_grow(self):
+        """
+        Test that replacing a syllabus costs the same statements for 2 or 16 modules.
+        """
+
+        def replace(size):
+            current = list(
+                Module.objects.filter(id_course=self.course).order_by("-rank")
+            )
+            items = [
+                {"id": module.id, "name": f"Kept {index}", "instructional_items": 1, "assessment_items": 1}
+                for index, module in enumerate(current[1:])
+            ]
+            items += [
+                {"name": f"New {index}", "instructional_items": 1, "assessment_items": 1}
+                for index in range(size - len(items))
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                Module.objects.replace_syllabus(self.course.id, items)
+            return len(
+                [
+                    query
+                    for query in queries.captured_queries
+                    if not query["sql"].startswith(("SAVEPOINT", "RELEASE SAVEPOINT"))
+                ]
+            )
+
+        # Each call reverses the kept modules, deletes one and creates the rest,
+        # so every kind of write happens in both.
+        Module.objects.create(
+            id_course=self.course, name="Module 3", instructional_items=1, assessment_items=1
+        )
+        small = replace(3)
+        self.assertEqual(replace(16), small)
+        self.assertEqual(Module.objects.filter(id_course=self.course).count(), 16)
+
+
+class ModuleConcurrencyTests(TransactionTestCase):
+    """
+    Stress test for concurrent module creates and deletes on one course.
+    """
+
+    threads = 8
+    creates_per_thread = 5
+
+    def run_concurrently(self, target):
+        """
+        Run ``target`` in several threads at once, each with its own connection.
+
+        SQLite answers lock contention with "database is locked" instead of
+        waiting, so those statements are retried as a client would.
+        """
+        barrier = threading.Barrier(self.threads)
+        errors = []
+
+        def worker(index):
+            barrier.wait()
+            try:
+                for step in range(self.creates_per_thread):
+                    while True:
+                        try:
+                            target(index, step)
+                            break
+                        except OperationalError as error:
+                            if "locked" not in str(error):
+                                raise
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        workers = [
+            threading.Thread(target=worker, args=(index,))
+            for index in range(self.threads)
+        ]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_concurrent_creates_keep_order_and_counter_consistent(self):
+        """
+        Test that parallel creates never lose a counter increment or reuse an order.
+        """
+        course = Course.objects.create(name="Busy Course", alias="busy")
+
+        def create(index, step):
+            Module.objects.create(
+                id_course_id=course.id,
+                name=f"Module {index}.{step}",
+                instructional_items=1,
+                assessment_items=1,
+            )
+
+        self.run_concurrently(create)
+
+        total = self.threads * self.creates_per_thread
+        course.refresh_from_db()
+        self.assertEqual(course.modules, total)
+        orders = sorted(
+            Module.objects.with_order()
+            .filter(id_course=course)
+            .values_list("order", flat=True)
+        )
+        self.assertEqual(orders, list(range(1, total + 1)))
+
+        def delete(index, step):
+            while True:
+                module = Module.objects.filter(id_course=course).order_by("?").first()
+                try:
+                    return module.delete()
+                except Module.DoesNotExist:
+                    continue
+
+        self.creates_per_thread = 2
+        self.run_concurrently(delete)
+
+        remaining = total - self.threads * self.creates_per_thread
+        course.refresh_from_db()
+        self.assertEqual(course.modules, remaining)
+        orders = sorted(
+            Module.objects.with_order()
+            .filter(id_course=course)
+            .values_list("order", flat=True)
+        )
+        self.assertEqual(orders, list(range(1, remaining + 1)))
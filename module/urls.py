@@ -1,5 +1,5 @@
 from django.urls import path
-from module.views import ModuleDetailView, ModuleListView
+from module.views import CourseSyllabusView, ModuleDetailView, ModuleListView
 
 urlpatterns = [
     path("module/", ModuleListView.as_view(), name="module_list"),
@@ -8,4 +8,9 @@ urlpatterns = [
         ModuleDetailView.as_view(),
         name="module_detail",
     ),
+    path(
+        "course/<slug:alias>/modules/",
+        CourseSyllabusView.as_view(),
+        name="course_syllabus",
+    ),
 ]
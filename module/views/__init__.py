@@ -6,5 +6,6 @@ from module.views.module import (
     ModuleListView,
     ModuleDetailView,
 )
+from module.views.syllabus import CourseSyllabusView
 
-__all__ = ["ModuleListView", "ModuleDetailView"]
+__all__ = ["ModuleListView", "ModuleDetailView", "CourseSyllabusView"]
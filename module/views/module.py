@@ -4,12 +4,33 @@ from rest_framework.views import APIView
 from rest_framework import status, permissions
 from course.models.course import Course
 from module.models import Module
-from module.serializers import ModuleSerializer
+from module.serializers import ModuleSerializer, ModuleMoveSerializer
+from minerva.cache import cache_response
+from minerva.conditional import list_validators, object_validators
+from minerva.pagination import KeysetPagination
+from minerva.serializers import FIELDSET_PARAMETERS
+from minerva.sharding import find_shard, routed_to_shard, shard_with
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
 
 
+def course_shard(source, name):
+    """
+    Locator of the shard of the course whose id is ``name`` in the query
+    string (``query_params``) or the body (``data``) of the request.
+    """
+
+    def locate(request, **kwargs):
+        values = getattr(request, source)
+        course_id = values.get(name) if hasattr(values, "get") else None
+        return find_shard(Course, pk=course_id) if course_id else None
+
+    return locate
+
+
 class ModuleListView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    ordering = ("id_course", "rank", "id")
     """
     API endpoints for CRUD operations on Module objects.
     """
@@ -23,24 +44,41 @@ class ModuleListView(APIView):
                 type=OpenApiTypes.UUID,
                 description="The UUID of the course to filter modules by.",
                 required=False,
-            )
+            ),
+            *FIELDSET_PARAMETERS,
         ],
     )
+    @cache_response("module", "course")
+    @routed_to_shard(course_shard("query_params", "course_id"), required=False)
     def get(self, request):
         """
-        Retrieve all Module objects, or filter by course if course_id is provided.
+        Retrieve a page of Module objects, or filter by course if course_id is provided.
         """
         course_id = request.query_params.get("course_id")
+        fields, expand = ModuleSerializer.parse_fieldset(request)
 
         if course_id:
             modules = Module.objects.filter(id_course_id=course_id)
         else:
             modules = Module.objects.all()
+        modules = modules.with_order()
 
-        serializer = ModuleSerializer(modules, many=True)
-        return Response(serializer.data)
+        validators = list_validators(request, modules, expand)
+        if validators.matches(request):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers=validators.headers
+            )
+
+        modules = ModuleSerializer.setup_queryset(
+            modules, fields, expand, required=self.ordering
+        )
+        paginator = self.pagination_class()
+        modules = paginator.paginate_queryset(modules, request, view=self)
+        serializer = ModuleSerializer(modules, many=True, fields=fields, expand=expand)
+        return validators.apply(paginator.get_paginated_response(serializer.data))
 
     @extend_schema(request=ModuleSerializer, responses=ModuleSerializer)
+    @routed_to_shard(course_shard("data", "id_course"), required=False)
     def post(self, request):
         """
         Create a new Module object.
@@ -55,16 +93,33 @@ class ModuleListView(APIView):
 class ModuleDetailView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
-    @extend_schema(request=None, responses=ModuleSerializer)
+    @extend_schema(
+        request=None, responses=ModuleSerializer, parameters=FIELDSET_PARAMETERS
+    )
+    @cache_response("module", "course")
+    @routed_to_shard(shard_with(Module, pk="id"))
     def get(self, request, id):
         """
         Retrieve a single Module object by UUID.
         """
-        module = get_object_or_404(Module, id=id)
-        serializer = ModuleSerializer(module)
-        return Response(serializer.data)
+        fields, expand = ModuleSerializer.parse_fieldset(request)
+        # The course is touched whenever a sibling move or delete shifts the order.
+        related = dict.fromkeys(["id_course", *expand])
+        validators = object_validators(request, Module.objects.filter(id=id), related)
+        if validators.matches(request):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers=validators.headers
+            )
+
+        modules = ModuleSerializer.setup_queryset(
+            Module.objects.with_order(), fields, expand
+        )
+        module = get_object_or_404(modules, id=id)
+        serializer = ModuleSerializer(module, fields=fields, expand=expand)
+        return Response(serializer.data, headers=validators.headers)
 
     @extend_schema(request=ModuleSerializer, responses=ModuleSerializer)
+    @routed_to_shard(shard_with(Module, pk="id"))
     def put(self, request, id):
         """
         Update an existing Module object by UUID.
@@ -76,7 +131,21 @@ class ModuleDetailView(APIView):
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @extend_schema(request=ModuleMoveSerializer, responses=ModuleSerializer)
+    @routed_to_shard(shard_with(Module, pk="id"))
+    def patch(self, request, id):
+        """
+        Move a Module object to a new 1-based position within its course.
+        """
+        module = get_object_or_404(Module, id=id)
+        serializer = ModuleMoveSerializer(data=request.data)
+        if serializer.is_valid():
+            module.move_to(serializer.validated_data["order"])
+            return Response(ModuleSerializer(module).data)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
     @extend_schema(request=None, responses={204: None})
+    @routed_to_shard(shard_with(Module, pk="id"))
     def delete(self, request, id):
         """
         Delete a Module object by UUID.
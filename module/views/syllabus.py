@@ -0,0 +1,55 @@
+from django.shortcuts import get_object_or_404
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework import status, permissions
+from course.models.course import MAX_MODULES, Course
+from module.models import Module
+from module.serializers import ModuleSerializer, SyllabusModuleSerializer
+from minerva.cache import cache_response
+from minerva.sharding import routed_to_shard, shard_with
+from drf_spectacular.utils import extend_schema
+
+
+class CourseSyllabusView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    """
+    API endpoints for the ordered list of modules of a course, as a whole.
+    """
+
+    @extend_schema(request=None, responses=ModuleSerializer(many=True))
+    @cache_response("module", "course")
+    @routed_to_shard(shard_with(Course, alias="alias"))
+    def get(self, request, alias):
+        """
+        Retrieve the modules of a course, in course order.
+        """
+        course = get_object_or_404(Course.objects.only("id"), alias=alias)
+        modules = Module.objects.filter(id_course=course).with_order().order_by("rank")
+        return Response(ModuleSerializer(modules, many=True).data)
+
+    @extend_schema(
+        request=SyllabusModuleSerializer(many=True),
+        responses=ModuleSerializer(many=True),
+    )
+    @routed_to_shard(shard_with(Course, alias="alias"))
+    def put(self, request, alias):
+        """
+        Replace the modules of a course with the given ordered list.
+
+        Listed modules with an ``id`` are kept and updated, the others are
+        created, and modules of the course that are not listed are deleted.
+        Everything is applied in one transaction.
+        """
+        course = get_object_or_404(Course.objects.only("id"), alias=alias)
+        serializer = SyllabusModuleSerializer(
+            data=request.data, many=True, max_length=MAX_MODULES
+        )
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            modules = Module.objects.replace_syllabus(
+                course.id, serializer.validated_data
+            )
+        except Module.DoesNotExist as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(ModuleSerializer(modules, many=True).data)
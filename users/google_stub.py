@@ -0,0 +1,128 @@
+import json
+import threading
+import time
+from functools import cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import rsa
+from google.auth import crypt, jwt
+
+
+@cache
+def signing_key():
+    """
+    Throwaway RSA key pair as ``(private PEM, public PEM)``.
+
+    1024 bits keeps key generation fast; Google signs with 2048-bit keys.
+    """
+    public, private = rsa.newkeys(1024)
+    return private.save_pkcs1().decode(), public.save_pkcs1().decode()
+
+
+class StubGoogle(ThreadingHTTPServer):
+    """
+    Local stand-in for Google's OAuth token and certificate endpoints.
+
+    ``POST /token`` answers every code with an ID token for the email
+    ``<code>`` (or with ``id_token`` when set), after ``latency`` seconds.
+    ``GET /certs`` serves the public key under ``key_id``. Requests per
+    path and TCP connections are counted.
+
+    Attributes:
+        url (str): Base URL of the running server.
+        client_id (str): Audience of the issued ID tokens.
+        latency (float): Seconds the token endpoint waits before answering.
+        max_age (int): ``max-age`` sent with the certificates.
+    """
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, client_id, key_id="stub-key", latency=0.0, max_age=3600):
+        super().__init__(("127.0.0.1", 0), StubGoogleHandler)
+        self.client_id = client_id
+        self.key_id = key_id
+        self.latency = latency
+        self.max_age = max_age
+        self.private_key, public_key = signing_key()
+        self.certs = {key_id: public_key}
+        self._signers = {}
+        self.id_token = None
+        self.requests = {}
+        self.connections = 0
+        self.url = f"http://127.0.0.1:{self.server_address[1]}"
+        self._count_lock = threading.Lock()
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def sign(self, key_id=None, **claims):
+        """
+        Encode a Google-like ID token; ``claims`` override the defaults.
+        """
+        now = int(time.time())
+        payload = {
+            "iss": "https://accounts.google.com",
+            "aud": self.client_id,
+            "email": "test@example.com",
+            "iat": now,
+            "exp": now + 300,
+            **claims,
+        }
+        key_id = key_id or self.key_id
+        return jwt.encode(self.signer(key_id), payload, key_id=key_id).decode()
+
+    def signer(self, key_id):
+        # Parsing the private key costs far more than signing with it.
+        if key_id not in self._signers:
+            self._signers[key_id] = crypt.RSASigner.from_string(
+                self.private_key, key_id
+            )
+        return self._signers[key_id]
+
+    def count(self, path):
+        with self._count_lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    def process_request(self, request, client_address):
+        with self._count_lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+
+class StubGoogleHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; Nagle would hold the body back
+    # for a delayed ACK on kept-alive connections.
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.server.count(self.path)
+        self.reply(self.server.certs, f"public, max-age={self.server.max_age}")
+
+    def do_POST(self):
+        self.server.count(self.path)
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        code = parse_qs(body.decode()).get("code", [""])[0]
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        id_token = self.server.id_token or self.server.sign(email=code)
+        self.reply({"id_token": id_token}, "no-store")
+
+    def reply(self, data, cache_control):
+        body = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", cache_control)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
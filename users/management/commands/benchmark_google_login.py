@@ -0,0 +1,144 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from unittest import mock
+
+import httpx
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from users.google_stub import StubGoogle
+from users.views import utils
+
+# Domain of the users created by the benchmark; they are deleted afterwards.
+EMAIL_DOMAIN = "login-benchmark.invalid"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure concurrent Google login throughput of the sync (WSGI) and "
+        "async (ASGI) login views against a local stub of Google's OAuth server."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--logins",
+            type=int,
+            default=200,
+            help="Logins per run (default: 200).",
+        )
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=0.2,
+            help="Seconds the stub token endpoint takes to answer (default: 0.2).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Threads serving the sync view, like sync workers (default: 4).",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=50,
+            help="Logins in flight at once (default: 50).",
+        )
+
+    def handle(self, *args, **options):
+        server = StubGoogle("login-benchmark", latency=options["latency"]).start()
+        with ExitStack() as stack:
+            stack.callback(server.stop)
+            stack.callback(self.delete_users)
+            # The login helpers read Google's endpoints once, at import time.
+            stack.enter_context(
+                mock.patch.object(utils, "TOKEN_ENDPOINT", server.url + "/token")
+            )
+            stack.enter_context(
+                mock.patch.object(
+                    utils, "google_certs", utils.CertificateCache(server.url + "/certs")
+                )
+            )
+            stack.enter_context(
+                mock.patch.dict("os.environ", {"CLIENT_ID": server.client_id})
+            )
+
+            runs = [
+                (f"sync, {options['workers']} workers", self.run_sync(**options)),
+                (
+                    f"async, {options['concurrency']} in flight",
+                    asyncio.run(self.run_async(**options)),
+                ),
+            ]
+
+        self.stdout.write(
+            f"{options['logins']} logins, Google latency {options['latency'] * 1000:.0f} ms"
+        )
+        self.stdout.write(
+            f"{'view':<24}{'logins/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}"
+        )
+        for name, (elapsed, results) in runs:
+            latencies = [latency * 1000 for latency, _ in results]
+            p50, p95 = [statistics.quantiles(latencies, n=100)[i] for i in (49, 94)]
+            errors = sum(status != 200 for _, status in results)
+            self.stdout.write(
+                f"{name:<24}{len(results) / elapsed:>10.1f}"
+                f"{p50:>10.1f}{p95:>10.1f}{errors:>8}"
+            )
+
+    def run_sync(self, logins, workers, **options):
+        """
+        Log in through the WSGI application from ``workers`` threads.
+        """
+        from minerva.wsgi import application
+
+        url = reverse("login-with-google")
+
+        def login(index):
+            transport = httpx.WSGITransport(app=application)
+            with httpx.Client(
+                transport=transport, base_url="http://localhost"
+            ) as client:
+                started = time.perf_counter()
+                response = client.post(
+                    url, json={"code": f"sync{index}@{EMAIL_DOMAIN}"}
+                )
+                return time.perf_counter() - started, response.status_code
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(login, range(logins)))
+        return time.perf_counter() - started, results
+
+    async def run_async(self, logins, concurrency, **options):
+        """
+        Log in through the ASGI application with ``concurrency`` requests in flight.
+        """
+        from minerva.asgi import application
+
+        url = reverse("login-with-google-async")
+        in_flight = asyncio.Semaphore(concurrency)
+        transport = httpx.ASGITransport(app=application)
+
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://localhost"
+        ) as client:
+
+            async def login(index):
+                async with in_flight:
+                    started = time.perf_counter()
+                    response = await client.post(
+                        url, json={"code": f"async{index}@{EMAIL_DOMAIN}"}
+                    )
+                    return time.perf_counter() - started, response.status_code
+
+            started = time.perf_counter()
+            results = await asyncio.gather(*(login(i) for i in range(logins)))
+            return time.perf_counter() - started, results
+
+    def delete_users(self):
+        User.objects.filter(email__endswith=f"@{EMAIL_DOMAIN}").delete()
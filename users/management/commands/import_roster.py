@@ -0,0 +1,49 @@
+import csv
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.roster import ROSTER_BATCH_SIZE, ROSTER_FORMATS, import_roster, parse_roster
+
+
+class Command(BaseCommand):
+    help = "Create users for every email address of a CSV or NDJSON roster."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "roster",
+            help='Roster file, or "-" for standard input.',
+        )
+        parser.add_argument(
+            "--format",
+            choices=ROSTER_FORMATS,
+            help="Roster format (default: from the file extension, else csv).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=ROSTER_BATCH_SIZE,
+            help=f"Addresses checked and inserted per batch (default: {ROSTER_BATCH_SIZE}).",
+        )
+
+    def handle(self, *args, **options):
+        path = options["roster"]
+        format = options["format"] or ("ndjson" if path.endswith(".ndjson") else "csv")
+        try:
+            if path == "-":
+                summary = self.import_lines(sys.stdin, format, options["batch_size"])
+            else:
+                with open(path, encoding="utf-8-sig", newline="") as lines:
+                    summary = self.import_lines(lines, format, options["batch_size"])
+        except (OSError, ValueError, csv.Error) as error:
+            raise CommandError(error)
+
+        self.stdout.write(
+            f"{summary['created']} created, {summary['existing']} already existed, "
+            f"{len(summary['invalid'])} invalid"
+        )
+        for email in summary["invalid"]:
+            self.stderr.write(f"invalid address: {email!r}")
+
+    def import_lines(self, lines, format, batch_size):
+        return import_roster(parse_roster(lines, format), batch_size)
@@ -0,0 +1,6 @@
+"""init file for models in users app."""
+
+from typing import Sequence
+from users.models.revoked_token import RevokedToken
+
+__all__: Sequence[str] = ["RevokedToken"]
@@ -0,0 +1,21 @@
+from django.db import models
+from django.utils import timezone
+
+
+class RevokedToken(models.Model):
+    """
+    Model for a JWT revoked before its expiry
+
+    Attributes:
+        jti (str): Unique identifier (``jti`` claim) of the revoked token
+        expires_at (datetime): Expiry of the token, after which the row is pruned
+        revoked_at (datetime): When the token was revoked, read by the
+            incremental refresh of ``minerva.authentication.RevocationList``
+    """
+
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return self.jti
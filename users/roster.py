@@ -0,0 +1,127 @@
+import csv
+import io
+import json
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db.models import Q
+
+ROSTER_BATCH_SIZE = 1000
+ROSTER_FORMATS = ("csv", "ndjson")
+# The address doubles as the username, which is shorter than an email field.
+USERNAME_MAX_LENGTH = User._meta.get_field("username").max_length
+
+
+def parse_roster(lines, format="csv"):
+    """
+    Yield the email addresses of a roster.
+
+    A CSV roster has one student per row, with the address in its ``email``
+    column when the first row is a header naming one, otherwise in the
+    first column. An NDJSON roster has one JSON object with an ``email``
+    key, or one JSON string, per line. Blank rows are skipped.
+
+    Args:
+        lines (Iterable[str]): Lines of the roster.
+        format (str): ``"csv"`` or ``"ndjson"``.
+    """
+    if format == "ndjson":
+        for line in lines:
+            if line.strip():
+                item = json.loads(line)
+                yield item.get("email", "") if isinstance(item, dict) else item
+        return
+
+    rows = csv.reader(lines)
+    column = 0
+    for row in rows:
+        lowered = [cell.strip().lower() for cell in row]
+        if "email" in lowered:
+            column = lowered.index("email")
+        elif any(lowered):
+            yield row[column] if column < len(row) else ""
+        break
+    for row in rows:
+        if any(cell.strip() for cell in row):
+            yield row[column] if column < len(row) else ""
+
+
+def import_roster(emails, batch_size=ROSTER_BATCH_SIZE):
+    """
+    Create a user for every address of a roster that has none yet.
+
+    Addresses are processed in batches: each batch is checked against the
+    existing users in one query, and the missing users are inserted with one
+    ``bulk_create``. Users are created the way a first Google login creates
+    them (see ``new_user``), and conflicts with concurrent logins are ignored.
+
+    Args:
+        emails (Iterable[str]): Addresses, as yielded by ``parse_roster``.
+        batch_size (int): Addresses checked and inserted per batch.
+
+    Returns:
+        dict: ``created`` and ``existing`` counts and the ``invalid`` entries.
+    """
+    summary = {"created": 0, "existing": 0, "invalid": []}
+    seen = set()
+    batch = []
+    for email in emails:
+        email = str(email).strip()
+        try:
+            validate_email(email)
+        except ValidationError:
+            summary["invalid"].append(email)
+            continue
+        if len(email) > USERNAME_MAX_LENGTH:
+            summary["invalid"].append(email)
+            continue
+        if email in seen:
+            continue
+        seen.add(email)
+        batch.append(email)
+        if len(batch) >= batch_size:
+            _import_batch(batch, summary)
+            batch = []
+    if batch:
+        _import_batch(batch, summary)
+    return summary
+
+
+def _import_batch(emails, summary):
+    existing = set()
+    for email, username in User.objects.filter(
+        Q(email__in=emails) | Q(username__in=emails)
+    ).values_list("email", "username"):
+        existing.update((email, username))
+    users = [new_user(email) for email in emails if email not in existing]
+    created = 0
+    if users:
+        User.objects.bulk_create(users, batch_size=len(emails), ignore_conflicts=True)
+        # Rows skipped as conflicts were created concurrently by someone else;
+        # each new user has its own random unusable password, so the rows
+        # inserted here are the ones that still carry it.
+        created = User.objects.filter(
+            username__in=[user.username for user in users],
+            password__in=[user.password for user in users],
+        ).count()
+    summary["created"] += created
+    summary["existing"] += len(emails) - created
+
+
+def new_user(email):
+    """
+    Unsaved user for an address: named after it, with no usable password.
+    """
+    user = User(username=email, email=email)
+    user.set_unusable_password()
+    return user
+
+
+def roster_lines(data):
+    """
+    Split an uploaded roster (bytes or text) into lines for ``parse_roster``.
+    """
+    if isinstance(data, bytes):
+        data = data.decode("utf-8-sig")
+    return io.StringIO(data, newline="")
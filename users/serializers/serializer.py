@@ -1,9 +1,23 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from rest_framework_simplejwt.serializers import TokenVerifySerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import UntypedToken
+from minerva.authentication import revocation_list
 
 
 class UserSerializer(serializers.ModelSerializer):
     """Serializer for User model with required fields for authentication."""
     class Meta:
         model = User
-        fields = ('id', 'username', 'email')
\ No newline at end of file
+        fields = ('id', 'username', 'email')
+
+
+class RevocationAwareTokenVerifySerializer(TokenVerifySerializer):
+    """Token verification that also rejects tokens revoked on logout."""
+    def validate(self, attrs):
+        token = UntypedToken(attrs["token"])
+        jti = token.get(jwt_settings.JTI_CLAIM)
+        if jti is not None and revocation_list.is_revoked(jti):
+            raise serializers.ValidationError("Token has been revoked")
+        return {}
@@ -2,8 +2,16 @@ from django.test import TestCase
 from django.urls import reverse
 from django.contrib.auth.models import User
 from rest_framework.test import APIClient
+from django.core.management import call_command
 from unittest.mock import patch
+import asyncio
+import io
+import time
+from ..google_stub import StubGoogle
+from ..views import utils
+from ..roster import import_roster, new_user, parse_roster
 from ..views.utils import get_id_token_with_code
+from ..views.views import authenticate_or_create_user
 
 class GoogleAuthenticationTests(TestCase):
     def setUp(self):
@@ -40,4 +48,251 @@ class GoogleAuthenticationTests(TestCase):
         self.client.force_authenticate(user=self.user)
         response = self.client.post(self.logout_url)
         
-        self.assertEqual(response.status_code, 200)
\ No newline at end of file
+        self.assertEqual(response.status_code, 200)
+
+
+class StubGoogleTestCase(TestCase):
+    """
+    Points the Google login helpers at a local StubGoogle server.
+    """
+    client_id = 'stub-client-id'
+
+    def setUp(self):
+        self.server = StubGoogle(self.client_id, key_id='key-1').start()
+        self.addCleanup(self.server.stop)
+
+        self.certs = utils.CertificateCache(
+            self.server.url + '/certs', http=utils.create_session()
+        )
+        for name, value in [
+            ('session', utils.create_session()),
+            ('google_certs', self.certs),
+            ('TOKEN_ENDPOINT', self.server.url + '/token'),
+        ]:
+            patcher = patch.object(utils, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = patch.dict('os.environ', {'CLIENT_ID': self.client_id})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class GoogleTokenVerificationTests(StubGoogleTestCase):
+    def test_logins_reuse_certificates_and_connections(self):
+        """
+        Certificates are fetched once, and logins reuse pooled connections.
+        """
+        for _ in range(3):
+            info = get_id_token_with_code('test@example.com')
+            self.assertEqual(info['email'], 'test@example.com')
+
+        self.assertEqual(self.server.requests, {'/token': 3, '/certs': 1})
+        # One kept-alive connection for the tokens, one for the certificates.
+        self.assertEqual(self.server.connections, 2)
+
+    def test_certificates_refreshed_in_background(self):
+        """
+        Past the refresh point, cached certificates are served while new ones load.
+        """
+        get_id_token_with_code('code')
+        cached = self.certs.certs
+        self.certs.refresh_at = 0.0
+
+        self.assertIsNotNone(get_id_token_with_code('code'))
+        for _ in range(100):
+            if self.certs.certs is not cached:
+                break
+            time.sleep(0.01)
+        self.assertIsNot(self.certs.certs, cached)
+        self.assertEqual(self.server.requests['/certs'], 2)
+
+    def test_unknown_key_id_forces_one_refresh(self):
+        """
+        A token signed with a rotated key refetches the certificates, once.
+        """
+        self.certs.get()
+        self.server.certs['key-2'] = self.server.certs['key-1']
+        self.server.id_token = self.server.sign(key_id='key-2')
+        self.certs.fetched_at -= self.certs.min_interval
+
+        self.assertIsNotNone(get_id_token_with_code('code'))
+        self.server.id_token = self.server.sign(key_id='key-3')
+        self.assertIsNone(get_id_token_with_code('code'))
+        self.assertEqual(self.server.requests['/certs'], 2)
+
+    def test_invalid_tokens_rejected(self):
+        """
+        Wrong audience, issuer or expiry yields no user information.
+        """
+        for claims in [
+            {'aud': 'someone-else'},
+            {'iss': 'https://evil.example.com'},
+            {'iat': 0, 'exp': 60},
+        ]:
+            self.server.id_token = self.server.sign(**claims)
+            self.assertIsNone(get_id_token_with_code('code'))
+
+
+    def test_slow_google_times_out(self):
+        """
+        A login is answered with 503 once Google exceeds the timeout.
+        """
+        self.server.latency = 0.5
+        with patch.object(utils, 'HTTP_TIMEOUT', 0.1):
+            response = self.client.post(
+                reverse('login-with-google'), {'code': 'test@example.com'}
+            )
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response.headers)
+
+    def test_unreachable_certificates_raise(self):
+        """
+        A failed certificate fetch is reported as Google being unavailable.
+        """
+        self.certs.url = 'http://127.0.0.1:1/certs'
+        with self.assertRaises(utils.GoogleUnavailable):
+            get_id_token_with_code('test@example.com')
+
+
+class AsyncGoogleLoginTests(StubGoogleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.login_url = reverse('login-with-google-async')
+
+    async def test_login_creates_user(self):
+        """
+        The async login exchanges the code and creates the user.
+        """
+        response = await self.async_client.post(
+            self.login_url, {'code': 'new@example.com'}, content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access_token', response.json())
+        self.assertEqual(response.json()['user']['email'], 'new@example.com')
+        self.assertTrue(await User.objects.filter(email='new@example.com').aexists())
+
+    async def test_logins_wait_on_google_concurrently(self):
+        """
+        Logins waiting on a slow Google overlap instead of queueing.
+        """
+        self.server.latency = 0.3
+        started = time.monotonic()
+        responses = await asyncio.gather(*[
+            self.async_client.post(self.login_url, {'code': f'user{i}@example.com'})
+            for i in range(5)
+        ])
+
+        self.assertEqual([r.status_code for r in responses], [200] * 5)
+        self.assertLess(time.monotonic() - started, 5 * 0.3)
+
+    async def test_slow_google_times_out(self):
+        """
+        A login is answered with 503 once Google exceeds the timeout.
+        """
+        self.server.latency = 0.5
+        with patch.object(utils, 'HTTP_TIMEOUT', 0.1):
+            response = await self.async_client.post(
+                self.login_url, {'code': 'test@example.com'}
+            )
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response.headers)
+
+    async def test_login_without_code(self):
+        """
+        A request without a code is rejected before contacting Google.
+        """
+        response = await self.async_client.post(self.login_url, {})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn('/token', self.server.requests)
+
+
+class RosterImportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', is_staff=True
+        )
+        User.objects.create_user(username='old@example.com', email='old@example.com')
+        self.url = reverse('roster-import')
+
+    def test_parse_csv_and_ndjson(self):
+        csv_roster = ['name,Email\n', 'Ann,ann@example.com\n', '\n', 'Bob,bob@example.com\n']
+        self.assertEqual(
+            list(parse_roster(csv_roster)), ['ann@example.com', 'bob@example.com']
+        )
+        self.assertEqual(list(parse_roster(['ann@example.com\n'])), ['ann@example.com'])
+        ndjson_roster = ['{"email": "ann@example.com"}\n', '"bob@example.com"\n', '\n']
+        self.assertEqual(
+            list(parse_roster(ndjson_roster, 'ndjson')),
+            ['ann@example.com', 'bob@example.com'],
+        )
+
+    def test_import_in_batches(self):
+        emails = [f'student{i}@example.com' for i in range(25)]
+        roster = emails + emails[:5] + ['old@example.com', 'not-an-email']
+        with self.assertNumQueries(9):
+            summary = import_roster(roster, batch_size=10)
+        self.assertEqual(
+            summary, {'created': 25, 'existing': 1, 'invalid': ['not-an-email']}
+        )
+        created = User.objects.filter(email__in=emails)
+        self.assertEqual(created.count(), 25)
+        self.assertFalse(created.first().has_usable_password())
+
+    def test_import_counts_only_inserted_users(self):
+        # A login creates the user between the lookup and the insert.
+        def racing_new_user(email):
+            if email == 'race@example.com':
+                User.objects.create_user(username=email, email=email)
+            return new_user(email)
+
+        with patch('users.roster.new_user', side_effect=racing_new_user):
+            summary = import_roster(['race@example.com', 'calm@example.com'])
+        self.assertEqual(summary, {'created': 1, 'existing': 1, 'invalid': []})
+
+    def test_import_endpoint(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post(
+            self.url,
+            'email\nnew@example.com\nold@example.com\n',
+            content_type='text/csv',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'created': 1, 'existing': 1, 'invalid': []})
+
+        response = self.client.post(
+            self.url, '{"email": "nd@example.com"}\n', content_type='application/x-ndjson'
+        )
+        self.assertEqual(response.data['created'], 1)
+        self.assertTrue(User.objects.filter(email='nd@example.com').exists())
+
+    def test_import_endpoint_requires_admin(self):
+        self.client.force_authenticate(user=User.objects.get(username='old@example.com'))
+        response = self.client.post(self.url, 'a@example.com\n', content_type='text/csv')
+        self.assertEqual(response.status_code, 403)
+
+    def test_import_command(self):
+        roster = io.StringIO('{"email": "cmd@example.com"}\n')
+        out = io.StringIO()
+        with patch('sys.stdin', roster):
+            call_command('import_roster', '-', '--format', 'ndjson', stdout=out)
+        self.assertIn('1 created', out.getvalue())
+        self.assertTrue(User.objects.filter(email='cmd@example.com').exists())
+
+    def test_login_upsert_reuses_user_created_concurrently(self):
+        # Same username, but the email lookup misses, as when another login
+        # inserts the user between the lookup and the insert.
+        User.objects.create_user(username='race@example.com', email='')
+        with self.assertNumQueries(2):
+            user = authenticate_or_create_user('race@example.com')
+        self.assertEqual(user.pk, User.objects.get(username='race@example.com').pk)
+        self.assertEqual(User.objects.filter(username='race@example.com').count(), 1)
+
+    def test_login_creates_user_with_one_insert(self):
+        with self.assertNumQueries(2):
+            user = authenticate_or_create_user('first@example.com')
+        self.assertEqual(user, User.objects.get(email='first@example.com'))
@@ -1,8 +1,20 @@
 from django.urls import path
-from .views.views import LoginWithGoogle, LogoutView, DocumentedTokenVerifyView
+from .views.views import (
+    AsyncLoginWithGoogle,
+    DocumentedTokenVerifyView,
+    LoginWithGoogle,
+    LogoutView,
+)
+from .views.roster import RosterImportView
 
 urlpatterns = [
     path("login-with-google/", LoginWithGoogle.as_view(), name="login-with-google"),
+    path(
+        "login-with-google/async/",
+        AsyncLoginWithGoogle.as_view(),
+        name="login-with-google-async",
+    ),
     path('logout/', LogoutView.as_view(), name='logout'),
     path('token-verify/', DocumentedTokenVerifyView.as_view(), name='token-verify'),
+    path('roster/import/', RosterImportView.as_view(), name='roster-import'),
 ]
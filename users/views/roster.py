@@ -0,0 +1,68 @@
+import csv
+
+from drf_spectacular.utils import extend_schema
+from rest_framework import permissions, serializers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from ..roster import import_roster, parse_roster, roster_lines
+
+
+class RosterParser(BaseParser):
+    """
+    Parse an uploaded roster into its list of email addresses.
+    """
+
+    roster_format = "csv"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            lines = roster_lines(stream.read() if stream is not None else b"")
+            return list(parse_roster(lines, self.roster_format))
+        except (ValueError, csv.Error) as error:
+            raise ParseError(f"Roster parse error - {error}")
+
+
+class CSVRosterParser(RosterParser):
+    media_type = "text/csv"
+
+
+class NDJSONRosterParser(RosterParser):
+    media_type = "application/x-ndjson"
+    roster_format = "ndjson"
+
+
+class RosterImportSummarySerializer(serializers.Serializer):
+    created = serializers.IntegerField()
+    existing = serializers.IntegerField()
+    invalid = serializers.ListField(child=serializers.CharField())
+
+
+class RosterImportView(APIView):
+    """
+    Create users for a roster of email addresses uploaded as CSV or NDJSON.
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+    parser_classes = [CSVRosterParser, NDJSONRosterParser]
+
+    @extend_schema(
+        request={
+            "text/csv": {"type": "string"},
+            "application/x-ndjson": {"type": "string"},
+        },
+        responses={200: RosterImportSummarySerializer},
+        description="Bulk create users from a roster of email addresses",
+        tags=["authentication"],
+    )
+    def post(self, request):
+        """
+        Import the roster in the request body.
+
+        Returns:
+            Response: Counts of created and already existing users, and the
+            entries that are not valid addresses
+        """
+        return Response(import_roster(request.data))
@@ -1,43 +1,286 @@
+import asyncio
 import os
+import re
+import threading
+import time
+import weakref
+import httpx
 import requests
-import urllib.parse
-import jwt
-from google.auth.transport import requests as google_requests
-from google.oauth2 import id_token
+from asgiref.sync import sync_to_async
+from google.auth import exceptions as google_exceptions
+from google.auth import jwt
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 
 # Load environment variables from .env file
 load_dotenv()
 
-def get_id_token_with_code(code):
+TOKEN_ENDPOINT = os.getenv("GOOGLE_TOKEN_URL", "https://oauth2.googleapis.com/token")
+CERTS_URL = os.getenv("GOOGLE_CERTS_URL", "https://www.googleapis.com/oauth2/v1/certs")
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+# Seconds to wait for Google before giving up on a login.
+HTTP_TIMEOUT = float(os.getenv("GOOGLE_HTTP_TIMEOUT", "10"))
+# Connections kept open per Google host.
+HTTP_POOL_SIZE = int(os.getenv("GOOGLE_HTTP_POOL_SIZE", "10"))
+# Async logins exchanging a code with Google at once, per event loop.
+LOGIN_CONCURRENCY = int(os.getenv("GOOGLE_LOGIN_CONCURRENCY", "100"))
+
+
+class GoogleUnavailable(Exception):
     """
-    Verify Google authentication code and return user information.
-    
+    Google did not answer within ``HTTP_TIMEOUT``, could not be reached, or
+    too many logins are waiting.
+    """
+
+
+def create_session(pool_size=HTTP_POOL_SIZE):
+    """
+    Build a requests session keeping connections to Google open between logins.
+
     Args:
-        code (str): Authorization code from Google OAuth
-    
+        pool_size (int): Connections kept per host, roughly the number of
+            worker threads that may log users in at the same time.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+session = create_session()
+
+
+class CertificateCache:
+    """
+    Google's ID token signing certificates, kept for as long as Google allows.
+
+    The certificates are cached for the ``max-age`` of their
+    ``Cache-Control`` header. Once ``refresh_ratio`` of that time has
+    passed, the next lookup still returns the cached certificates and
+    refreshes them in a background thread, so token verification only
+    waits on the network for the very first login or after an unexpected
+    key rotation.
+
+    Attributes:
+        url (str): Endpoint returning ``{key id: PEM certificate}``.
+        default_max_age (int): Lifetime used when no ``max-age`` is sent.
+        refresh_ratio (float): Fraction of the lifetime after which the
+            certificates are refreshed in the background.
+        min_interval (int): Seconds between two refreshes triggered by an
+            unknown key id, so forged tokens cannot make us hammer Google.
+    """
+
+    max_age_pattern = re.compile(r"max-age=(\d+)")
+
+    def __init__(
+        self, url, http=None, default_max_age=300, refresh_ratio=0.75, min_interval=60
+    ):
+        self.url = url
+        self.http = http or session
+        self.default_max_age = default_max_age
+        self.refresh_ratio = refresh_ratio
+        self.min_interval = min_interval
+        self.certs = None
+        self.fetched_at = self.expires_at = self.refresh_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def get(self):
+        """
+        Return the current certificates, fetching them first if they expired.
+        """
+        now = time.monotonic()
+        if self.certs is None or now >= self.expires_at:
+            return self.refresh(stale=self.certs)
+        if now >= self.refresh_at:
+            self._refresh_in_background()
+        return self.certs
+
+    def refresh(self, stale=None, min_interval=0):
+        """
+        Fetch the certificates, unless another thread already replaced ``stale``.
+
+        Args:
+            stale (dict): The certificates the caller found outdated.
+            min_interval (int): Skip the fetch if the unexpired certificates
+                are younger than this many seconds.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now < self.expires_at and (
+                self.certs is not stale or now - self.fetched_at < min_interval
+            ):
+                return self.certs
+            response = self.http.get(self.url, timeout=HTTP_TIMEOUT)
+            response.raise_for_status()
+            match = self.max_age_pattern.search(response.headers.get("Cache-Control", ""))
+            max_age = int(match.group(1)) if match else self.default_max_age
+            self.certs = response.json()
+            self.fetched_at = now
+            self.expires_at = now + max_age
+            self.refresh_at = now + max_age * self.refresh_ratio
+            return self.certs
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run(stale=self.certs):
+            try:
+                self.refresh(stale=stale)
+            except requests.RequestException:
+                # Keep serving the cached certificates until they expire.
+                pass
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=run, name="google-certs-refresh", daemon=True).start()
+
+
+google_certs = CertificateCache(CERTS_URL)
+
+
+def verify_id_token(id_token_str, audience, certs=None):
+    """
+    Verify a Google ID token locally against the cached certificates.
+
+    Args:
+        id_token_str (str): Encoded ID token.
+        audience (str): Expected ``aud`` claim (our OAuth client ID).
+        certs (CertificateCache): Certificate source, ``google_certs`` by default.
+
     Returns:
-        dict: Verified token information or None if verification fails
+        dict: The token claims.
+
+    Raises:
+        ValueError: If the signature, audience, issuer or expiry is invalid.
     """
-    redirect_uri = "postmessage"
-    token_endpoint = "https://oauth2.googleapis.com/token"
-    
-    payload = {
+    certs = certs or google_certs
+    key_id = jwt.decode_header(id_token_str).get("kid")
+    current = certs.get()
+    if key_id not in current:
+        # Google rotated its keys before our copy expired.
+        current = certs.refresh(stale=current, min_interval=certs.min_interval)
+    claims = jwt.decode(id_token_str, certs=current, audience=audience)
+    if claims.get("iss") not in GOOGLE_ISSUERS:
+        raise ValueError(f"Wrong issuer: {claims.get('iss')}")
+    return claims
+
+
+def token_request(code):
+    """
+    Form data exchanging an authorization code for tokens.
+    """
+    return {
         'code': code,
         'client_id': os.getenv('CLIENT_ID'),
-        'client_secret': os.getenv('CLIENT_SECRET'), 
-        'redirect_uri': redirect_uri,
+        'client_secret': os.getenv('CLIENT_SECRET'),
+        'redirect_uri': 'postmessage',
         'grant_type': 'authorization_code',
     }
 
-    body = urllib.parse.urlencode(payload)
-    headers = {'content-type': 'application/x-www-form-urlencoded'}
 
-    response = requests.post(token_endpoint, data=body, headers=headers)
-    
+def get_id_token_with_code(code):
+    """
+    Verify Google authentication code and return user information.
+
+    Args:
+        code (str): Authorization code from Google OAuth
+
+    Returns:
+        dict: Verified token information or None if verification fails
+
+    Raises:
+        GoogleUnavailable: If Google (its token endpoint or its
+            certificates) could not be reached in time.
+    """
+    try:
+        response = session.post(
+            TOKEN_ENDPOINT, data=token_request(code), timeout=HTTP_TIMEOUT
+        )
+    except requests.RequestException as exc:
+        raise GoogleUnavailable("Google did not answer in time") from exc
+
     if response.ok:
         id_token_str = response.json().get('id_token')
-        return id_token.verify_oauth2_token(id_token_str, google_requests.Request(), os.getenv('CLIENT_ID'))
+        if not id_token_str:
+            return None
+        try:
+            return verify_id_token(id_token_str, os.getenv('CLIENT_ID'))
+        except (ValueError, google_exceptions.GoogleAuthError):
+            return None
+        except requests.RequestException as exc:
+            raise GoogleUnavailable("Google certificates could not be fetched") from exc
     else:
         print(response.json())
         return None
+
+
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client():
+    """
+    Return the httpx client and login semaphore of the running event loop.
+
+    Both belong to the loop that created them. Under ASGI that is the
+    server's loop, so connections are pooled across requests; an async
+    view run under WSGI gets a fresh loop, and thus a fresh client, per
+    request.
+    """
+    loop = asyncio.get_running_loop()
+    if loop not in _async_clients:
+        # httpx checks every idle connection when dispatching a request, so
+        # only a few are kept open even though many may be in use.
+        limits = httpx.Limits(
+            max_connections=LOGIN_CONCURRENCY,
+            max_keepalive_connections=HTTP_POOL_SIZE,
+        )
+        _async_clients[loop] = (
+            httpx.AsyncClient(timeout=HTTP_TIMEOUT, limits=limits),
+            asyncio.Semaphore(LOGIN_CONCURRENCY),
+        )
+    return _async_clients[loop]
+
+
+async def aget_id_token_with_code(code):
+    """
+    Async variant of ``get_id_token_with_code`` for ASGI views.
+
+    At most ``LOGIN_CONCURRENCY`` code exchanges run at once; the others
+    wait, and waiting plus the exchange must fit in ``HTTP_TIMEOUT``.
+
+    Args:
+        code (str): Authorization code from Google OAuth
+
+    Returns:
+        dict: Verified token information or None if verification fails
+
+    Raises:
+        GoogleUnavailable: If Google could not be reached in time.
+    """
+    client, logins = get_async_client()
+    try:
+        async with asyncio.timeout(HTTP_TIMEOUT), logins:
+            response = await client.post(TOKEN_ENDPOINT, data=token_request(code))
+    except (TimeoutError, httpx.TransportError) as exc:
+        raise GoogleUnavailable("Google did not answer in time") from exc
+
+    if not response.is_success:
+        return None
+    id_token_str = response.json().get('id_token')
+    if not id_token_str:
+        return None
+    try:
+        # Off the event loop: the certificates may have to be fetched first.
+        return await sync_to_async(verify_id_token, thread_sensitive=False)(
+            id_token_str, os.getenv('CLIENT_ID')
+        )
+    except (ValueError, google_exceptions.GoogleAuthError):
+        return None
+    except requests.RequestException as exc:
+        raise GoogleUnavailable("Google certificates could not be fetched") from exc
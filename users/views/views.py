@@ -1,19 +1,48 @@
+import json
+from asgiref.sync import sync_to_async
 from django.shortcuts import render
 from django.contrib.auth.models import User
 from django.contrib.auth import logout
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework import status, serializers
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
+from minerva.authentication import ClaimsAccessToken, revocation_list
+from rest_framework_simplejwt.tokens import Token
 from rest_framework_simplejwt.views import TokenVerifyView
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
-from ..serializers.serializer import UserSerializer
+from ..serializers.serializer import (
+    RevocationAwareTokenVerifySerializer,
+    UserSerializer,
+)
+
+from ..roster import new_user
+from .utils import (
+    HTTP_TIMEOUT,
+    GoogleUnavailable,
+    aget_id_token_with_code,
+    get_id_token_with_code,
+)
 
-from .utils import get_id_token_with_code
+# INSERT ... ON CONFLICT (username) DO UPDATE with a no-op update, so the
+# primary key of the row is returned whether this login or a concurrent
+# one inserted it. Both insert the same field values.
+UPSERT_ON_USERNAME = {
+    'update_conflicts': True,
+    'unique_fields': ['username'],
+    'update_fields': ['username'],
+}
 
 def authenticate_or_create_user(email):
     """
     Get existing user or create new one based on email.
+
+    A new user is inserted with a single upsert on the unique ``username``,
+    so concurrent first logins with the same email get the same user
+    instead of failing on the constraint.
     
     Args:
         email (str): User's email address
@@ -21,15 +50,26 @@ def authenticate_or_create_user(email):
     Returns:
         User: Django User instance
     """
-    try:
-        user = User.objects.get(email=email)
-    except User.DoesNotExist:
-        user = User.objects.create_user(username=email, email=email)
+    user = User.objects.filter(email=email).first()
+    if user is None:
+        user = new_user(email)
+        User.objects.bulk_create([user], **UPSERT_ON_USERNAME)
+    return user
+
+async def aauthenticate_or_create_user(email):
+    """
+    Async variant of ``authenticate_or_create_user``.
+    """
+    user = await User.objects.filter(email=email).afirst()
+    if user is None:
+        user = new_user(email)
+        await User.objects.abulk_create([user], **UPSERT_ON_USERNAME)
     return user
 
 def get_jwt_token(user):
     """
-    Generate JWT token for user.
+    Generate JWT token for user, carrying the claims read by
+    ClaimsJWTAuthentication.
     
     Args:
         user (User): Django User instance
@@ -38,7 +78,7 @@ def get_jwt_token(user):
         str: JWT access token
     """
 
-    token = AccessToken.for_user(user)
+    token = ClaimsAccessToken.for_user(user)
     return str(token)
 
 class LoginWithGoogle(APIView):
@@ -50,7 +90,8 @@ class LoginWithGoogle(APIView):
                 'access_token': {'type': 'string'},
                 'user': {'$ref': '#/components/schemas/User'}
             }},
-            400: {'type': 'object', 'properties': {'error': {'type': 'string'}}}
+            400: {'type': 'object', 'properties': {'error': {'type': 'string'}}},
+            503: {'type': 'object', 'properties': {'error': {'type': 'string'}}},
         },
         description='Exchange Google OAuth code for JWT token',
         tags=['authentication']
@@ -72,7 +113,14 @@ class LoginWithGoogle(APIView):
             )
         
         code = request.data['code']
-        id_token = get_id_token_with_code(code)
+        try:
+            id_token = get_id_token_with_code(code)
+        except GoogleUnavailable as exc:
+            return Response(
+                {'error': str(exc)},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': str(int(HTTP_TIMEOUT))},
+            )
 
         if not id_token:
             return Response(
@@ -87,6 +135,52 @@ class LoginWithGoogle(APIView):
         serializer = UserSerializer(user)
         return Response({'access_token': token, 'user': serializer.data})
 
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncLoginWithGoogle(View):
+    """
+    Handle Google OAuth login without holding a worker while Google answers.
+
+    Same request and response as ``LoginWithGoogle``. Served by the ASGI
+    entry point (``minerva.asgi``), the code exchange and the user lookup
+    are awaited on the event loop, so a slow Google only delays the logins
+    waiting on it. Answers 503 when Google does not answer in time.
+    """
+    http_method_names = ["post", "options"]
+
+    async def post(self, request):
+        """
+        Process Google OAuth code and return JWT token.
+
+        Args:
+            request: HTTP request containing Google OAuth code, as JSON or form data
+
+        Returns:
+            JsonResponse: JWT token and user if successful
+        """
+        data = request.POST
+        if request.content_type == "application/json":
+            try:
+                data = json.loads(request.body or b"{}")
+            except ValueError:
+                data = None
+        if not isinstance(data, dict) or "code" not in data:
+            return JsonResponse({"error": "Code is required"}, status=400)
+
+        try:
+            id_token = await aget_id_token_with_code(data["code"])
+        except GoogleUnavailable as exc:
+            response = JsonResponse({"error": str(exc)}, status=503)
+            response["Retry-After"] = str(int(HTTP_TIMEOUT))
+            return response
+        if not id_token:
+            return JsonResponse({"error": "Invalid code"}, status=400)
+
+        user = await aauthenticate_or_create_user(id_token['email'])
+        token = await sync_to_async(get_jwt_token)(user)
+
+        serializer = UserSerializer(user)
+        return JsonResponse({'access_token': token, 'user': serializer.data})
+
 class LogoutResponseSerializer(serializers.Serializer):
     message = serializers.CharField()
 
@@ -99,11 +193,13 @@ class LogoutView(APIView):
     )
     def post(self, request):
         """
-        Logout user and blacklist JWT token.
+        Logout user and revoke the JWT token used for the request.
         
         Returns:
             Response: Success message
         """
+        if isinstance(request.auth, Token):
+            revocation_list.revoke(request.auth)
         logout(request)
         return Response({"message": "Successfully logged out"})
     
@@ -117,4 +213,4 @@ class LogoutView(APIView):
     tags=['authentication']
 )
 class DocumentedTokenVerifyView(TokenVerifyView):
-    pass
\ No newline at end of file
+    serializer_class = RevocationAwareTokenVerifySerializer
\ No newline at end of file